@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Per-poll cost of the bypass check on a large DOM: title()+content() vs the in-page probe.
+
+Needs the CloakBrowser binary (python -c "import cloakbrowser; cloakbrowser.ensure_binary()").
+
+    python benchmarks/bench_bypass_probe.py --nodes 20000 --polls 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cloakbrowser as cb
+
+from cf_bypasser.core.bypasser import CloakBypasser
+
+
+async def legacy_is_bypassed(page, markers) -> bool:
+    """The pre-probe check: title() plus a full DOM serialization, lowercased in Python."""
+    title = await page.title()
+    if "just a moment" in title.lower():
+        return False
+    lowered = (await page.content()).lower()
+    if "please complete the captcha" in lowered:
+        return False
+    return not any(marker in lowered for marker in markers)
+
+
+def big_dom(nodes: int) -> str:
+    rows = "".join(f"<div class='row' data-i='{i}'><span>item {i}</span><p>lorem ipsum dolor sit amet {i}</p></div>"
+                   for i in range(nodes))
+    return f"<html><head><title>bench</title></head><body>{rows}</body></html>"
+
+
+async def timed(fn, polls):
+    samples = []
+    for _ in range(polls):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--polls", type=int, default=50)
+    args = parser.parse_args()
+
+    bypasser = CloakBypasser(log=False, cache_file=os.devnull)
+    browser = await cb.launch_async(headless=True)
+    try:
+        page = await browser.new_page()
+        await page.set_content(big_dom(args.nodes))
+        size = len(await page.content())
+        markers = bypasser._BLOCK_MARKERS
+
+        legacy = await timed(lambda: legacy_is_bypassed(page, markers), args.polls)
+        probe = await timed(lambda: bypasser.is_bypassed(page), args.polls)
+
+        print(f"DOM: {args.nodes} nodes, {size / 1e6:.2f} MB serialized, {args.polls} polls")
+        print(f"title()+content(): median {legacy[0]:.2f} ms  max {legacy[1]:.2f} ms")
+        print(f"in-page probe:     median {probe[0]:.2f} ms  max {probe[1]:.2f} ms")
+    finally:
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Cost of clear_expired() at scale: the old full scan vs the expiry heap.
+
+Persistence is stubbed out so only the in-memory expiry work is measured.
+
+    python benchmarks/bench_cache_expiry.py --entries 100000 --expired-pct 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+
+
+class MemoryOnlyCache(CookieCache):
+    def _write_changes(self, upserts, deletes, clear):
+        return True
+
+
+def legacy_clear_expired(cache: CookieCache) -> int:
+    """The pre-heap implementation: is_expired() (a datetime.now()) on every entry."""
+    with cache.lock:
+        expired_keys = [k for k, v in cache.cache.items() if v.is_expired()]
+        for key in expired_keys:
+            del cache.cache[key]
+        return len(expired_keys)
+
+
+def populate(entries: int, expired: int) -> CookieCache:
+    cache = MemoryOnlyCache(os.path.join(tempfile.mkdtemp(), "cache.json"), write_behind=False)
+    for i in range(entries):
+        ttl = -1 if i < expired else 29
+        cache.set(f"key{i}", {"cf_clearance": "x" * 40}, "UA", ttl_minutes=ttl)
+    return cache
+
+
+def timed(fn, cache, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(cache)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--expired-pct", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    expired = int(args.entries * args.expired_pct / 100)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    print(f"{args.entries} entries, {expired} expired")
+    for name, fn in (("legacy scan", legacy_clear_expired), ("expiry heap", CookieCache.clear_expired)):
+        first = populate(args.entries, expired)
+        start = time.perf_counter()
+        removed = fn(first)
+        sweep_ms = (time.perf_counter() - start) * 1000
+        idle_ms = timed(fn, first, args.rounds)
+        print(f"{name:12s}  sweep with {removed} expired: {sweep_ms:8.2f} ms   "
+              f"nothing expired (median of {args.rounds}): {idle_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Memory per cached entry: the old dataclass (datetimes, per-entry dict/UA) vs CachedCookies.
+
+Entries mimic production: a few distinct user agents and cookie-name sets shared by many
+host+proxy keys, with values decoded from JSON (so nothing is shared by accident).
+
+    python benchmarks/bench_cache_memory.py --entries 50000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cf_bypasser.cache.cookie_cache import CachedCookies
+
+USER_AGENTS = [f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/14{i}.0.0.0 Safari/537.36"
+               for i in range(4)]
+NAME_SETS = [("cf_clearance", "__cf_bm"), ("cf_clearance", "__cf_bm", "__cfruid"), ("cf_clearance",)]
+
+
+@dataclass
+class LegacyCachedCookies:
+    key: str
+    cookies: Dict[str, str]
+    user_agent: str
+    timestamp: datetime
+    expires_at: datetime
+    exit_ip: Optional[str] = None
+
+
+def raw_entries(n):
+    # JSON round trip: every string is a fresh object, as when loaded from disk/responses
+    rows = [{"key": f"{i:032x}", "ua": USER_AGENTS[i % len(USER_AGENTS)],
+             "cookies": {name: f"{name}-{i}-" + "v" * 40 for name in NAME_SETS[i % len(NAME_SETS)]}}
+            for i in range(n)]
+    return json.loads(json.dumps(rows))
+
+
+def build_legacy(rows):
+    now = datetime.now()
+    return [LegacyCachedCookies(r["key"], r["cookies"], r["ua"], now, now + timedelta(minutes=29)) for r in rows]
+
+
+def build_compact(rows):
+    now = time.time()
+    return [CachedCookies(r["key"], r["cookies"], r["ua"], now, now + 29 * 60) for r in rows]
+
+
+def measure(builder, n):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    rows = raw_entries(n)
+    entries = builder(rows)
+    del rows  # only what the entries keep alive stays counted
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / n, entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=50_000)
+    args = parser.parse_args()
+
+    legacy, _ = measure(build_legacy, args.entries)
+    compact, _ = measure(build_compact, args.entries)
+    print(f"{args.entries} entries")
+    print(f"legacy dataclass : {legacy:7.0f} bytes/entry")
+    print(f"CachedCookies    : {compact:7.0f} bytes/entry ({100 * (1 - compact / legacy):.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
-from .cookie_cache import CookieCache
+from .cookie_cache import CookieCache, MemoryCookieCache
+from .sqlite_cache import SQLiteCookieCache
+from .shared_cache import SharedSQLiteCookieCache
+from .redis_cache import RedisCookieCache
+from .negative_cache import NegativeCache
+from .backends import create_cookie_cache, register_backend
+from .ttl import TTLPolicy
 
-__all__ = ["CookieCache"]
\ No newline at end of file
+__all__ = ["CookieCache", "MemoryCookieCache", "SQLiteCookieCache", "SharedSQLiteCookieCache", "RedisCookieCache",
+           "NegativeCache", "create_cookie_cache", "register_backend", "TTLPolicy"]
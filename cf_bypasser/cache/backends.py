@@ -0,0 +1,46 @@
+import logging
+import os
+from typing import Callable, Dict
+
+from cf_bypasser.cache.cookie_cache import CookieCache, MemoryCookieCache
+from cf_bypasser.cache.sqlite_cache import SQLiteCookieCache
+from cf_bypasser.cache.shared_cache import SharedSQLiteCookieCache
+from cf_bypasser.cache.redis_cache import RedisCookieCache
+from cf_bypasser.utils.constants import COOKIE_CACHE_BACKEND, DEFAULT_CACHE_FILE, SQLITE_CACHE_FILE, CACHE_SHARED
+
+
+def _db_file(cache_file: str) -> str:
+    return SQLITE_CACHE_FILE or os.path.splitext(cache_file)[0] + ".db"
+
+
+# name -> factory(cache_file); register_backend() adds more
+BACKENDS: Dict[str, Callable[[str], CookieCache]] = {
+    "memory": lambda cache_file: MemoryCookieCache(),
+    "json": lambda cache_file: CookieCache(cache_file),
+    "sqlite": lambda cache_file: SQLiteCookieCache(_db_file(cache_file), migrate_from=cache_file),
+    "redis": lambda cache_file: RedisCookieCache(),
+}
+
+
+def register_backend(name: str, factory: Callable[[str], CookieCache]) -> None:
+    """Make a custom CookieCache subclass selectable through CF_CACHE_BACKEND."""
+    BACKENDS[name.lower()] = factory
+
+
+def create_cookie_cache(cache_file: str = DEFAULT_CACHE_FILE, backend: str = COOKIE_CACHE_BACKEND,
+                        shared: bool = CACHE_SHARED) -> CookieCache:
+    """Build the configured cookie cache backend ("memory", "json", "sqlite" or "redis").
+
+    For sqlite, cache_file is the legacy JSON file to migrate from; the database lives at
+    CF_CACHE_DB, or next to it with a .db extension. shared=True uses SQLite with
+    cross-worker claims (SharedSQLiteCookieCache) unless the backend is already shared
+    across processes, as redis is.
+    """
+    backend = backend.lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown cookie cache backend: {backend!r} (expected one of {', '.join(sorted(BACKENDS))})")
+    if shared and backend != "redis":
+        if backend != "sqlite":
+            logging.info(f"CF_CACHE_SHARED: using a shared SQLite cache instead of the {backend} backend")
+        return SharedSQLiteCookieCache(_db_file(cache_file), migrate_from=cache_file)
+    return BACKENDS[backend](cache_file)
@@ -1,26 +1,99 @@
+import asyncio
+import heapq
 import json
 import logging
 import os
+import sys
 import tempfile
 import threading
-from datetime import datetime, timedelta
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+import time
+from datetime import datetime
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 
-from cf_bypasser.utils.constants import COOKIE_TTL_MINUTES, DEFAULT_CACHE_FILE
+from cf_bypasser.utils.constants import (
+    COOKIE_TTL_MINUTES,
+    DEFAULT_CACHE_FILE,
+    CACHE_WRITE_BEHIND,
+    CACHE_FLUSH_INTERVAL_SECONDS,
+    CACHE_FLUSH_MAX_CHANGES,
+    CACHE_SWEEP_INTERVAL_SECONDS,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    STALE_GRACE_SECONDS,
+)
+
+# rough per-entry overhead (slotted object, value tuple, floats) on top of the string payload
+_ENTRY_OVERHEAD_BYTES = 250
+
+# Shared cookie-name tuples: thousands of entries carry the same few name sets
+# (cf_clearance, __cf_bm, ...), so each entry only references a canonical tuple.
+_NAME_TABLE: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_NAME_TABLE_LIMIT = 4096
+
+
+def _shared_names(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    shared = _NAME_TABLE.get(names)
+    if shared is None:
+        shared = tuple(sys.intern(name) for name in names)
+        if len(_NAME_TABLE) < _NAME_TABLE_LIMIT:
+            _NAME_TABLE[shared] = shared
+    return shared
 
 
-@dataclass
 class CachedCookies:
-    key: str
-    cookies: Dict[str, str]
-    user_agent: str
-    timestamp: datetime
-    expires_at: datetime
-    exit_ip: Optional[str] = None  # proxy/exit IP at cache time, for the optional IP-change check
+    """One cache entry, kept compact for large caches.
+
+    Times are epoch floats (`created`, `expires`), so expiry checks are a float compare;
+    datetimes only appear via the `timestamp`/`expires_at` properties and serialization.
+    The user agent, proxy id and hostname are interned and cookie names come from a shared
+    table, so an entry only owns its key, cookie values and exit IP.
+    """
+
+    __slots__ = ("key", "_names", "_values", "user_agent", "created", "expires", "exit_ip", "proxy_id",
+                 "hostname")
+
+    def __init__(self, key: str, cookies: Dict[str, str], user_agent: str, created: float, expires: float,
+                 exit_ip: Optional[str] = None, proxy_id: Optional[str] = None, hostname: Optional[str] = None):
+        self.key = key
+        self._names = _shared_names(tuple(cookies))
+        self._values = tuple(cookies.values())
+        self.user_agent = sys.intern(user_agent)
+        self.created = created
+        self.expires = expires
+        self.exit_ip = exit_ip  # proxy/exit IP at cache time, for the optional IP-change check
+        # utils.misc.proxy_id() of the proxy the cookies were solved through (None: unknown)
+        self.proxy_id = sys.intern(proxy_id) if proxy_id else None
+        # host the key was derived from, for filtered exports (None: entries cached before it was kept)
+        self.hostname = sys.intern(hostname) if hostname else None
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        return dict(zip(self._names, self._values))
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.created)
 
-    def is_expired(self) -> bool:
-        return datetime.now() >= self.expires_at
+    @property
+    def expires_at(self) -> datetime:
+        return datetime.fromtimestamp(self.expires)
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires
+
+    def approx_size(self) -> int:
+        """Approximate memory footprint in bytes, used for the cache's memory budget."""
+        return (_ENTRY_OVERHEAD_BYTES + len(self.key) + len(self.exit_ip or "")
+                + sum(len(value) for value in self._values))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CachedCookies):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CachedCookies(key={self.key!r}, cookies={list(self._names)!r}, expires_at={self.expires_at})"
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -30,6 +103,8 @@ class CachedCookies:
             'timestamp': self.timestamp.isoformat(),
             'expires_at': self.expires_at.isoformat(),
             'exit_ip': self.exit_ip,
+            'proxy_id': self.proxy_id,
+            'hostname': self.hostname,
         }
 
     @classmethod
@@ -38,20 +113,84 @@ class CachedCookies:
             key=data['key'],
             cookies=data['cookies'],
             user_agent=data['user_agent'],
-            timestamp=datetime.fromisoformat(data['timestamp']),
-            expires_at=datetime.fromisoformat(data['expires_at']),
+            created=datetime.fromisoformat(data['timestamp']).timestamp(),
+            expires=datetime.fromisoformat(data['expires_at']).timestamp(),
             exit_ip=data.get('exit_ip'),
+            proxy_id=data.get('proxy_id'),
+            hostname=data.get('hostname'),
         )
 
 
 class CookieCache:
-    """Thread-safe cache for Cloudflare clearance cookies."""
+    """Thread-safe cache for Cloudflare clearance cookies.
+
+    Entries live in memory; changes reach disk through _write_changes(). This class
+    persists by rewriting one JSON file; subclasses (see sqlite_cache) override it.
+
+    In write-behind mode (once start() runs the flusher task) changes only mark the cache
+    dirty. The flusher writes them from a worker thread every flush_interval seconds, or
+    sooner after flush_changes changes, so a burst of changes becomes one write. Call
+    flush() (or close()) on shutdown.
+
+    Expiry is tracked in a min-heap of (expires_at, key) with lazy deletion: replaced or
+    invalidated entries leave outdated heap items that are skipped when popped. clear_expired()
+    therefore only touches entries that actually expired (O(k log n)), and start() also
+    runs a sweeper task that calls it in the background.
+
+    Capacity is bounded by max_entries and max_bytes (approximate, 0 = unlimited): `cache`
+    is kept in LRU order and the least recently used entries are evicted as part of the
+    same write as the insert that overflowed it.
+
+    With stale_grace > 0, expired entries are kept for that many extra seconds and
+    get(key, allow_stale=True) still returns them (callers check is_expired()), so a
+    caller can serve them while a refresh runs. They're dropped once the grace ends.
+    """
 
-    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE):
+    # True when several worker processes share this cache (see shared_cache)
+    shared = False
+    # True when get/set/invalidate/claims wait on a network server; async code calls them via run()
+    blocking_io = False
+    # False when the in-memory dict is only an L1 in front of a shared store: evicting an
+    # entry locally must not delete it for everyone else (see redis_cache)
+    _persist_evictions = True
+
+    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE, write_behind: bool = CACHE_WRITE_BEHIND,
+                 flush_interval: float = CACHE_FLUSH_INTERVAL_SECONDS,
+                 flush_changes: int = CACHE_FLUSH_MAX_CHANGES,
+                 max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 stale_grace: float = STALE_GRACE_SECONDS):
         self.cache_file = cache_file
-        self.cache: Dict[str, CachedCookies] = {}
+        self.cache: "OrderedDict[str, CachedCookies]" = OrderedDict()
         self.lock = threading.RLock()
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_changes = flush_changes
+        # key -> entry to write, or None to delete; guarded by self.lock
+        self._dirty: Dict[str, Optional[CachedCookies]] = {}
+        self._dirty_clear = False
+        self._dirty_changes = 0
+        self._dirty_since: Optional[float] = None
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._flusher_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.flush_failures = 0
+        self.last_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self.sweep_interval = CACHE_SWEEP_INTERVAL_SECONDS
+        self.max_entries = max_entries
+        self.stale_grace = stale_grace
+        self.max_bytes = max_bytes
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.evictions = {"entries": 0, "bytes": 0}
+        # proxy_id -> keys solved through that proxy, for invalidate_proxy()
+        self._by_proxy: Dict[str, set] = {}
         self._load_cache()
+        self._reindex()
 
     def _load_cache(self):
         try:
@@ -66,8 +205,10 @@ class CookieCache:
         except (OSError, json.JSONDecodeError, ValueError) as e:
             logging.warning(f"Failed to load cache file: {e}")
 
-    def _save_cache(self):
-        data = {key: cached.to_dict() for key, cached in self.cache.items()}
+    def _save_cache(self) -> bool:
+        # snapshot under the lock, write outside it so a flush thread doesn't stall readers
+        with self.lock:
+            data = {key: cached.to_dict() for key, cached in self.cache.items()}
         directory = os.path.dirname(os.path.abspath(self.cache_file))
         fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cf_cache.", suffix=".tmp")
         try:
@@ -76,59 +217,389 @@ class CookieCache:
                 f.flush()
                 os.fsync(f.fileno())
             os.replace(tmp_path, self.cache_file)  # atomic on POSIX
+            return True
         except Exception as e:
             try:
                 os.remove(tmp_path)
             except OSError:
                 pass
             logging.error(f"Failed to save cache file: {e}")
+            return False
+
+    def _write_changes(self, upserts: List[CachedCookies], deletes: List[str], clear: bool) -> bool:
+        """Persist a batch of changes; False if it wasn't written. The JSON file is always rewritten whole."""
+        return self._save_cache()
+
+    def _reindex(self):
+        """Rebuild LRU order, sizes and the expiry heap after loading, then apply the limits."""
+        with self.lock:
+            entries = sorted(self.cache.values(), key=lambda cached: cached.created)
+            self.cache = OrderedDict((cached.key, cached) for cached in entries)
+            self._sizes = {key: cached.approx_size() for key, cached in self.cache.items()}
+            self._bytes = sum(self._sizes.values())
+            self._by_proxy = {}
+            for key, cached in self.cache.items():
+                if cached.proxy_id:
+                    self._by_proxy.setdefault(cached.proxy_id, set()).add(key)
+            self._rebuild_expiry_heap()
+            evicted = self._evict_overflow()
+            if evicted and self._persist_evictions:
+                self._changed(deletes=evicted)
+
+    def _store(self, cached: CachedCookies):
+        """Insert/replace an entry as most recently used (caller holds self.lock)."""
+        self._discard(cached.key)
+        self.cache[cached.key] = cached
+        size = cached.approx_size()
+        self._sizes[cached.key] = size
+        self._bytes += size
+        if cached.proxy_id:
+            self._by_proxy.setdefault(cached.proxy_id, set()).add(cached.key)
+
+    def _discard(self, key: str) -> Optional[CachedCookies]:
+        """Remove an entry and its size/proxy accounting (caller holds self.lock)."""
+        cached = self.cache.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+        if cached is not None and cached.proxy_id:
+            keys = self._by_proxy.get(cached.proxy_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_proxy[cached.proxy_id]
+        return cached
+
+    def _evict_overflow(self) -> List[str]:
+        """Evict least recently used entries until within limits; returns the evicted keys."""
+        evicted = []
+        while self.cache:
+            if self.max_entries > 0 and len(self.cache) > self.max_entries:
+                reason = "entries"
+            elif self.max_bytes > 0 and self._bytes > self.max_bytes and len(self.cache) > 1:
+                reason = "bytes"
+            else:
+                break
+            key = next(iter(self.cache))
+            self._discard(key)
+            self.evictions[reason] += 1
+            evicted.append(key)
+        if evicted:
+            logging.info(f"Evicted {len(evicted)} least recently used cache entries")
+        return evicted
+
+    def capacity_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "approx_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": dict(self.evictions),
+            }
+
+    def _rebuild_expiry_heap(self):
+        with self.lock:
+            self._expiry_heap = [(cached.expires, key) for key, cached in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def _track_expiry(self, cached: CachedCookies):
+        """Index a new/replaced entry (caller holds self.lock)."""
+        heapq.heappush(self._expiry_heap, (cached.expires, cached.key))
+        # outdated items pile up when keys are replaced or invalidated early; compact now and then
+        if len(self._expiry_heap) > 2 * len(self.cache) + 1024:
+            self._rebuild_expiry_heap()
+
+    def _pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return the keys whose entries have expired past the stale grace (caller holds self.lock)."""
+        now = time.time() if now is None else now
+        heap = self._expiry_heap
+        expired = []
+        while heap and heap[0][0] + self.stale_grace <= now:
+            expires_at, key = heapq.heappop(heap)
+            cached = self.cache.get(key)
+            # skip outdated heap items: the key is gone or was re-set with a new expiry
+            if cached is not None and cached.expires == expires_at:
+                self._discard(key)
+                expired.append(key)
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        """Epoch seconds when the earliest heap item (possibly outdated) is due for removal, or None."""
+        with self.lock:
+            return self._expiry_heap[0][0] + self.stale_grace if self._expiry_heap else None
+
+    def _changed(self, upserts: List[CachedCookies] = (), deletes: List[str] = (), clear: bool = False):
+        """Record a change (caller holds self.lock): write it now, or mark it dirty for the flusher."""
+        if not (self.write_behind and self._flusher is not None and not self._flusher.done()):
+            self._write_changes(list(upserts), list(deletes), clear)
+            return
+        if clear:
+            self._dirty.clear()
+            self._dirty_clear = True
+        for cached in upserts:
+            self._dirty[cached.key] = cached
+        for key in deletes:
+            self._dirty[key] = None
+        self._dirty_changes += max(1, len(upserts) + len(deletes))
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        if self._dirty_changes >= self.flush_changes:
+            self._flusher_loop.call_soon_threadsafe(self._flush_wakeup.set)
 
-    def get(self, key: str) -> Optional[CachedCookies]:
+    def flush(self) -> bool:
+        """Write all pending changes in one batch.
+
+        Returns False if there was nothing to write or the write failed; a failed batch is put
+        back as pending (changes made meanwhile win) and retried by the next flush.
+        """
+        with self._flush_lock:
+            with self.lock:
+                if not self._dirty and not self._dirty_clear:
+                    return False
+                batch, clear = self._dirty, self._dirty_clear
+                changes, since = self._dirty_changes, self._dirty_since
+                self._dirty = {}
+                self._dirty_clear = False
+                self._dirty_changes = 0
+                self._dirty_since = None
+            upserts = [cached for cached in batch.values() if cached is not None]
+            deletes = [key for key, cached in batch.items() if cached is None]
+            started = time.perf_counter()
+            written = self._write_changes(upserts, deletes, clear)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if not written:
+                self._requeue(batch, clear, changes, since)
+                self.flush_failures += 1
+                return False
+            self.last_flush_ms = elapsed_ms
+            self._flush_ms_total += elapsed_ms
+            self.flushes += 1
+            return True
+
+    def _requeue(self, batch: Dict[str, Optional[CachedCookies]], clear: bool, changes: int,
+                 since: Optional[float]):
+        """Put an unwritten flush batch back under whatever was changed since it was taken."""
+        with self.lock:
+            if self._dirty_clear:
+                return  # cleared again meanwhile: the old batch is moot
+            for key, cached in batch.items():
+                self._dirty.setdefault(key, cached)
+            self._dirty_clear = clear
+            self._dirty_changes += changes
+            if since is not None and (self._dirty_since is None or since < self._dirty_since):
+                self._dirty_since = since
+
+    def start(self):
+        """Start the background expiry sweeper and, in write-behind mode, the flusher."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+        if not self.write_behind or (self._flusher is not None and not self._flusher.done()):
+            return
+        self._flusher_loop = asyncio.get_running_loop()
+        self._flush_wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _sweep_loop(self):
+        while True:
+            next_expiry = self.next_expiry()
+            delay = self.sweep_interval
+            if next_expiry is not None:
+                delay = min(delay, max(next_expiry - time.time(), 0.0))
+            await asyncio.sleep(max(delay, 0.05))
+            try:
+                self.clear_expired()
+            except Exception as e:
+                logging.error(f"Cookie cache expiry sweep failed: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logging.error(f"Cookie cache flush failed: {e}")
+
+    async def stop(self):
+        """Stop the sweeper and flusher and write whatever is still pending; later changes are written through."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    def persistence_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            dirty_age = time.monotonic() - self._dirty_since if self._dirty_since is not None else 0.0
+            pending = len(self._dirty) + (1 if self._dirty_clear else 0)
+        return {
+            "mode": "write-behind" if self._flusher is not None else "write-through",
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._flush_ms_total / self.flushes, 2) if self.flushes else 0.0,
+            "pending_changes": pending,
+            "dirty_age_seconds": round(dirty_age, 3),
+        }
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CachedCookies]:
         with self.lock:
             cached = self.cache.get(key)
-            if cached and not cached.is_expired():
+            if cached is None:
+                return None
+            now = time.time()
+            if not cached.is_expired(now):
                 logging.info(f"Using cached cookies for {key}")
+                self.cache.move_to_end(key)
                 return cached
-            elif cached and cached.is_expired():
-                logging.info(f"Cached cookies for {key} expired, removing")
-                del self.cache[key]
-                self._save_cache()
+            if now < cached.expires + self.stale_grace:
+                if allow_stale:
+                    logging.info(f"Using stale cached cookies for {key}")
+                    return cached
+                return None
+            logging.info(f"Cached cookies for {key} expired, removing")
+            self._discard(key)
+            self._changed(deletes=[key])
             return None
 
     def set(self, key: str, cookies: Dict[str, str], user_agent: str,
-            ttl_minutes: int = COOKIE_TTL_MINUTES, exit_ip: Optional[str] = None):
+            ttl_minutes: int = COOKIE_TTL_MINUTES, exit_ip: Optional[str] = None,
+            ttl_seconds: Optional[float] = None, proxy_id: Optional[str] = None,
+            hostname: Optional[str] = None):
+        """Cache cookies for ttl_seconds when given, else ttl_minutes."""
+        if ttl_seconds is None:
+            ttl_seconds = ttl_minutes * 60
         with self.lock:
-            expires_at = datetime.now() + timedelta(minutes=ttl_minutes)
+            now = time.time()
             cached = CachedCookies(
                 key=key,
                 cookies=cookies,
                 user_agent=user_agent,
-                timestamp=datetime.now(),
-                expires_at=expires_at,
+                created=now,
+                expires=now + ttl_seconds,
                 exit_ip=exit_ip,
+                proxy_id=proxy_id,
+                hostname=hostname,
             )
-            self.cache[key] = cached
-            self._save_cache()
-            logging.info(f"Cached cookies for {key}, expires at {expires_at}")
+            self._store(cached)
+            self._track_expiry(cached)
+            # evictions ride along with this write instead of one write per evicted key
+            evicted = self._evict_overflow()
+            self._changed(upserts=[cached], deletes=evicted if self._persist_evictions else ())
+            logging.info(f"Cached cookies for {key}, expires at {cached.expires_at}")
 
-    def clear_expired(self):
+    def clear_expired(self) -> int:
+        """Drop expired entries; returns how many were removed."""
         with self.lock:
-            expired_keys = [k for k, v in self.cache.items() if v.is_expired()]
-            for key in expired_keys:
-                del self.cache[key]
+            expired_keys = self._pop_expired()
             if expired_keys:
-                self._save_cache()
+                self._changed(deletes=expired_keys)
                 logging.info(f"Cleared {len(expired_keys)} expired cache entries")
+            return len(expired_keys)
 
     def invalidate(self, key: str):
         with self.lock:
             if key in self.cache:
-                del self.cache[key]
-                self._save_cache()
+                self._discard(key)
+                self._changed(deletes=[key])
                 logging.info(f"Invalidated cache for {key}")
 
+    def proxy_ids(self) -> List[str]:
+        """Proxy ids that currently have cache entries."""
+        with self.lock:
+            return list(self._by_proxy)
+
+    def invalidate_proxy(self, proxy_id: str) -> int:
+        """Drop every entry solved through proxy_id in one batch; returns how many were removed."""
+        with self.lock:
+            keys = list(self._by_proxy.get(proxy_id, ()))
+            for key in keys:
+                self._discard(key)
+            if keys:
+                self._changed(deletes=keys)
+                logging.info(f"Invalidated {len(keys)} cache entries for proxy {proxy_id}")
+            return len(keys)
+
+    def snapshot(self, hostname: Optional[str] = None, proxy_id: Optional[str] = None) -> List[CachedCookies]:
+        """Unexpired entries, optionally only those for hostname and/or proxy_id."""
+        with self.lock:
+            if proxy_id is not None:
+                entries = [self.cache[key] for key in self._by_proxy.get(proxy_id, ())]
+            else:
+                entries = list(self.cache.values())
+        now = time.time()
+        return [cached for cached in entries
+                if not cached.is_expired(now) and (hostname is None or cached.hostname == hostname)]
+
+    def import_entries(self, entries: List[CachedCookies]) -> int:
+        """Merge entries (e.g. a peer's snapshot) in one batched write; returns how many were taken.
+
+        Expired entries and entries older than the one already cached for their key are skipped,
+        so importing never replaces fresher cookies.
+        """
+        with self.lock:
+            now = time.time()
+            taken = []
+            for cached in entries:
+                current = self.cache.get(cached.key)
+                if cached.is_expired(now) or (current is not None and current.created >= cached.created):
+                    continue
+                self._store(cached)
+                self._track_expiry(cached)
+                taken.append(cached)
+            if taken:
+                evicted = self._evict_overflow()
+                self._changed(upserts=[cached for cached in taken if cached.key in self.cache],
+                              deletes=evicted if self._persist_evictions else ())
+                logging.info(f"Imported {len(taken)} cache entries")
+            return len(taken)
+
+    async def run(self, method, *args, **kwargs):
+        """Call one of this cache's methods from async code without blocking the event loop on I/O."""
+        if self.blocking_io:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    # Cross-process solve claims. A private cache has no other workers, so every claim succeeds.
+    def try_claim(self, key: str) -> bool:
+        return True
+
+    def claim_held(self, key: str) -> bool:
+        return False
+
+    def release_claim(self, key: str) -> None:
+        pass
+
+    def close(self):
+        """Write any pending changes and release backend resources."""
+        self.flush()
+
     def clear_all(self):
         with self.lock:
             self.cache.clear()
-            self._save_cache()
+            self._sizes.clear()
+            self._by_proxy.clear()
+            self._bytes = 0
+            self._expiry_heap = []
+            self._changed(clear=True)
             logging.info("Cleared all cache entries")
+
+
+class MemoryCookieCache(CookieCache):
+    """Cookie cache that lives only in memory: nothing is loaded or written."""
+
+    def __init__(self, **kwargs):
+        kwargs["write_behind"] = False
+        super().__init__(cache_file=":memory:", **kwargs)
+
+    def _load_cache(self):
+        pass
+
+    def _write_changes(self, upserts: List[CachedCookies], deletes: List[str], clear: bool) -> bool:
+        return True
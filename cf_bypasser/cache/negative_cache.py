@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from cf_bypasser.utils.constants import BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS
+
+
+@dataclass
+class FailedSolve:
+    key: str
+    failure_class: str
+    failures: int
+    retry_at: float  # time.monotonic() deadline
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        return max(0.0, self.retry_at - (time.monotonic() if now is None else now))
+
+
+class NegativeCache:
+    """Thread-safe record of recent solve failures, keyed like CookieCache.
+
+    Each consecutive failure for a key doubles its backoff (base, 2*base, 4*base, ...
+    capped at max_seconds); while a key is backing off, callers are refused without
+    launching a browser. A success clears the key. In-memory only: a restart forgets it.
+    """
+
+    def __init__(self, base_seconds: float = BACKOFF_BASE_SECONDS, max_seconds: float = BACKOFF_MAX_SECONDS):
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.entries: Dict[str, FailedSolve] = {}
+        self.lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.base_seconds > 0
+
+    def check(self, key: str) -> Optional[FailedSolve]:
+        """Return the entry if key is still backing off (and count the rejection), else None."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.remaining() <= 0:
+                return None
+            self.rejected += 1
+            return entry
+
+    def record(self, key: str, failure_class: str) -> float:
+        """Record a failed solve; returns the backoff applied in seconds."""
+        if not self.enabled:
+            return 0.0
+        with self.lock:
+            entry = self.entries.get(key)
+            failures = entry.failures + 1 if entry else 1
+            backoff = min(self.base_seconds * 2 ** (failures - 1), self.max_seconds)
+            self.entries[key] = FailedSolve(key, failure_class, failures, time.monotonic() + backoff)
+        logging.info(f"Solve for {key} failed ({failure_class}, #{failures}); backing off {backoff:.0f}s")
+        return backoff
+
+    def clear(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear_all(self) -> int:
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self.lock:
+            backing_off = {k: e for k, e in self.entries.items() if e.remaining(now) > 0}
+            by_class: Dict[str, int] = {}
+            for entry in backing_off.values():
+                by_class[entry.failure_class] = by_class.get(entry.failure_class, 0) + 1
+            return {
+                "entries": len(self.entries),
+                "backing_off": len(backing_off),
+                "by_failure_class": by_class,
+                "rejected": self.rejected,
+                "keys": {k: {"failure_class": e.failure_class, "failures": e.failures,
+                             "retry_after_seconds": round(e.remaining(now), 1)}
+                         for k, e in backing_off.items()},
+            }
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from cf_bypasser.cache.cookie_cache import CachedCookies, CookieCache
+from cf_bypasser.cache.resp import RespClient, RespError
+from cf_bypasser.utils.constants import (
+    REDIS_URL,
+    REDIS_PREFIX,
+    REDIS_TIMEOUT_SECONDS,
+    REDIS_COOLDOWN_SECONDS,
+    CACHE_L1_TTL_SECONDS,
+    CLAIM_TTL_SECONDS,
+)
+
+_REMOTE_ERRORS = (OSError, ConnectionError, RespError)
+
+
+def _encode(cached: CachedCookies) -> str:
+    # raw epoch floats, so every node compares `created` exactly
+    return json.dumps({
+        "cookies": cached.cookies,
+        "user_agent": cached.user_agent,
+        "created": cached.created,
+        "expires": cached.expires,
+        "exit_ip": cached.exit_ip,
+        "proxy_id": cached.proxy_id,
+        "hostname": cached.hostname,
+    }, separators=(",", ":"))
+
+
+def _decode(key: str, raw: bytes) -> Optional[CachedCookies]:
+    try:
+        data = json.loads(raw)
+        return CachedCookies(key=key, cookies=data["cookies"], user_agent=data["user_agent"],
+                             created=data["created"], expires=data["expires"],
+                             exit_ip=data.get("exit_ip"), proxy_id=data.get("proxy_id"),
+                             hostname=data.get("hostname"))
+    except (ValueError, TypeError, KeyError) as e:
+        logging.warning(f"Ignoring malformed cache entry for {key}: {e}")
+        return None
+
+
+class RedisCookieCache(CookieCache):
+    """Cookie cache replicated across nodes through a Redis-compatible server.
+
+    The server is the source of truth and the in-memory dict is a local L1 in front of it:
+    - read-through: get() serves an entry from L1 if it was checked against the server
+      in the last l1_ttl seconds, otherwise it re-reads the key (misses always go remote);
+    - write-through: set/invalidate/clear are written immediately, each entry with a PX
+      expiry so the server drops it once it is past its stale grace;
+    - L1 evictions and expiry sweeps stay local and never delete the shared copy.
+
+    Server round trips never happen under self.lock: changes are queued while it is held and
+    sent once it is released, and reads apply their reply afterwards. Async callers go
+    through run() (blocking_io), so the round trips happen in a worker thread.
+
+    Claims (SET NX PX) give cluster-wide singleflight, so one node solves a host while
+    the others wait for its cookies. If the server is unreachable, lookups fall back to
+    L1 and claims succeed locally; after a failure the server is skipped for `cooldown`
+    seconds, so requests don't each wait out a timeout. Errors are counted in persistence_stats().
+    """
+
+    shared = True
+    blocking_io = True
+    _persist_evictions = False
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = REDIS_PREFIX, l1_ttl: float = CACHE_L1_TTL_SECONDS,
+                 claim_ttl: float = CLAIM_TTL_SECONDS, client: Optional[RespClient] = None,
+                 cooldown: float = REDIS_COOLDOWN_SECONDS, **kwargs):
+        kwargs["write_behind"] = False
+        self.client = client or RespClient(url, timeout=REDIS_TIMEOUT_SECONDS)
+        self.prefix = prefix
+        self.l1_ttl = l1_ttl
+        self.claim_ttl = claim_ttl
+        self.cooldown = cooldown
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._validated: Dict[str, float] = {}  # key -> time.monotonic() of the last server read
+        # (upserts, deletes, clear) batches not yet sent; guarded by self.lock
+        self._pending: List[Tuple[List[CachedCookies], List[str], bool]] = []
+        self._send_lock = threading.Lock()
+        self._down_until = 0.0  # time.monotonic() until which the server is skipped
+        self.l1_hits = 0
+        self.remote_reads = 0
+        self.remote_errors = 0
+        self.remote_skipped = 0
+        super().__init__(cache_file=url, **kwargs)
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}cookie:{key}"
+
+    def _claim_key(self, key: str) -> str:
+        return f"{self.prefix}claim:{key}"
+
+    def _remote(self, *commands) -> Optional[List[Any]]:
+        """Replies to commands, or None if the server failed or is cooling down after a failure."""
+        if time.monotonic() < self._down_until:
+            self.remote_skipped += 1
+            return None
+        try:
+            return self.client.pipeline(list(commands))
+        except _REMOTE_ERRORS as e:
+            self.remote_errors += 1
+            self._down_until = time.monotonic() + self.cooldown
+            logging.error(f"Cookie cache server unavailable, using local copies for {self.cooldown:g}s: {e}")
+            return None
+
+    def _load_cache(self):
+        pass  # read-through: L1 fills on demand
+
+    def _scan_entries(self) -> List[str]:
+        keys, cursor = [], b"0"
+        while True:
+            replies = self._remote(("SCAN", cursor, "MATCH", self._entry_key("*"), "COUNT", 500))
+            if replies is None:
+                return keys
+            cursor, batch = replies[0]
+            keys.extend(batch)
+            if cursor in (b"0", "0"):
+                return keys
+
+    def _commands(self, upserts: List[CachedCookies], deletes: List[str], clear: bool) -> List[tuple]:
+        commands = []
+        if clear:
+            commands.extend(("DEL", key) for key in self._scan_entries())
+        now = time.time()
+        for cached in upserts:
+            ttl_ms = int((cached.expires + self.stale_grace - now) * 1000)
+            if ttl_ms > 0:
+                commands.append(("SET", self._entry_key(cached.key), _encode(cached), "PX", ttl_ms))
+        commands.extend(("DEL", self._entry_key(key)) for key in deletes)
+        return commands
+
+    def _write_changes(self, upserts: List[CachedCookies], deletes: List[str], clear: bool) -> bool:
+        commands = self._commands(upserts, deletes, clear)
+        return not commands or self._remote(*commands) is not None
+
+    def _changed(self, upserts: List[CachedCookies] = (), deletes: List[str] = (), clear: bool = False):
+        # caller holds self.lock: only queue the change, _send_pending() writes it
+        self._pending.append((list(upserts), list(deletes), clear))
+
+    def _send_pending(self) -> None:
+        """Write queued changes to the server in the order they were made (caller doesn't hold self.lock)."""
+        with self._send_lock:
+            with self.lock:
+                batches, self._pending = self._pending, []
+            commands = []
+            for upserts, deletes, clear in batches:
+                if clear:
+                    commands = []  # everything queued before a clear is moot
+                commands.extend(self._commands(upserts, deletes, clear))
+            if commands:
+                self._remote(*commands)
+
+    def _discard(self, key: str) -> Optional[CachedCookies]:
+        self._validated.pop(key, None)
+        return super()._discard(key)
+
+    def _sync_key(self, key: str) -> None:
+        """Refresh L1's copy of key from the server (caller doesn't hold self.lock)."""
+        started = time.time()
+        replies = self._remote(("GET", self._entry_key(key)))
+        if replies is None:
+            return  # server down: keep serving L1
+        cached = _decode(key, replies[0]) if replies[0] is not None else None
+        with self.lock:
+            self.remote_reads += 1
+            current = self.cache.get(key)
+            if current is not None and current.created >= started:
+                return  # set here while the read was in flight; the reply is older
+            if replies[0] is None:
+                if current is not None:
+                    self._discard(key)
+                return
+            if cached is None:
+                return
+            if current is None or current.created != cached.created:
+                self._store(cached)
+                self._track_expiry(cached)
+                self._evict_overflow()
+            self._validated[key] = time.monotonic()
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CachedCookies]:
+        with self.lock:
+            current = self.cache.get(key)
+            checked = self._validated.get(key)
+            fresh = not (current is None or checked is None or current.is_expired()
+                         or time.monotonic() - checked >= self.l1_ttl)
+            if fresh:
+                self.l1_hits += 1
+        if not fresh:
+            self._sync_key(key)
+        cached = super().get(key, allow_stale=allow_stale)
+        self._send_pending()
+        return cached
+
+    def set(self, key: str, *args, **kwargs):
+        super().set(key, *args, **kwargs)
+        with self.lock:
+            if key in self.cache:
+                self._validated[key] = time.monotonic()
+        self._send_pending()
+
+    def invalidate(self, key: str):
+        # delete the shared copy even if this node never held the key
+        with self.lock:
+            self._discard(key)
+            self._changed(deletes=[key])
+        logging.info(f"Invalidated cache for {key}")
+        self._send_pending()
+
+    def invalidate_proxy(self, proxy_id: str) -> int:
+        removed = super().invalidate_proxy(proxy_id)
+        self._send_pending()
+        return removed
+
+    def import_entries(self, entries: List[CachedCookies]) -> int:
+        imported = super().import_entries(entries)
+        self._send_pending()
+        return imported
+
+    def clear_expired(self) -> int:
+        # the server expires its own copies; only L1 is swept here
+        with self.lock:
+            return len(self._pop_expired())
+
+    def clear_all(self):
+        with self.lock:
+            super().clear_all()
+            self._validated.clear()
+        self._send_pending()
+
+    def try_claim(self, key: str) -> bool:
+        claim = self._claim_key(key)
+        # SET NX then GET in one round trip: also correct if the SET was retried after a reconnect
+        replies = self._remote(("SET", claim, self.owner, "NX", "PX", int(self.claim_ttl * 1000)),
+                               ("GET", claim))
+        if replies is None:
+            return True  # no coordination available; solve locally
+        holder = replies[1]
+        return holder is not None and holder.decode("utf-8") == self.owner
+
+    def claim_held(self, key: str) -> bool:
+        replies = self._remote(("EXISTS", self._claim_key(key)))
+        return bool(replies and replies[0])
+
+    def release_claim(self, key: str) -> None:
+        claim = self._claim_key(key)
+        replies = self._remote(("GET", claim))
+        # GET-then-DEL isn't atomic; the window only matters if our claim lapsed mid-solve
+        if replies and replies[0] is not None and replies[0].decode("utf-8") == self.owner:
+            self._remote(("DEL", claim))
+
+    def persistence_stats(self) -> Dict[str, Any]:
+        stats = super().persistence_stats()
+        stats.update({
+            "backend": "redis",
+            "l1_hits": self.l1_hits,
+            "remote_reads": self.remote_reads,
+            "remote_errors": self.remote_errors,
+            "remote_skipped": self.remote_skipped,
+        })
+        return stats
+
+    def close(self):
+        super().close()
+        self.client.close()
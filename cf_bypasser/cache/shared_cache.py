@@ -0,0 +1,113 @@
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from typing import Optional
+
+from cf_bypasser.cache.cookie_cache import CachedCookies
+from cf_bypasser.cache.sqlite_cache import SQLiteCookieCache, _COLUMNS, _from_row
+from cf_bypasser.utils.constants import CLAIM_TTL_SECONDS
+
+_CLAIMS_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+)
+
+
+class SharedSQLiteCookieCache(SQLiteCookieCache):
+    """SQLite cookie cache shared by several worker processes.
+
+    The database is the source of truth: writes go straight to it (no write-behind), and
+    get() re-reads the key's row so an entry solved or invalidated by another worker is
+    seen immediately. The in-memory dict is this worker's view of the keys it has used:
+    evicting from it never deletes a row other workers may still need, and invalidations
+    always delete the row, whether or not this worker holds a copy.
+
+    A claims table provides cross-process singleflight: try_claim() lets exactly one
+    worker solve a key, others poll claim_held() and then read its result. Claims expire
+    after claim_ttl seconds, so a crashed worker can't block a key for long.
+    """
+
+    shared = True
+    # every get() reads the row and claims may wait on another worker's write lock
+    blocking_io = True
+    _persist_evictions = False
+
+    def __init__(self, db_file: str, claim_ttl: float = CLAIM_TTL_SECONDS, **kwargs):
+        kwargs["write_behind"] = False
+        self.claim_ttl = claim_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        super().__init__(db_file, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        created = self._conn is None
+        conn = super()._connect()
+        if created:
+            conn.execute(_CLAIMS_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cookies_proxy_id ON cookies (proxy_id)")
+        return conn
+
+    def _sync_key(self, key: str) -> None:
+        """Bring this worker's copy of key in line with the database row (caller holds self.lock)."""
+        cursor = self._execute(f"SELECT {_COLUMNS} FROM cookies WHERE key = ?", (key,))
+        if cursor is None:
+            return  # database unavailable: keep serving from memory
+        row = cursor.fetchone()
+        current = self.cache.get(key)
+        if row is None:
+            if current is not None:
+                self._discard(key)
+            return
+        if current is None or current.created != row[3]:
+            cached = _from_row(row)
+            if cached is not None:
+                self._store(cached)
+                self._track_expiry(cached)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CachedCookies]:
+        with self.lock:
+            self._sync_key(key)
+            return super().get(key, allow_stale=allow_stale)
+
+    def invalidate(self, key: str):
+        with self.lock:
+            self._discard(key)
+            self._changed(deletes=[key])
+            logging.info(f"Invalidated cache for {key}")
+
+    def invalidate_proxy(self, proxy_id: str) -> int:
+        with self.lock:
+            keys = list(self._by_proxy.get(proxy_id, ()))
+            for key in keys:
+                self._discard(key)
+            cursor = self._execute("DELETE FROM cookies WHERE proxy_id = ?", (proxy_id,))
+            removed = max(cursor.rowcount if cursor is not None else 0, len(keys))
+            if removed:
+                logging.info(f"Invalidated {removed} cache entries for proxy {proxy_id}")
+            return removed
+
+    def try_claim(self, key: str) -> bool:
+        """Claim the right to solve key; False while another live worker holds it."""
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute("DELETE FROM claims WHERE key = ? AND expires_at <= ?", (key, now))
+                    conn.execute("INSERT OR IGNORE INTO claims (key, owner, expires_at) VALUES (?, ?, ?)",
+                                 (key, self.owner, now + self.claim_ttl))
+                    row = conn.execute("SELECT owner FROM claims WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logging.error(f"Failed to claim {key}; solving without coordination: {e}")
+                return True
+        return row is not None and row[0] == self.owner
+
+    def claim_held(self, key: str) -> bool:
+        with self.lock:
+            cursor = self._execute("SELECT 1 FROM claims WHERE key = ? AND expires_at > ?", (key, time.time()))
+            return cursor is not None and cursor.fetchone() is not None
+
+    def release_claim(self, key: str) -> None:
+        with self.lock:
+            self._execute("DELETE FROM claims WHERE key = ? AND owner = ?", (key, self.owner))
@@ -0,0 +1,74 @@
+import json
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from curl_cffi.requests import AsyncSession
+
+from cf_bypasser.cache.cookie_cache import CachedCookies, CookieCache
+from cf_bypasser.utils.constants import WARM_START_TIMEOUT_SECONDS
+
+# Snapshot format: NDJSON, one CachedCookies.to_dict() per line plus the raw epoch times.
+# to_dict()'s ISO timestamps are naive local time, so nodes in other timezones read the
+# epoch floats instead.
+
+
+def dump_lines(entries: Iterable[CachedCookies]) -> Iterator[str]:
+    for cached in entries:
+        data = cached.to_dict()
+        data["created"] = cached.created
+        data["expires"] = cached.expires
+        yield json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def parse_line(line: Union[str, bytes]) -> Optional[CachedCookies]:
+    """One snapshot line as an entry; None for blank lines. Raises ValueError if malformed."""
+    if not line.strip():
+        return None
+    try:
+        data = json.loads(line)
+        if "created" in data and "expires" in data:
+            return CachedCookies(key=data["key"], cookies=data["cookies"], user_agent=data["user_agent"],
+                                 created=float(data["created"]), expires=float(data["expires"]),
+                                 exit_ip=data.get("exit_ip"), proxy_id=data.get("proxy_id"),
+                                 hostname=data.get("hostname"))
+        return CachedCookies.from_dict(data)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed snapshot line: {e}") from e
+
+
+def parse_lines(lines: Iterable[Union[str, bytes]]) -> Tuple[List[CachedCookies], int]:
+    """Entries from snapshot lines, and how many lines were malformed and skipped."""
+    entries, malformed = [], 0
+    for line in lines:
+        try:
+            cached = parse_line(line)
+        except ValueError as e:
+            malformed += 1
+            logging.warning(str(e))
+            continue
+        if cached is not None:
+            entries.append(cached)
+    return entries, malformed
+
+
+async def pull_snapshot(cache: CookieCache, peer: str, token: Optional[str] = None,
+                        timeout: float = WARM_START_TIMEOUT_SECONDS) -> int:
+    """Import a peer's /cache/export into cache; returns how many entries were taken.
+
+    Failures are logged and return 0: a node that can't warm up still starts, just cold.
+    """
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    try:
+        async with AsyncSession() as session:
+            resp = await session.get(peer.rstrip("/") + "/cache/export", headers=headers, timeout=timeout)
+        if resp.status_code != 200:
+            logging.error(f"Warm start from {peer} failed with status {resp.status_code}")
+            return 0
+        entries, malformed = parse_lines(resp.content.splitlines())
+    except Exception as e:
+        logging.error(f"Warm start from {peer} failed: {e}")
+        return 0
+    imported = cache.import_entries(entries)
+    logging.info(f"Warm start: imported {imported} of {len(entries)} entries from {peer}"
+                 + (f" ({malformed} malformed lines skipped)" if malformed else ""))
+    return imported
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from cf_bypasser.cache.cookie_cache import CachedCookies, CookieCache
+from cf_bypasser.utils.constants import DEFAULT_CACHE_FILE
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cookies (
+        key TEXT PRIMARY KEY,
+        cookies TEXT NOT NULL,
+        user_agent TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        exit_ip TEXT,
+        proxy_id TEXT,
+        hostname TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_cookies_expires_at ON cookies (expires_at)",
+)
+
+_COLUMNS = "key, cookies, user_agent, timestamp, expires_at, exit_ip, proxy_id, hostname"
+
+_UPSERT = (
+    f"INSERT INTO cookies ({_COLUMNS}) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET cookies = excluded.cookies, user_agent = excluded.user_agent, "
+    "timestamp = excluded.timestamp, expires_at = excluded.expires_at, exit_ip = excluded.exit_ip, "
+    "proxy_id = excluded.proxy_id, hostname = excluded.hostname"
+)
+
+
+def _row(cached: CachedCookies) -> tuple:
+    return (cached.key, json.dumps(cached.cookies), cached.user_agent,
+            cached.created, cached.expires, cached.exit_ip, cached.proxy_id, cached.hostname)
+
+
+def _from_row(row: tuple) -> Optional[CachedCookies]:
+    key, cookies, user_agent, timestamp, expires_at, exit_ip, proxy_id, hostname = row
+    try:
+        return CachedCookies(
+            key=key,
+            cookies=json.loads(cookies),
+            user_agent=user_agent,
+            created=timestamp,
+            expires=expires_at,
+            exit_ip=exit_ip,
+            proxy_id=proxy_id,
+            hostname=hostname,
+        )
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Failed to load cached data for {key}: {e}")
+        return None
+
+
+class SQLiteCookieCache(CookieCache):
+    """CookieCache persisted to SQLite in WAL mode: each change is a single-row upsert/delete.
+
+    Reads are still served from the in-memory dict. On first start an existing JSON cache
+    file (migrate_from) is imported and renamed to <file>.migrated.
+    """
+
+    def __init__(self, db_file: str, migrate_from: Optional[str] = DEFAULT_CACHE_FILE, **kwargs):
+        self.migrate_from = migrate_from
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(db_file, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # autocommit; the RLock serializes access to the shared connection
+            self._conn = sqlite3.connect(self.cache_file, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cookies)")}
+            # databases created before these were stored
+            for column in ("proxy_id", "hostname"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE cookies ADD COLUMN {column} TEXT")
+        return self._conn
+
+    def _load_cache(self):
+        self._connect()
+        self._migrate_json()
+
+        now = time.time()
+        self._execute("DELETE FROM cookies WHERE expires_at <= ?", (now - self.stale_grace,))
+        for row in self._conn.execute(f"SELECT {_COLUMNS} FROM cookies").fetchall():
+            cached = _from_row(row)
+            if cached is not None:
+                self.cache[cached.key] = cached
+
+    def _migrate_json(self):
+        if not self.migrate_from or not os.path.exists(self.migrate_from):
+            return
+        try:
+            with open(self.migrate_from, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError, ValueError) as e:
+            logging.warning(f"Not migrating JSON cache file {self.migrate_from}: {e}")
+            return
+
+        rows = []
+        for key, cached_data in data.items():
+            try:
+                cached = CachedCookies.from_dict(cached_data)
+            except Exception as e:
+                logging.warning(f"Failed to migrate cached data for {key}: {e}")
+                continue
+            if not cached.is_expired():
+                rows.append(_row(cached))
+        try:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_UPSERT, rows)
+            os.replace(self.migrate_from, self.migrate_from + ".migrated")
+            logging.info(f"Migrated {len(rows)} entries from {self.migrate_from} to {self.cache_file}")
+        except (sqlite3.Error, OSError) as e:
+            logging.error(f"Failed to migrate JSON cache file: {e}")
+
+    def _execute(self, sql: str, params=(), many: bool = False):
+        try:
+            conn = self._connect()  # reopens after close(), e.g. a cleanup() followed by more use
+            if many:
+                return conn.executemany(sql, params)
+            return conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to update cache database: {e}")
+            return None
+
+    def _write_changes(self, upserts: List[CachedCookies], deletes: List[str], clear: bool) -> bool:
+        # one transaction per batch; the lock guards the shared connection
+        with self.lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("BEGIN")
+                    if clear:
+                        conn.execute("DELETE FROM cookies")
+                    if upserts:
+                        conn.executemany(_UPSERT, [_row(cached) for cached in upserts])
+                    if deletes:
+                        conn.executemany("DELETE FROM cookies WHERE key = ?", [(key,) for key in deletes])
+                return True
+            except sqlite3.Error as e:
+                logging.error(f"Failed to update cache database: {e}")
+                return False
+
+    def clear_expired(self) -> int:
+        with self.lock:
+            now = time.time()
+            expired_keys = self._pop_expired(now)
+            # indexed range delete also catches rows that never made it into memory
+            cursor = self._execute("DELETE FROM cookies WHERE expires_at <= ?", (now - self.stale_grace,))
+            removed = max(cursor.rowcount if cursor is not None else 0, len(expired_keys))
+            if removed:
+                logging.info(f"Cleared {removed} expired cache entries")
+            return len(expired_keys)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from cf_bypasser.utils.constants import (
+    COOKIE_TTL_MINUTES,
+    COOKIE_TTL_FROM_EXPIRY,
+    COOKIE_TTL_MARGIN_SECONDS,
+    COOKIE_TTL_MAX_MINUTES,
+    COOKIE_TTL_LEARN,
+)
+
+# Cookies whose expiry bounds how long a solve stays usable, most authoritative first.
+_CLEARANCE_COOKIES = ("cf_clearance", "__cf_bm")
+# A 403 before expiry caps the key's TTL at this fraction of the entry's age...
+_LEARN_FACTOR = 0.8
+# ...for this long, after which the cookie's own expiry is trusted again.
+_LEARN_WINDOW_SECONDS = 24 * 3600
+# Floor for expiry-derived TTLs, so a cookie about to expire still gets a usable entry.
+_MIN_TTL_SECONDS = 60
+
+
+@dataclass
+class LearnedCap:
+    cap_seconds: float
+    learned_at: float  # time.time()
+
+
+def cookie_expiry(cookies: Optional[Iterable[Dict[str, Any]]]) -> Optional[float]:
+    """Epoch expiry of the clearance cookie in a context.cookies() list, or None for session cookies."""
+    by_name = {c.get("name"): c for c in cookies or ()}
+    for name in _CLEARANCE_COOKIES:
+        expires = (by_name.get(name) or {}).get("expires")
+        if isinstance(expires, (int, float)) and expires > 0:
+            return float(expires)
+    return None
+
+
+class TTLPolicy:
+    """Per-key cache TTLs derived from the expiry Cloudflare put on the clearance cookie.
+
+    The TTL is the cf_clearance (else __cf_bm) expiry minus margin_seconds, capped at
+    max_seconds. default_seconds (COOKIE_TTL_MINUTES) is used for session cookies or when
+    derivation is off. A site that rejects cookies (403) before their TTL is up caps the
+    key at _LEARN_FACTOR of the entry's age for a day; the cap never goes below the
+    default, since early rejections are usually not about expiry.
+    """
+
+    def __init__(self, default_seconds: float = COOKIE_TTL_MINUTES * 60,
+                 margin_seconds: float = COOKIE_TTL_MARGIN_SECONDS,
+                 max_seconds: float = COOKIE_TTL_MAX_MINUTES * 60,
+                 from_expiry: bool = COOKIE_TTL_FROM_EXPIRY, learn: bool = COOKIE_TTL_LEARN):
+        self.default_seconds = default_seconds
+        self.margin_seconds = margin_seconds
+        self.max_seconds = max_seconds
+        self.from_expiry = from_expiry
+        self.learn = learn
+        self.learned: Dict[str, LearnedCap] = {}
+        self.lock = threading.Lock()
+        self.derived = 0
+        self.rejections = 0
+
+    def ttl_for(self, key: str, cookies: Optional[Iterable[Dict[str, Any]]] = None,
+                now: Optional[float] = None) -> float:
+        """TTL in seconds for a fresh solve of key whose browser cookies are `cookies`."""
+        now = time.time() if now is None else now
+        ttl = self.default_seconds
+        expires = cookie_expiry(cookies) if self.from_expiry else None
+        if expires is not None:
+            ttl = max(_MIN_TTL_SECONDS, min(expires - now - self.margin_seconds, self.max_seconds))
+            self.derived += 1
+        with self.lock:
+            learned = self.learned.get(key)
+            if learned is not None:
+                if now - learned.learned_at >= _LEARN_WINDOW_SECONDS:
+                    del self.learned[key]
+                else:
+                    ttl = min(ttl, learned.cap_seconds)
+        return ttl
+
+    def record_rejection(self, key: str, age_seconds: float, now: Optional[float] = None) -> None:
+        """Note that key's cookies were refused age_seconds after they were solved."""
+        if not self.learn:
+            return
+        cap = max(self.default_seconds, age_seconds * _LEARN_FACTOR)
+        with self.lock:
+            self.rejections += 1
+            learned = self.learned.get(key)
+            if learned is not None and learned.cap_seconds <= cap:
+                return
+            self.learned[key] = LearnedCap(cap, time.time() if now is None else now)
+        logging.info(f"Cookies for {key} rejected after {age_seconds:.0f}s; capping TTL at {cap:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "default_seconds": self.default_seconds,
+                "max_seconds": self.max_seconds,
+                "derived": self.derived,
+                "rejections": self.rejections,
+                "learned_caps": len(self.learned),
+            }
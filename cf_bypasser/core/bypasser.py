@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import time
 from collections import namedtuple
 from typing import Optional, Dict, Any
 from urllib.parse import urlparse
@@ -10,22 +11,49 @@ os.environ.setdefault("CLOAKBROWSER_AUTO_UPDATE", "false")
 
 import cloakbrowser as cb
 
-from cf_bypasser.utils.misc import cache_key, get_browser_init_lock, per_loop
+from cf_bypasser.utils.misc import cache_key, proxy_id, get_browser_init_lock, per_loop
 from cf_bypasser.utils.constants import (
     DEFAULT_TIMEOUT_MS,
     CHALLENGE_SETTLE_SECONDS,
+    CHALLENGE_QUIET_SECONDS,
     HTML_SETTLE_POLL_SECONDS,
     HTML_SETTLE_STABLE_ROUNDS,
     HTML_SETTLE_MAX_SECONDS,
+    HTML_SETTLE_IDLE_MS,
+    HTML_SETTLE_LONG_REQUEST_MS,
     RETRY_POLL_SECONDS,
     CONTEXT_CLOSE_TIMEOUT_SECONDS,
     DEFAULT_MAX_RETRIES,
     DEFAULT_CACHE_FILE,
     MAX_CONCURRENT_BROWSERS,
     IP_CHECK_ENABLED,
+    BROWSER_POOL_ENABLED,
+    STANDBY_CONTEXTS,
+    STANDBY_PROXIES,
+    BLOCK_RESOURCES_COOKIES,
+    BLOCK_RESOURCES_HTML,
+    COOKIE_EARLY_EXIT,
+    REFRESH_AHEAD_FRACTION,
+    IP_MONITOR_INTERVAL_SECONDS,
+    CLAIM_POLL_SECONDS,
+    SOLVER_PROCESSES,
 )
-from cf_bypasser.utils.ipcheck import get_exit_ip
+from cf_bypasser.utils.ipcheck import get_exit_ip, exit_ip_stats, close_ip_session
+from cf_bypasser.cache.backends import create_cookie_cache
 from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.cache.negative_cache import NegativeCache
+from cf_bypasser.cache.ttl import TTLPolicy
+from cf_bypasser.core.pool import BrowserPool
+from cf_bypasser.core.standby import StandbyContexts
+from cf_bypasser.core.fingerprints import get_fingerprint_factory
+from cf_bypasser.core.detection import (
+    ChallengeWatcher, classify_page, HARD_FAILURES, UNPROTECTED, INTERACTIVE, MANAGED,
+)
+from cf_bypasser.core.errors import ChallengeBlockedError, HostBackoffError
+from cf_bypasser.core.resources import install_resource_blocking
+from cf_bypasser.core.refresher import CookieRefresher
+from cf_bypasser.core.ipmonitor import ExitIPMonitor
+from cf_bypasser.core.solver_pool import SolverPool
 
 _MAX_CONCURRENT_BROWSERS = MAX_CONCURRENT_BROWSERS
 
@@ -33,7 +61,13 @@ _MAX_CONCURRENT_BROWSERS = MAX_CONCURRENT_BROWSERS
 _browser_semaphores: dict = {}
 _inflight_locks: dict = {}
 
-ChallengeResult = namedtuple("ChallengeResult", ("success", "cf_detected", "status"))
+class ChallengeResult(namedtuple("ChallengeResult", ("success", "cf_detected", "status"))):
+    """Unpacks as (success, cf_detected, status); `kind` is the final page classification."""
+
+    def __new__(cls, success, cf_detected, status, kind=None):
+        result = super().__new__(cls, success, cf_detected, status)
+        result.kind = kind
+        return result
 
 
 def _browser_semaphore() -> asyncio.Semaphore:
@@ -72,14 +106,128 @@ _FIND_CHECKBOX_JS = """() => {
     return {found:true, checked:cb.checked, x:r.x+r.width/2, y:r.y+r.height/2, w:r.width};
 }"""
 
+# Bypass probe: everything is_bypassed needs, computed in-page. Marker phrases are
+# matched case-insensitively against title + document text; challengeFrame reports a
+# Turnstile iframe; cookieNames lists non-HttpOnly cookies (cf_clearance is HttpOnly).
+_PROBE_JS = """(markers) => {
+    const title = document.title || "";
+    const root = document.documentElement;
+    const text = (title + " " + (root ? root.textContent : "")).toLowerCase();
+    const blocked = markers.find(m => text.includes(m)) || null;
+    const frame = !!document.querySelector('iframe[src*="challenges.cloudflare"]');
+    const cookieNames = document.cookie ? document.cookie.split(";").map(c => c.split("=")[0].trim()) : [];
+    return {
+        title: title,
+        blocked: !!blocked,
+        marker: blocked,
+        rateLimited: text.includes("error 1015") || text.includes("you are being rate limited"),
+        captcha: text.includes("please complete the captcha"),
+        challengeFrame: frame,
+        cookieNames: cookieNames,
+    };
+}"""
+
+# DOM quiescence for /html: resolves once no mutations have been seen for idleMs (or maxMs
+# elapsed). Only a MutationObserver runs in-page: page globals such as fetch/XHR are never
+# touched, since a patched builtin is detectable. Requests are tracked from Python instead
+# (_RequestTracker).
+_QUIESCENCE_JS = """({idleMs, maxMs}) => new Promise(resolve => {
+    const start = performance.now();
+    let last = start;
+    const mo = new MutationObserver(() => { last = performance.now(); });
+    mo.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    const finish = (quiet) => {
+        mo.disconnect();
+        resolve({quiet: quiet, waitedMs: Math.round(performance.now() - start)});
+    };
+    const tick = () => {
+        const now = performance.now();
+        if (now - last >= idleMs) return finish(true);
+        if (now - start >= maxMs) return finish(false);
+        setTimeout(tick, Math.min(idleMs, 50));
+    };
+    setTimeout(tick, idleMs);
+})"""
+
+
+class _RequestTracker:
+    """In-flight requests of a page, counted from Playwright's request events."""
+
+    _EVENTS = ("request", "requestfinished", "requestfailed")
+
+    def __init__(self, page):
+        self.page = page
+        self._started: Dict[Any, float] = {}  # request -> time.monotonic() it started
+        self.last_activity = 0.0
+        self._handlers = (self._on_start, self._on_end, self._on_end)
+        for event, handler in zip(self._EVENTS, self._handlers):
+            page.on(event, handler)
+
+    def _on_start(self, request) -> None:
+        self._started[request] = self.last_activity = time.monotonic()
+
+    def _on_end(self, request) -> None:
+        if self._started.pop(request, None) is not None:
+            self.last_activity = time.monotonic()
+
+    def idle_for(self, seconds: float, long_after: float) -> bool:
+        """No request started or ended for `seconds`, ignoring ones in flight for `long_after`+."""
+        now = time.monotonic()
+        if any(now - started < long_after for started in self._started.values()):
+            return False
+        return now - self.last_activity >= seconds
+
+    def close(self) -> None:
+        for event, handler in zip(self._EVENTS, self._handlers):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+
+def _challenge_frames(page) -> list:
+    """Turnstile frames of the page, found by URL whether or not the DOM exposes their iframe."""
+    return [f for f in getattr(page, "frames", None) or [] if "challenges.cloudflare" in (f.url or "")]
+
 
 class CloakBypasser:
     """Cloudflare bypasser backed by CloakBrowser (stealth Chromium) with cookie caching."""
 
-    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, log: bool = True, cache_file: str = DEFAULT_CACHE_FILE):
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, log: bool = True, cache_file: str = DEFAULT_CACHE_FILE,
+                 pooled: bool = BROWSER_POOL_ENABLED, standby_contexts: int = STANDBY_CONTEXTS,
+                 solver_processes: int = SOLVER_PROCESSES, cookie_cache: Optional[CookieCache] = None,
+                 background: bool = True):
         self.max_retries = max_retries
         self.log = log
-        self.cookie_cache = CookieCache(cache_file)
+        self.cookie_cache = cookie_cache if cookie_cache is not None else create_cookie_cache(cache_file)
+        self.negative_cache = NegativeCache()
+        self.ttl_policy = TTLPolicy()
+        self.ip_monitor: Optional[ExitIPMonitor] = None
+        if background and IP_MONITOR_INTERVAL_SECONDS > 0:
+            self.ip_monitor = ExitIPMonitor(self.cookie_cache)
+        self.solver_pool: Optional[SolverPool] = None
+        if solver_processes > 0:
+            # browsers live in the solver processes; this process only does cache lookups
+            self.solver_pool = SolverPool(solver_processes, log=log)
+            pooled, standby_contexts = False, 0
+        self.refresher: Optional[CookieRefresher] = None
+        if background and REFRESH_AHEAD_FRACTION > 0:
+            self.refresher = CookieRefresher(self.cookie_cache, self.refresh_cookies, self._slot_free)
+        # stale-while-revalidate: one background solve per key, see _revalidate()
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self.stale_served = 0
+        self.revalidations = 0
+        self.browser_pool: Optional[BrowserPool] = BrowserPool() if pooled else None
+        self.standby: Optional[StandbyContexts] = None
+        if standby_contexts > 0:
+            self.standby = StandbyContexts(self._launch_standby, self.cleanup_browser,
+                                           standby_contexts, STANDBY_PROXIES)
+
+    def _slot_free(self) -> bool:
+        """Whether a solve could start right now without queueing behind others."""
+        if self.solver_pool is not None:
+            return self.solver_pool.slot_free
+        return not _browser_semaphore().locked()
 
     def log_message(self, message: str) -> None:
         if self.log:
@@ -102,35 +250,59 @@ class CloakBypasser:
             self.log_message(f"Error parsing proxy {proxy}: {e}")
             return None
 
-    async def setup_browser(self, proxy: Optional[str] = None, lang: str = "en", user_agent: Optional[str] = None, headless: bool = False) -> tuple:
-        """Launch a fresh, profile-less CloakBrowser context. Returns (context, page)."""
-        self.cookie_cache.clear_expired()
-
-        proxy_config = None
-        if proxy:
-            proxy_config = self.parse_proxy(proxy)
-            if proxy_config:
-                self.log_message(f"Using proxy: {proxy_config['server']}")
-            else:
-                # never silently fall back to direct: that leaks the real IP
-                raise ValueError(f"Invalid proxy, refusing to continue direct: {proxy}")
-
+    def _proxy_config(self, proxy: Optional[str]) -> Optional[Dict[str, str]]:
+        if not proxy:
+            return None
+        proxy_config = self.parse_proxy(proxy)
+        if not proxy_config:
+            # never silently fall back to direct: that leaks the real IP
+            raise ValueError(f"Invalid proxy, refusing to continue direct: {proxy}")
+        return proxy_config
+
+    async def _launch_context(self, proxy_config: Optional[Dict[str, str]], lang: str = "en",
+                              user_agent: Optional[str] = None, headless: bool = False):
+        """Launch a context directly, or lease one from the browser pool in pooled mode."""
+        # pre-generated stealth args replace cloakbrowser's own, so nothing is generated during this launch
+        fingerprint = get_fingerprint_factory().take()
         launch_kwargs = dict(
             headless=headless,
-            args=[FAKE_SHADOW_ARG],
+            args=[FAKE_SHADOW_ARG] + (fingerprint or []),
             geoip=bool(proxy_config),
             locale=lang if lang else None,
         )
+        if fingerprint is not None:
+            launch_kwargs["stealth_args"] = False
         if proxy_config:
             launch_kwargs["proxy"] = proxy_config
+
+        if self.browser_pool is not None:
+            return await self.browser_pool.lease(launch_kwargs, user_agent=user_agent, serialize=fingerprint is None)
         if user_agent:
             launch_kwargs["user_agent"] = user_agent
+        if fingerprint is not None:
+            return await cb.launch_context_async(**launch_kwargs)
+        # no ready fingerprint: cloakbrowser generates one during launch, which isn't
+        # thread-safe, so fall back to serializing launches
+        async with get_browser_init_lock():
+            return await cb.launch_context_async(**launch_kwargs)
+
+    async def _launch_standby(self, proxy: Optional[str]):
+        """Launcher for standby spares: default locale/UA/headed, matching setup_browser's defaults."""
+        return await self._launch_context(self._proxy_config(proxy))
+
+    async def setup_browser(self, proxy: Optional[str] = None, lang: str = "en", user_agent: Optional[str] = None, headless: bool = False) -> tuple:
+        """Launch (or lease from the pool) a fresh, profile-less CloakBrowser context. Returns (context, page)."""
+        proxy_config = self._proxy_config(proxy)
+        if proxy_config:
+            self.log_message(f"Using proxy: {proxy_config['server']}")
 
         context = None
         try:
-            # browserforge fingerprint generation isn't thread-safe; serialize launches
-            async with get_browser_init_lock():
-                context = await cb.launch_context_async(**launch_kwargs)
+            # spares are launched with the defaults, so only default-shaped requests can use them
+            if self.standby is not None and lang == "en" and user_agent is None and not headless:
+                context = self.standby.take(proxy)
+            if context is None:
+                context = await self._launch_context(proxy_config, lang, user_agent, headless)
             page = context.pages[0] if context.pages else await context.new_page()
             page.set_default_timeout(DEFAULT_TIMEOUT_MS)
             page.set_default_navigation_timeout(DEFAULT_TIMEOUT_MS)
@@ -149,27 +321,35 @@ class CloakBypasser:
         "access denied",
     )
 
-    async def is_bypassed(self, page) -> bool:
-        """Check if the Cloudflare challenge has been cleared (and not a block page)."""
+    async def probe_page(self, page) -> Dict[str, Any]:
+        """One small in-page evaluate: title, challenge/block marker booleans and cookie names.
+
+        Replaces title() + a full page.content() serialization per poll; markers are matched
+        against the document text inside the page so only a few booleans cross the wire.
+        The challenge frame is also looked up in page.frames, which, unlike querySelector,
+        sees an iframe inside a closed shadow root.
+        """
+        probe = await page.evaluate(_PROBE_JS, list(self._BLOCK_MARKERS))
+        if not probe.get("challengeFrame") and _challenge_frames(page):
+            probe["challengeFrame"] = True
+        return probe
+
+    async def classify(self, page, status: Optional[int] = None) -> Optional[str]:
+        """Classify the page (see detection.classify_page); None if the probe failed."""
         try:
-            title = await page.title()
-            if "just a moment" in title.lower():
-                return False
-            html_content = await page.content()
-            lowered = html_content.lower()
-            if "please complete the captcha" in lowered:
-                return False
-            if any(marker in lowered for marker in self._BLOCK_MARKERS):
-                return False
-            return True
+            probe = await self.probe_page(page)
         except Exception as e:
             self.log_message(f"Error checking bypass status: {e}")
-            return False
+            return None
+        return classify_page(probe, status)
+
+    async def is_bypassed(self, page) -> bool:
+        """Check if the Cloudflare challenge has been cleared (and not a block page)."""
+        return await self.classify(page) == UNPROTECTED
 
     async def _click_turnstile_checkbox(self, page) -> bool:
         """Find the Turnstile checkbox via fakeShadowRoot and click it. Returns True if clicked."""
-        cf_frames = [f for f in page.frames if "challenges.cloudflare" in (f.url or "")]
-        for frame in cf_frames:
+        for frame in _challenge_frames(page):
             try:
                 info = await frame.evaluate(_FIND_CHECKBOX_JS)
                 if not info.get("found") or info.get("w", 0) <= 0 or info.get("checked"):
@@ -190,21 +370,48 @@ class CloakBypasser:
                 self.log_message(f"Checkbox click attempt failed: {e}")
         return False
 
-    async def solve_cloudflare_challenge(self, url: str, page) -> tuple:
-        """Navigate to URL and clear any Cloudflare challenge. Returns (success, cf_detected, status)."""
+    async def _stop_loading(self, page) -> None:
+        try:
+            await page.evaluate("window.stop()")
+        except Exception:
+            pass
+
+    async def solve_cloudflare_challenge(self, url: str, page, stop_on_clearance: bool = False) -> tuple:
+        """Navigate to URL and clear any Cloudflare challenge. Returns (success, cf_detected, status).
+
+        Waits are event-driven (see ChallengeWatcher): the settle and poll intervals are
+        upper bounds, and the solve moves on as soon as page events decide the outcome.
+        With stop_on_clearance (cookie-only solves) it returns the moment cf_clearance is
+        issued and aborts the rest of the page load.
+        """
         cf_detected = False
         status = 200
+        watcher = ChallengeWatcher(page, target_host=urlparse(url).hostname)
         try:
+            watcher.attach()
             self.log_message(f"Navigating to {url}")
             try:
-                response = await page.goto(url, wait_until="domcontentloaded", timeout=DEFAULT_TIMEOUT_MS)
+                # cookie-only solves don't need the DOM; the settle wait below still bounds loading
+                wait_until = "commit" if stop_on_clearance else "domcontentloaded"
+                response = await page.goto(url, wait_until=wait_until, timeout=DEFAULT_TIMEOUT_MS)
                 if response is not None and getattr(response, "status", None):
                     status = response.status
+                watcher.observe_response(response)
             except Exception as nav_err:
                 self.log_message(f"Navigation warning: {nav_err}")
 
             # let the challenge scripts load before deciding it's unprotected
-            await asyncio.sleep(CHALLENGE_SETTLE_SECONDS)
+            await watcher.settle(CHALLENGE_SETTLE_SECONDS, CHALLENGE_QUIET_SECONDS)
+            if wait_until == "commit" and not watcher.clearance_seen:
+                # a committed document may not be parsed yet, and classify() would read it as unprotected
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=DEFAULT_TIMEOUT_MS)
+                except Exception as load_err:
+                    self.log_message(f"Load wait warning: {load_err}")
+            if stop_on_clearance and watcher.clearance_seen:
+                self.log_message("cf_clearance issued -- stopping page load early")
+                await self._stop_loading(page)
+                return ChallengeResult(True, True, status)
             try:
                 html_content = await page.content()
                 content_ok = True
@@ -215,65 +422,128 @@ class CloakBypasser:
             if not content_ok:
                 # a failed read tells us nothing; never claim success on empty content
                 self.log_message("Could not read page content -- treating as unconfirmed")
-                bypassed = await self.is_bypassed(page)
-                return ChallengeResult(bypassed, cf_detected, status)
+                kind = await self.classify(page, status)
+                return ChallengeResult(kind == UNPROTECTED, cf_detected, status, kind)
 
-            if "cloudflare" not in html_content.lower():
+            if not watcher.decided and "cloudflare" not in html_content.lower():
                 self.log_message("No Cloudflare protection detected -- either not protected or already bypassed")
-                return ChallengeResult(True, cf_detected, status)
+                return ChallengeResult(True, cf_detected, status, UNPROTECTED)
 
             cf_detected = True
-            if await self.is_bypassed(page):
+            kind = await self.classify(page, status)
+            if kind == UNPROTECTED:
                 self.log_message("No Cloudflare challenge detected or already bypassed")
-                return ChallengeResult(True, cf_detected, status)
+                return ChallengeResult(True, cf_detected, status, kind)
+            if kind in HARD_FAILURES:
+                # no amount of waiting clears a block; free the browser slot now
+                self.log_message(f"Cloudflare {kind} page -- giving up immediately")
+                return ChallengeResult(False, cf_detected, status, kind)
 
-            self.log_message("Cloudflare challenge detected. Waiting for resolution...")
+            self.log_message(f"Cloudflare challenge detected ({kind}). Waiting for resolution...")
             clicked = False
-            for _ in range(self.max_retries):
-                if await self.is_bypassed(page):
+            # a time budget, not a poll count: navigations and other events end waits early
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.max_retries * RETRY_POLL_SECONDS
+            while loop.time() < deadline:
+                kind = await self.classify(page)
+                if kind == UNPROTECTED:
                     self.log_message("Cloudflare challenge solved successfully!")
-                    return ChallengeResult(True, cf_detected, status)
-                # non-interactive challenges auto-resolve; interactive ones need one click
-                if not clicked:
+                    return ChallengeResult(True, cf_detected, status, kind)
+                if kind in HARD_FAILURES:
+                    self.log_message(f"Challenge ended in a {kind} page -- giving up")
+                    return ChallengeResult(False, cf_detected, status, kind)
+                # JS challenges auto-resolve; a Turnstile widget may need one click
+                if kind == MANAGED and not clicked:
                     clicked = await self._click_turnstile_checkbox(page)
-                await asyncio.sleep(RETRY_POLL_SECONDS)
-
-            if await self.is_bypassed(page):
+                await watcher.wait_for_change(min(RETRY_POLL_SECONDS, deadline - loop.time()))
+                if stop_on_clearance and watcher.clearance_seen:
+                    self.log_message("cf_clearance issued -- stopping page load early")
+                    await self._stop_loading(page)
+                    return ChallengeResult(True, cf_detected, status, INTERACTIVE if clicked else kind)
+
+            kind = await self.classify(page)
+            if kind == UNPROTECTED:
                 self.log_message("Cloudflare challenge solved successfully!")
-                return ChallengeResult(True, cf_detected, status)
+                return ChallengeResult(True, cf_detected, status, kind)
 
             self.log_message("Failed to solve Cloudflare challenge")
-            return ChallengeResult(False, cf_detected, status)
+            return ChallengeResult(False, cf_detected, status, INTERACTIVE if clicked else kind)
 
         except Exception as e:
             self.log_message(f"Error solving Cloudflare challenge: {e}")
             return ChallengeResult(False, cf_detected, status)
+        finally:
+            watcher.detach()
 
     async def get_cookies_and_user_agent(self, context, page) -> Optional[Dict[str, Any]]:
         try:
             cookies = await context.cookies()
             cookie_dict = {c["name"]: c["value"] for c in cookies}
             user_agent = await page.evaluate("navigator.userAgent")
-            return {"cookies": cookie_dict, "user_agent": user_agent}
+            return {"cookies": cookie_dict, "user_agent": user_agent, "cookie_attributes": cookies}
         except Exception as e:
             self.log_message(f"Error getting cookies and user agent: {e}")
             return None
 
     async def _stable_html(self, page) -> str:
-        """Return page.content() once its size stops changing, so JS renders deterministically.
-
-        Polls instead of relying on networkidle (Playwright has no networkidle2 and idle
-        can hang on pages with persistent connections). Bounded by HTML_SETTLE_MAX_SECONDS.
+        """Return page.content() once the DOM goes quiet, so JS renders deterministically.
+
+        An in-page MutationObserver waits until the DOM has been idle for HTML_SETTLE_IDLE_MS
+        and _RequestTracker confirms no request started or finished meanwhile, then the HTML
+        is serialized once. Doesn't use networkidle (Playwright has no networkidle2 and idle
+        hangs on pages with persistent connections); requests older than
+        HTML_SETTLE_LONG_REQUEST_MS are ignored for the same reason. Bounded by
+        HTML_SETTLE_MAX_SECONDS.
         """
+        settle = HTML_SETTLE_STABLE_ROUNDS > 0 and HTML_SETTLE_POLL_SECONDS > 0
+        tracker = None
+        if settle:
+            try:
+                tracker = _RequestTracker(page)  # before the load wait, so its requests count
+            except Exception as e:
+                self.log_message(f"Request tracking unavailable ({e})")
         try:
             await page.wait_for_load_state("load", timeout=DEFAULT_TIMEOUT_MS)
         except Exception:
             pass
 
-        html = await page.content()
-        if HTML_SETTLE_STABLE_ROUNDS <= 0 or HTML_SETTLE_POLL_SECONDS <= 0:
-            return html
+        if not settle:
+            return await page.content()
 
+        try:
+            if tracker is None:
+                raise RuntimeError("no request events")
+            await asyncio.wait_for(self._wait_quiescent(page, tracker),
+                                   timeout=HTML_SETTLE_MAX_SECONDS + CONTEXT_CLOSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            # e.g. a navigation destroyed the execution context mid-wait
+            self.log_message(f"DOM quiescence wait failed ({e}); falling back to polling")
+            return await self._poll_stable_html(page)
+        finally:
+            if tracker is not None:
+                tracker.close()
+        return await page.content()
+
+    async def _wait_quiescent(self, page, tracker: _RequestTracker) -> bool:
+        """Wait until both the DOM and the page's requests are idle; False if the cap hit first."""
+        idle = HTML_SETTLE_IDLE_MS / 1000
+        long_after = HTML_SETTLE_LONG_REQUEST_MS / 1000
+        deadline = time.monotonic() + HTML_SETTLE_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            result = await page.evaluate(_QUIESCENCE_JS, {"idleMs": HTML_SETTLE_IDLE_MS,
+                                                          "maxMs": int(remaining * 1000)})
+            if not result.get("quiet"):
+                return False
+            if tracker.idle_for(idle, long_after):
+                return True
+            await asyncio.sleep(min(idle, 0.05))
+
+    async def _poll_stable_html(self, page) -> str:
+        """Fallback: sample page.content() until its size stops changing."""
+        html = await page.content()
         deadline = asyncio.get_event_loop().time() + HTML_SETTLE_MAX_SECONDS
         stable = 0
         while stable < HTML_SETTLE_STABLE_ROUNDS and asyncio.get_event_loop().time() < deadline:
@@ -298,6 +568,7 @@ class CloakBypasser:
             return {
                 "cookies": cookie_dict,
                 "user_agent": user_agent,
+                "cookie_attributes": cookies,
                 "html": html,
                 "url": page.url,
                 "status_code": status_code,
@@ -313,21 +584,43 @@ class CloakBypasser:
             return True
         return bool(cookies.get("cf_clearance"))
 
-    async def _read_valid_cache(self, key: str, proxy: Optional[str]):
-        """Return a still-valid cache entry, or None — invalidating it if the proxy exit IP rotated."""
-        cached = self.cookie_cache.get(key)
+    async def _read_valid_cache(self, key: str, proxy: Optional[str], allow_stale: bool = False):
+        """Return a still-valid cache entry, or None — invalidating it if the proxy exit IP rotated.
+
+        allow_stale also returns entries inside the cache's stale grace window (is_expired() is True).
+        """
+        cache = self.cookie_cache
+        cached = await cache.run(cache.get, key, allow_stale=allow_stale)
         if not cached:
             return None
-        if IP_CHECK_ENABLED and cached.exit_ip:
-            current = await get_exit_ip(proxy)
+        if cached.exit_ip and (self.ip_monitor is not None or IP_CHECK_ENABLED):
+            current = await self._current_exit_ip(proxy)
             if current and current != cached.exit_ip:
                 self.log_message(f"Proxy exit IP changed ({cached.exit_ip} -> {current}); invalidating cookies for {key}")
-                self.cookie_cache.invalidate(key)
+                await cache.run(cache.invalidate, key)
                 return None
         return cached
 
-    async def _run_in_browser(self, url, proxy, key, *, restore_cookies, extractor):
-        """Shared browser skeleton: launch, solve, extract, cache. Returns the extractor dict or None."""
+    async def _current_exit_ip(self, proxy: Optional[str]) -> Optional[str]:
+        """Exit IP to compare/store: the monitor's in-memory view, else a (cached) lookup, else None."""
+        if self.ip_monitor is not None:
+            return await self.ip_monitor.resolve(proxy)
+        return await get_exit_ip(proxy) if IP_CHECK_ENABLED else None
+
+    async def _run_in_browser(self, url, proxy, key, *, kind, restore_cookies, block_resources=False,
+                              stop_on_clearance=False):
+        """Shared solve skeleton: backoff check, browse, cache. Returns the extracted dict or None.
+
+        kind picks the extractor ("cookies" or "html"). The browser part runs in this process,
+        or in a solver process when the solver pool is enabled. The returned dict carries a
+        "timings" breakdown (queue/launch/solve/extract/total, ms). Raises HostBackoffError
+        without launching while the key is in its failure backoff.
+        """
+        failed = self.negative_cache.check(key)
+        if failed:
+            self.log_message(f"{key} is backing off after {failed.failures} failed solve(s) ({failed.failure_class})")
+            raise HostBackoffError(failed.failure_class, failed.remaining())
+
         cached_ua = None
         cached_cookies = None
         if restore_cookies:
@@ -337,27 +630,85 @@ class CloakBypasser:
                 cached_ua = cached.user_agent
                 self.log_message(f"Found cached cookies for {url}")
 
+        browse_kwargs = dict(cached_cookies=cached_cookies, cached_ua=cached_ua,
+                             block_resources=block_resources, stop_on_clearance=stop_on_clearance)
+        if self.solver_pool is not None:
+            outcome = await self.solver_pool.browse(kind, url, proxy, **browse_kwargs)
+        else:
+            outcome = await self._browse(kind, url, proxy, **browse_kwargs)
+        if outcome is None:
+            return None
+        result, data, timings = outcome
+
+        success, cf_detected, status = result
+        if result.kind in HARD_FAILURES:
+            self.negative_cache.record(key, result.kind)
+            raise ChallengeBlockedError(result.kind, status)
+        if not success:
+            self.negative_cache.record(key, "unsolved")
+            return None
+        if data and self._is_trustworthy(data["cookies"], cf_detected):
+            self.negative_cache.clear(key)
+            exit_ip = await self._current_exit_ip(proxy)
+            ttl = self.ttl_policy.ttl_for(key, data.get("cookie_attributes"))
+            cache = self.cookie_cache
+            await cache.run(cache.set, key, data["cookies"], data["user_agent"], exit_ip=exit_ip,
+                            ttl_seconds=ttl, proxy_id=proxy_id(proxy), hostname=urlparse(url).netloc)
+            data["timings"] = timings
+            self.log_message(f"Timing breakdown for {url}: {timings}")
+            return data
+        if data:
+            self.log_message("CF detected but no cf_clearance cookie -- not caching")
+            self.negative_cache.record(key, "no_clearance")
+        return None
+
+    async def _extract(self, kind: str, context, page, status) -> Optional[Dict[str, Any]]:
+        if kind == "html":
+            return await self.get_html_content_and_cookies(context, page, status_code=status)
+        return await self.get_cookies_and_user_agent(context, page)
+
+    async def _browse(self, kind: str, url: str, proxy: Optional[str], *, cached_cookies=None, cached_ua=None,
+                      block_resources: bool = False, stop_on_clearance: bool = False):
+        """Browser half of a solve: launch, solve, extract; no cache or backoff bookkeeping.
+
+        Returns (ChallengeResult, extracted dict or None, timings), or None when the browser
+        itself failed.
+        """
+        timings: Dict[str, int] = {}
+        started = lap = time.monotonic()
+
+        def mark(stage: str) -> None:
+            nonlocal lap
+            now = time.monotonic()
+            timings[stage] = int((now - lap) * 1000)
+            lap = now
+
         async with _browser_semaphore():
+            mark("queue")
             context = None
             try:
                 context, page = await self.setup_browser(proxy, user_agent=cached_ua)
 
+                if block_resources:
+                    try:
+                        await install_resource_blocking(context, url)
+                    except Exception as e:
+                        self.log_message(f"Could not install resource blocking: {e}")
+
                 if cached_cookies:
                     self.log_message("Restoring cached cookies...")
                     cookie_list = [{"name": name, "value": value, "url": url} for name, value in cached_cookies.items()]
                     await context.add_cookies(cookie_list)
-
-                result = await self.solve_cloudflare_challenge(url, page)
-                success, cf_detected, status = result
-                if success:
-                    data = await extractor(context, page, status)
-                    if data and self._is_trustworthy(data["cookies"], cf_detected):
-                        exit_ip = await get_exit_ip(proxy) if IP_CHECK_ENABLED else None
-                        self.cookie_cache.set(key, data["cookies"], data["user_agent"], exit_ip=exit_ip)
-                        return data
-                    if data:
-                        self.log_message("CF detected but no cf_clearance cookie -- not caching")
-                return None
+                mark("launch")
+
+                result = await self.solve_cloudflare_challenge(url, page, stop_on_clearance=stop_on_clearance)
+                mark("solve")
+                data = None
+                if result.success and result.kind not in HARD_FAILURES:
+                    data = await self._extract(kind, context, page, result.status)
+                    mark("extract")
+                timings["total"] = int((time.monotonic() - started) * 1000)
+                return result, data, timings
             except Exception as e:
                 self.log_message(f"Error running browser for {url}: {e}")
                 return None
@@ -369,8 +720,15 @@ class CloakBypasser:
         hostname = urlparse(url).netloc
         key = cache_key(hostname, proxy)
 
-        cached = await self._read_valid_cache(key, proxy)
+        cached = await self._read_valid_cache(key, proxy, allow_stale=True)
         if cached:
+            if cached.is_expired():
+                # serve the expired entry now; one background solve replaces it
+                self.stale_served += 1
+                self._revalidate(key, url, proxy)
+                return {"cookies": cached.cookies, "user_agent": cached.user_agent, "stale": True}
+            if self.refresher is not None:
+                self.refresher.record_hit(key, url, proxy)
             return {"cookies": cached.cookies, "user_agent": cached.user_agent}
 
         async with _inflight_lock(key):
@@ -380,11 +738,96 @@ class CloakBypasser:
                 return {"cookies": cached.cookies, "user_agent": cached.user_agent}
 
             self.log_message(f"No cached cookies for {key}, generating new ones...")
+            data = await self._solve_claimed(url, proxy, key)
+            if data and self.refresher is not None:
+                self.refresher.track(key, url, proxy)
+            return data
 
-            async def extractor(context, page, status):
-                return await self.get_cookies_and_user_agent(context, page)
+    async def _solve_claimed(self, url: str, proxy: Optional[str], key: str) -> Optional[Dict[str, Any]]:
+        """_solve_cookies, but only one worker solves a key when the cache is shared across processes.
 
-            return await self._run_in_browser(url, proxy, key, restore_cookies=False, extractor=extractor)
+        While another worker holds the key's claim we poll until it's released and return the
+        entry it cached; if it failed, we claim the key and solve it ourselves.
+        """
+        cache = self.cookie_cache
+        while not await cache.run(cache.try_claim, key):
+            self.log_message(f"Another worker is solving {key}; waiting for its result")
+            while await cache.run(cache.claim_held, key):
+                await asyncio.sleep(CLAIM_POLL_SECONDS)
+            cached = await self._read_valid_cache(key, proxy)
+            if cached:
+                return {"cookies": cached.cookies, "user_agent": cached.user_agent}
+        try:
+            return await self._solve_cookies(url, proxy, key)
+        finally:
+            await cache.run(cache.release_claim, key)
+
+    async def _solve_cookies(self, url: str, proxy: Optional[str], key: str) -> Optional[Dict[str, Any]]:
+        return await self._run_in_browser(url, proxy, key, kind="cookies", restore_cookies=False,
+                                          block_resources=BLOCK_RESOURCES_COOKIES,
+                                          stop_on_clearance=COOKIE_EARLY_EXIT)
+
+    def _revalidate(self, key: str, url: str, proxy: Optional[str]) -> None:
+        """Start a background solve for a stale key unless one is already running."""
+        task = self._revalidations.get(key)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._revalidate_key(key, url, proxy))
+        self._revalidations[key] = task
+        task.add_done_callback(lambda t: self._revalidations.pop(key, None) if self._revalidations.get(key) is t else None)
+
+    async def _revalidate_key(self, key: str, url: str, proxy: Optional[str]) -> None:
+        cache = self.cookie_cache
+        try:
+            async with _inflight_lock(key):
+                if await cache.run(cache.get, key):
+                    return  # a foreground solve got there first
+                if not await cache.run(cache.try_claim, key):
+                    return  # another worker is revalidating it
+                self.revalidations += 1
+                self.log_message(f"Revalidating stale cookies for {key}")
+                try:
+                    data = await self._solve_cookies(url, proxy, key)
+                finally:
+                    await cache.run(cache.release_claim, key)
+                if data:
+                    if self.refresher is not None:
+                        self.refresher.track(key, url, proxy)
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log_message(f"Revalidation failed for {key}: {e}")
+        # stop serving cookies we couldn't replace; the next caller solves (or gets the error) itself
+        await cache.run(cache.invalidate, key)
+
+    async def reject_cookies(self, key: str) -> None:
+        """Drop key's cookies after the target refused them, and let the TTL policy learn from it."""
+        cache = self.cookie_cache
+        cached = cache.cache.get(key)
+        if cached is not None and not cached.is_expired():
+            self.ttl_policy.record_rejection(key, time.time() - cached.created)
+        await cache.run(cache.invalidate, key)
+
+    def stale_stats(self) -> Dict[str, Any]:
+        return {
+            "grace_seconds": self.cookie_cache.stale_grace,
+            "served": self.stale_served,
+            "revalidations": self.revalidations,
+            "in_progress": sum(1 for task in self._revalidations.values() if not task.done()),
+        }
+
+    async def refresh_cookies(self, url: str, proxy: Optional[str], key: str) -> Optional[Dict[str, Any]]:
+        """Re-solve key in the background; the new entry replaces the old one in a single cache.set()."""
+        cache = self.cookie_cache
+        async with _inflight_lock(key):
+            if not await cache.run(cache.try_claim, key):
+                return None  # another worker is already solving it
+            self.log_message(f"Refreshing cookies for {key} ahead of expiry")
+            try:
+                return await self._solve_cookies(url, proxy, key)
+            finally:
+                await cache.run(cache.release_claim, key)
 
     async def get_or_generate_html(self, url: str, proxy: Optional[str] = None, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
         """Get HTML content along with cookies (cached or fresh)."""
@@ -395,14 +838,18 @@ class CloakBypasser:
 
         # No in-flight lock here: HTML must be fetched fresh per request, so concurrent
         # requests run in parallel (bounded by the semaphore) rather than serializing.
-        async def extractor(context, page, status):
-            return await self.get_html_content_and_cookies(context, page, status_code=status)
-
-        return await self._run_in_browser(url, proxy, key, restore_cookies=not bypass_cache, extractor=extractor)
+        return await self._run_in_browser(url, proxy, key, kind="html", restore_cookies=not bypass_cache,
+                                          block_resources=BLOCK_RESOURCES_HTML)
 
     async def cleanup_browser(self, context) -> None:
-        """Close the context (and its underlying browser). Never raises; never leaks."""
+        """Close the context (and its underlying browser unless pooled). Never raises; never leaks."""
         if context is not None:
+            if self.browser_pool is not None and self.browser_pool.owns(context):
+                try:
+                    await self.browser_pool.release(context)
+                except Exception as e:
+                    self.log_message(f"Error releasing pooled context: {e}")
+                return
             try:
                 # shield+timeout so a hung close (or outer cancellation) can't
                 # leave the browser process running or block us forever
@@ -410,6 +857,43 @@ class CloakBypasser:
             except Exception as e:
                 self.log_message(f"Error closing context: {e}")
 
+    async def start(self) -> None:
+        """Start background work (cache sweeper/flusher, standby spares). Call once the event loop is running."""
+        self.cookie_cache.start()
+        if self.solver_pool is not None:
+            self.solver_pool.start()
+        if self.refresher is not None:
+            self.refresher.start()
+        if self.ip_monitor is not None:
+            self.ip_monitor.start()
+        if self.standby is not None:
+            self.standby.start()
+
+    def browser_stats(self) -> Dict[str, Any]:
+        return {
+            "pool": self.browser_pool.stats() if self.browser_pool is not None else None,
+            "standby": self.standby.stats() if self.standby is not None else None,
+            "fingerprints": get_fingerprint_factory().stats(),
+            "exit_ip": exit_ip_stats() if IP_CHECK_ENABLED or self.ip_monitor is not None else None,
+            "ip_monitor": self.ip_monitor.stats() if self.ip_monitor is not None else None,
+            "solvers": self.solver_pool.stats() if self.solver_pool is not None else None,
+        }
+
     async def cleanup(self) -> None:
-        """Backward compatibility method - no longer stores browser instances."""
-        pass
+        """Stop background work and close pooled browsers; unpooled contexts are closed per solve."""
+        if self.refresher is not None:
+            await self.refresher.close()
+        if self.ip_monitor is not None:
+            await self.ip_monitor.close()
+        revalidations = list(self._revalidations.values())
+        for task in revalidations:
+            task.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+        if self.standby is not None:
+            await self.standby.close()
+        if self.browser_pool is not None:
+            await self.browser_pool.close()
+        if self.solver_pool is not None:
+            await self.solver_pool.close()
+        await close_ip_session()
+        await self.cookie_cache.stop()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+# Request URLs that only ever appear while a Cloudflare challenge is running.
+_CHALLENGE_URL_MARKERS = ("/cdn-cgi/challenge-platform/", "challenges.cloudflare.com")
+# Only these responses can carry the clearance Set-Cookie; skip header reads for the rest.
+_COOKIE_RESOURCE_TYPES = ("document", "xhr", "fetch")
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    """Cookie domain-match (RFC 6265 5.1.3): host is domain or one of its subdomains."""
+    domain = domain.lstrip(".").lower()
+    return bool(domain) and (host == domain or host.endswith("." + domain))
+
+
+def clearance_for_host(set_cookie: str, response_url: str, host: Optional[str]) -> bool:
+    """Whether a Set-Cookie header value issues cf_clearance that the browser sends to host.
+
+    Playwright joins several Set-Cookie headers with newlines. A cookie without a Domain
+    attribute belongs to the host that set it. host=None accepts any cf_clearance.
+    """
+    for cookie in set_cookie.split("\n"):
+        name_value, *attributes = cookie.split(";")
+        if name_value.strip().split("=", 1)[0] != "cf_clearance":
+            continue
+        if host is None:
+            return True
+        domain = next((value for name, _, value in (a.strip().partition("=") for a in attributes)
+                       if name.lower() == "domain"), None)
+        if domain is not None:
+            if _host_matches(host.lower(), domain.strip()):
+                return True
+        elif (urlparse(response_url).hostname or "") == host.lower():
+            return True
+    return False
+
+
+class ChallengeWatcher:
+    """Event-driven view of a page's challenge state.
+
+    Subscribes to request/response/navigation events so callers can stop waiting as soon
+    as the outcome is known (challenge scripts loading, cf_clearance issued, main frame
+    navigating away) instead of sleeping for fixed intervals. The caller's timeouts stay
+    as upper bounds. With target_host, only a cf_clearance cookie scoped to that host
+    counts as clearance.
+    """
+
+    def __init__(self, page: Any, target_host: Optional[str] = None):
+        self.page = page
+        self.target_host = target_host
+        self.challenge_seen = False
+        self.clearance_seen = False
+        self.navigations = 0
+        self._changed = asyncio.Event()
+        self._attached = False
+
+    def attach(self) -> "ChallengeWatcher":
+        self.page.on("request", self._on_request)
+        self.page.on("response", self._on_response)
+        self.page.on("framenavigated", self._on_navigated)
+        self._attached = True
+        return self
+
+    def detach(self) -> None:
+        if not self._attached:
+            return
+        self._attached = False
+        for event, handler in (("request", self._on_request),
+                               ("response", self._on_response),
+                               ("framenavigated", self._on_navigated)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    def _signal(self) -> None:
+        self._changed.set()
+
+    def _on_request(self, request: Any) -> None:
+        url = getattr(request, "url", "") or ""
+        if any(marker in url for marker in _CHALLENGE_URL_MARKERS):
+            if not self.challenge_seen:
+                self.challenge_seen = True
+                self._signal()
+
+    async def _on_response(self, response: Any) -> None:
+        try:
+            self.observe_response(response)
+            if self.clearance_seen or response.request.resource_type not in _COOKIE_RESOURCE_TYPES:
+                return
+            set_cookie = await response.header_value("set-cookie")
+            if set_cookie and "cf_clearance=" in set_cookie and clearance_for_host(
+                    set_cookie, getattr(response, "url", "") or "", self.target_host):
+                self.clearance_seen = True
+                self._signal()
+        except Exception as e:
+            logging.debug(f"Challenge watcher could not inspect response: {e}")
+
+    def _on_navigated(self, frame: Any) -> None:
+        if frame is getattr(self.page, "main_frame", frame):
+            self.navigations += 1
+            self._signal()
+
+    def observe_response(self, response: Optional[Any]) -> None:
+        """Mark the challenge as present if a response carries Cloudflare's cf-mitigated header."""
+        if response is None:
+            return
+        headers = getattr(response, "headers", None) or {}
+        if headers.get("cf-mitigated", "").lower() == "challenge" and not self.challenge_seen:
+            self.challenge_seen = True
+            self._signal()
+
+    @property
+    def decided(self) -> bool:
+        return self.challenge_seen or self.clearance_seen
+
+    async def wait_for_change(self, timeout: float, *others: "asyncio.Future") -> bool:
+        """Wait until any watched event fires (or one of `others` completes). False on timeout."""
+        if timeout <= 0:
+            return False
+        changed = asyncio.ensure_future(self._changed.wait())
+        try:
+            done, _ = await asyncio.wait([changed, *others], timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            changed.cancel()
+        fired = self._changed.is_set()
+        self._changed.clear()
+        return fired or bool(done)
+
+    async def settle(self, timeout: float, quiet: float) -> None:
+        """Return once the challenge state is known, bounded by `timeout`.
+
+        Known means: a challenge or clearance was seen, or the page finished loading and
+        then stayed quiet (no challenge activity) for `quiet` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        load = asyncio.ensure_future(self.page.wait_for_load_state("load", timeout=timeout * 1000))
+        quiet_deadline = None
+        try:
+            while not self.decided:
+                now = loop.time()
+                if now >= deadline:
+                    return
+                if load.done():
+                    if quiet_deadline is None:
+                        quiet_deadline = now + quiet
+                    if now >= quiet_deadline:
+                        return
+                    await self.wait_for_change(min(quiet_deadline, deadline) - now)
+                else:
+                    await self.wait_for_change(deadline - now, load)
+        finally:
+            load.cancel()
+            if load.done() and not load.cancelled():
+                load.exception()  # a load timeout/error just means "not loaded yet"
+
+
+# Page classifications driving the solve strategy.
+UNPROTECTED = "unprotected"        # no challenge on the page (never had one, or it cleared)
+JS_CHALLENGE = "js_challenge"      # "Just a moment" interstitial that resolves by itself
+MANAGED = "managed"                # Turnstile widget present; may or may not need a click
+INTERACTIVE = "interactive"        # Turnstile checkbox that had to be clicked
+BLOCKED = "blocked"                # hard block (1020 / "you have been blocked"): give up
+RATE_LIMITED = "rate_limited"      # 429 / 1015: give up
+
+HARD_FAILURES = (BLOCKED, RATE_LIMITED)
+
+
+def classify_page(probe: dict, status: Optional[int] = None) -> str:
+    """Label a page from the in-page bypass probe and the main response status.
+
+    INTERACTIVE is never returned here: the solver reports it for a MANAGED page it had
+    to click through.
+    """
+    title = (probe.get("title") or "").lower()
+    interstitial = "just a moment" in title
+    if probe.get("rateLimited") or (status == 429 and not interstitial):
+        return RATE_LIMITED
+    if probe.get("blocked") and not interstitial:
+        return BLOCKED
+    if probe.get("challengeFrame") or probe.get("captcha"):
+        return MANAGED
+    if interstitial:
+        return JS_CHALLENGE
+    return UNPROTECTED
@@ -0,0 +1,46 @@
+import math
+from typing import Dict, Optional
+
+from cf_bypasser.core.detection import RATE_LIMITED
+
+
+class BypassError(Exception):
+    """A bypass failure with a definite HTTP status and a machine-readable error code."""
+
+    status_code = 500
+    error_code = "bypass_failed"
+
+    def __init__(self, detail: str, status_code: Optional[int] = None, error_code: Optional[str] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.headers = headers or {}
+        if status_code is not None:
+            self.status_code = status_code
+        if error_code is not None:
+            self.error_code = error_code
+
+
+class ChallengeBlockedError(BypassError):
+    """Cloudflare answered with a hard block (1020) or a rate limit (429/1015) -- not solvable by waiting."""
+
+    def __init__(self, kind: str, upstream_status: Optional[int] = None):
+        self.kind = kind
+        self.upstream_status = upstream_status
+        if kind == RATE_LIMITED:
+            super().__init__("Target is rate limiting this client (Cloudflare 429/1015)",
+                             status_code=429, error_code="cf_rate_limited")
+        else:
+            super().__init__("Target blocked this client (Cloudflare hard block)",
+                             status_code=403, error_code="cf_blocked")
+
+
+class HostBackoffError(BypassError):
+    """The host+proxy key failed recently and is still inside its backoff window."""
+
+    def __init__(self, failure_class: str, retry_after: float):
+        self.failure_class = failure_class
+        self.retry_after = retry_after
+        super().__init__(f"Recent solves for this host failed ({failure_class}); retry later",
+                         status_code=503, error_code="host_backoff",
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
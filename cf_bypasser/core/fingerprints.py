@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+from typing import Callable, List, Optional
+
+import cloakbrowser as cb
+
+from cf_bypasser.utils.constants import FINGERPRINT_QUEUE_SIZE
+
+def generate_fingerprint_args() -> List[str]:
+    """The full default stealth args (--no-sandbox, --fingerprint seed, platform) for one launch.
+
+    A launch given these must pass stealth_args=False, otherwise cloakbrowser's build_args()
+    generates a second set during the launch.
+    """
+    return list(cb.get_default_stealth_args())
+
+
+class FingerprintFactory:
+    """Pre-generates launch stealth args on a single dedicated thread into a bounded queue.
+
+    Launches that consume a ready set pass it with stealth_args=False, so cloakbrowser
+    generates nothing on the launch path and they run concurrently without the global
+    browser-init lock.
+    """
+
+    def __init__(self, size: int = FINGERPRINT_QUEUE_SIZE,
+                 generator: Callable[[], List[str]] = generate_fingerprint_args):
+        self._queue: "queue.Queue[List[str]]" = queue.Queue(maxsize=max(size, 1))
+        self._generator = generator
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.enabled = size > 0
+        self.served = 0
+        self.empty = 0
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cf-fingerprint-factory", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                fingerprint = self._generator()
+            except Exception as e:
+                logging.warning(f"Fingerprint generation failed: {e}")
+                self._stop.wait(1)
+                continue
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(fingerprint, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def take(self) -> Optional[List[str]]:
+        """A ready fingerprint, or None when disabled or the queue is momentarily empty."""
+        if not self.enabled:
+            return None
+        self.start()
+        try:
+            fingerprint = self._queue.get_nowait()
+        except queue.Empty:
+            self.empty += 1
+            return None
+        self.served += 1
+        return fingerprint
+
+    def stats(self) -> dict:
+        return {"ready": self._queue.qsize(), "served": self.served, "empty": self.empty}
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+_factory: Optional[FingerprintFactory] = None
+
+
+def get_fingerprint_factory() -> FingerprintFactory:
+    """Process-wide factory: one generator thread no matter how many bypassers exist."""
+    global _factory
+    if _factory is None:
+        _factory = FingerprintFactory()
+    return _factory
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.utils.misc import proxy_id
+from cf_bypasser.utils.ipcheck import get_exit_ip
+from cf_bypasser.utils.constants import IP_MONITOR_INTERVAL_SECONDS
+
+
+async def _fresh_exit_ip(proxy: Optional[str]) -> Optional[str]:
+    return await get_exit_ip(proxy, fresh=True)
+
+
+class ExitIPMonitor:
+    """Polls the exit IP of every proxy with cached cookies and drops its entries when it rotates.
+
+    Proxies are registered with watch() when cookies are solved or served through them, and
+    forgotten once they have no cache entries left. A detected change invalidates all of
+    the proxy's entries in one batch (CookieCache.invalidate_proxy), so the request path
+    only compares against current_ip() in memory.
+    """
+
+    def __init__(self, cache: CookieCache, interval: float = IP_MONITOR_INTERVAL_SECONDS,
+                 lookup: Callable[[Optional[str]], Awaitable[Optional[str]]] = _fresh_exit_ip):
+        self.cache = cache
+        self.interval = interval
+        self._lookup = lookup
+        self._proxies: Dict[str, Optional[str]] = {}  # proxy id -> proxy URL
+        self._current: Dict[str, str] = {}            # proxy id -> last seen exit IP
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.rotations = 0
+        self.invalidated = 0
+
+    def watch(self, proxy: Optional[str]) -> str:
+        pid = proxy_id(proxy)
+        self._proxies[pid] = proxy
+        return pid
+
+    def current_ip(self, proxy: Optional[str]) -> Optional[str]:
+        return self._current.get(proxy_id(proxy))
+
+    async def resolve(self, proxy: Optional[str]) -> Optional[str]:
+        """Watch proxy and return its exit IP, looking it up only if the monitor hasn't seen it yet."""
+        pid = self.watch(proxy)
+        ip = self._current.get(pid)
+        if ip is None:
+            ip = await self._lookup(proxy)
+            if ip:
+                self._current.setdefault(pid, ip)
+        return ip
+
+    async def check(self, pid: str) -> bool:
+        """Re-check one proxy; True when its exit IP changed (and its entries were dropped)."""
+        proxy = self._proxies.get(pid)
+        self.checks += 1
+        ip = await self._lookup(proxy)
+        if not ip:
+            return False
+        previous = self._current.get(pid)
+        self._current[pid] = ip
+        if previous is None or previous == ip:
+            return False
+        self.rotations += 1
+        removed = await self.cache.run(self.cache.invalidate_proxy, pid)
+        self.invalidated += removed
+        logging.info(f"Exit IP for proxy {pid} changed ({previous} -> {ip}); dropped {removed} cache entries")
+        return True
+
+    async def run_once(self) -> None:
+        active = set(self.cache.proxy_ids())
+        for pid in list(self._proxies):
+            if pid not in active:
+                # nothing cached through it any more; watched again on its next solve
+                self._proxies.pop(pid, None)
+                self._current.pop(pid, None)
+        await asyncio.gather(*(self.check(pid) for pid in list(self._proxies)))
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"Exit IP monitor pass failed: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watched_proxies": len(self._proxies),
+            "checks": self.checks,
+            "rotations": self.rotations,
+            "invalidated": self.invalidated,
+        }
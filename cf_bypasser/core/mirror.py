@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 from curl_cffi.requests import AsyncSession
 
 from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.errors import BypassError
 from cf_bypasser.utils.config import BrowserConfig
 from cf_bypasser.utils.misc import cache_key
 from cf_bypasser.utils.constants import (
@@ -171,7 +172,8 @@ class RequestMirror:
                 # If bypass_cache is True, invalidate existing cache first
                 if bypass_cache:
                     parsed_hostname = urlparse(target_url).netloc
-                    self.bypasser.cookie_cache.invalidate(cache_key(parsed_hostname, proxy))
+                    cache = self.bypasser.cookie_cache
+                    await cache.run(cache.invalidate, cache_key(parsed_hostname, proxy))
 
                 cf_data = await self.bypasser.get_or_generate_cookies(target_url, proxy)
 
@@ -195,8 +197,10 @@ class RequestMirror:
                 if status_code == 403 and attempt < max_retries:
                     logging.warning(f"Got 403 Forbidden from {hostname}, invalidating cache and retrying...")
 
+                    # if these were stale cookies, the retry queues on the key's in-flight
+                    # lock behind the background revalidation and picks up its result
                     parsed_hostname = urlparse(target_url).netloc
-                    self.bypasser.cookie_cache.invalidate(cache_key(parsed_hostname, proxy))
+                    await self.bypasser.reject_cookies(cache_key(parsed_hostname, proxy))
 
                     await asyncio.sleep(MIRROR_RETRY_BACKOFF_SECONDS)
                     continue
@@ -206,8 +210,8 @@ class RequestMirror:
                 logging.info(f"Request to {hostname} completed with status {status_code}")
                 return status_code, final_headers, response.content
 
-            except (KeyError, TypeError, ValueError):
-                # Deterministic programming errors — retrying won't help.
+            except (KeyError, TypeError, ValueError, BypassError):
+                # Deterministic programming errors or hard CF blocks — retrying won't help.
                 raise
             except Exception as e:
                 if attempt < max_retries:
@@ -219,8 +223,8 @@ class RequestMirror:
                     logging.error(traceback.format_exc())
                     raise
 
-    async def cleanup(self):
-        """Clean up resources."""
+    async def close_sessions(self):
+        """Close and forget every cached curl_cffi session."""
         for session in self.session_cache.values():
             try:
                 await session.close()
@@ -228,5 +232,9 @@ class RequestMirror:
                 logging.error(f"Error closing session: {e}")
         self.session_cache.clear()
 
+    async def cleanup(self):
+        """Clean up resources."""
+        await self.close_sessions()
+
         if self.bypasser:
             await self.bypasser.cleanup()
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cloakbrowser as cb
+from cloakbrowser.config import DEFAULT_VIEWPORT, binary_supports_headless_no_viewport
+
+from cf_bypasser.utils.misc import get_browser_init_lock, per_loop
+from cf_bypasser.utils.constants import (
+    BROWSER_POOL_MAX_CONTEXTS,
+    BROWSER_POOL_MAX_AGE_SECONDS,
+    CONTEXT_CLOSE_TIMEOUT_SECONDS,
+)
+
+PoolKey = Tuple[Optional[str], Optional[str], Optional[str], bool]
+
+
+def _context_kwargs(launch_kwargs: Dict[str, Any], user_agent: Optional[str]) -> Dict[str, Any]:
+    """new_context() kwargs matching cloakbrowser's launch_context_async.
+
+    Headed (and headless on binaries that support it) tracks the real window with
+    no_viewport; older headless binaries get the fixed DEFAULT_VIEWPORT. A bare
+    new_context() would emulate Playwright's 1280x720 instead, so the outer and inner
+    window sizes wouldn't match.
+    """
+    kwargs: Dict[str, Any] = {"user_agent": user_agent} if user_agent else {}
+    headless = launch_kwargs.get("headless", True)
+    if headless and not binary_supports_headless_no_viewport(
+            launch_kwargs.get("license_key"), launch_kwargs.get("browser_version"),
+            launch_kwargs.get("release_channel")):
+        kwargs["viewport"] = DEFAULT_VIEWPORT
+    else:
+        kwargs["no_viewport"] = True
+    return kwargs
+
+
+class PooledBrowser:
+    """One long-lived Chromium process plus the bookkeeping needed to recycle it."""
+
+    __slots__ = ("browser", "key", "created_at", "served", "active", "retired")
+
+    def __init__(self, browser: Any, key: PoolKey):
+        self.browser = browser
+        self.key = key
+        self.created_at = time.monotonic()
+        self.served = 0
+        self.active = 0
+        self.retired = False
+
+    def usable(self, max_contexts: int, max_age: float) -> bool:
+        if self.retired:
+            return False
+        if max_contexts > 0 and self.served >= max_contexts:
+            return False
+        if max_age > 0 and time.monotonic() - self.created_at >= max_age:
+            return False
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """Long-lived browsers keyed by (proxy, locale, user agent, headless) handing out fresh contexts.
+
+    Each lease is a brand-new, isolated BrowserContext (no cookies/storage shared with
+    earlier leases), so callers keep the fresh-profile semantics of launch_context_async
+    without paying the Chromium cold start. A browser is retired after serving
+    max_contexts contexts or living max_age seconds, and closed once its last lease returns.
+    """
+
+    def __init__(self, max_contexts: int = BROWSER_POOL_MAX_CONTEXTS,
+                 max_age_seconds: float = BROWSER_POOL_MAX_AGE_SECONDS):
+        self.max_contexts = max_contexts
+        self.max_age_seconds = max_age_seconds
+        self._browsers: Dict[PoolKey, PooledBrowser] = {}
+        self._key_locks: dict = {}
+        self._leases: Dict[int, PooledBrowser] = {}
+        self.launches = 0
+        self.leases = 0
+
+    def _key_lock(self, key: PoolKey) -> asyncio.Lock:
+        registry = per_loop(self._key_locks, dict)
+        lock = registry.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            registry[key] = lock
+        return lock
+
+    async def lease(self, launch_kwargs: Dict[str, Any], user_agent: Optional[str] = None,
+                    serialize: bool = True) -> Any:
+        """Return a fresh context from a pooled browser matching launch_kwargs/user_agent.
+
+        serialize=False skips the global init lock for launches that carry a pre-generated
+        fingerprint; a per-key lock still prevents two launches for the same key.
+        """
+        proxy = launch_kwargs.get("proxy")
+        key: PoolKey = (
+            proxy.get("server") + "|" + proxy.get("username", "") if proxy else None,
+            launch_kwargs.get("locale"),
+            user_agent,
+            bool(launch_kwargs.get("headless")),
+        )
+
+        # the locks only cover picking/launching a browser, not the context itself
+        async with self._key_lock(key):
+            entry = self._browsers.get(key)
+            if entry is None or not entry.usable(self.max_contexts, self.max_age_seconds):
+                if entry is not None:
+                    await self._retire(entry)
+                if serialize:
+                    async with get_browser_init_lock():
+                        browser = await cb.launch_async(**launch_kwargs)
+                else:
+                    browser = await cb.launch_async(**launch_kwargs)
+                entry = PooledBrowser(browser, key)
+                self._browsers[key] = entry
+                self.launches += 1
+            entry.served += 1
+            entry.active += 1
+
+        try:
+            context = await entry.browser.new_context(**_context_kwargs(launch_kwargs, user_agent))
+        except BaseException:
+            entry.active -= 1
+            await self._retire(entry)
+            raise
+        self._leases[id(context)] = entry
+        self.leases += 1
+        return context
+
+    def owns(self, context: Any) -> bool:
+        return id(context) in self._leases
+
+    async def release(self, context: Any) -> None:
+        """Close a leased context and close its browser if it was retired meanwhile."""
+        entry = self._leases.pop(id(context), None)
+        try:
+            await asyncio.wait_for(asyncio.shield(context.close()), timeout=CONTEXT_CLOSE_TIMEOUT_SECONDS)
+        finally:
+            if entry is not None:
+                entry.active -= 1
+                if not entry.usable(self.max_contexts, self.max_age_seconds):
+                    await self._retire(entry)
+
+    async def _retire(self, entry: PooledBrowser) -> None:
+        entry.retired = True
+        if self._browsers.get(entry.key) is entry:
+            del self._browsers[entry.key]
+        if entry.active <= 0:
+            await self._close_browser(entry)
+
+    async def _close_browser(self, entry: PooledBrowser) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(entry.browser.close()), timeout=CONTEXT_CLOSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            logging.warning(f"Error closing pooled browser: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "browsers": len(self._browsers),
+            "active_contexts": len(self._leases),
+            "launches": self.launches,
+            "leases": self.leases,
+        }
+
+    async def close(self) -> None:
+        """Close every pooled browser, including ones with contexts still leased."""
+        entries = list(self._browsers.values()) + [e for e in self._leases.values()]
+        self._browsers.clear()
+        self._leases.clear()
+        seen = set()
+        for entry in entries:
+            if id(entry) in seen:
+                continue
+            seen.add(id(entry))
+            entry.retired = True
+            await self._close_browser(entry)
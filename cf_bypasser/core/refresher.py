@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.utils.constants import (
+    REFRESH_AHEAD_FRACTION,
+    REFRESH_MIN_HITS,
+    REFRESH_CHECK_INTERVAL_SECONDS,
+)
+
+
+class _Tracked:
+    __slots__ = ("url", "proxy", "hits", "replaced_expiry")
+
+    def __init__(self, url: str, proxy: Optional[str]):
+        self.url = url
+        self.proxy = proxy
+        self.hits = 0
+        # expiry of the entry a refresh replaced; the first hit past it is a saved solve
+        self.replaced_expiry: Optional[float] = None
+
+
+class CookieRefresher:
+    """Re-solves hot cache keys shortly before they expire so requests never hit the expiry cliff.
+
+    A key is hot once its current entry has served min_hits cache hits. When a hot entry
+    enters the last `fraction` of its TTL, the refresher solves it again in the background
+    and the new cookies replace the old ones in one cache.set(). Refreshes run one at a
+    time and only while slot_free() reports an idle browser slot, so user requests always
+    come first.
+    """
+
+    def __init__(self, cache: CookieCache,
+                 solve: Callable[[str, Optional[str], str], Awaitable[Optional[Dict[str, Any]]]],
+                 slot_free: Callable[[], bool],
+                 fraction: float = REFRESH_AHEAD_FRACTION, min_hits: int = REFRESH_MIN_HITS,
+                 interval: float = REFRESH_CHECK_INTERVAL_SECONDS):
+        self.cache = cache
+        self._solve = solve
+        self._slot_free = slot_free
+        self.fraction = fraction
+        self.min_hits = min_hits
+        self.interval = interval
+        self._tracked: Dict[str, _Tracked] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.skipped_busy = 0
+        self.saved_solves = 0
+
+    def track(self, key: str, url: str, proxy: Optional[str]) -> None:
+        """Remember how to re-solve key; call when its cookies were freshly generated."""
+        tracked = self._tracked.get(key)
+        if tracked is None:
+            self._tracked[key] = _Tracked(url, proxy)
+        else:
+            tracked.url, tracked.hits = url, 0
+
+    def record_hit(self, key: str, url: str, proxy: Optional[str]) -> None:
+        tracked = self._tracked.get(key)
+        if tracked is None:
+            tracked = self._tracked[key] = _Tracked(url, proxy)
+        tracked.hits += 1
+        if tracked.replaced_expiry is not None and time.time() >= tracked.replaced_expiry:
+            # without the refresh this request would have waited on a browser solve
+            self.saved_solves += 1
+            tracked.replaced_expiry = None
+
+    def due(self, now: Optional[float] = None) -> list:
+        """Hot keys inside their refresh window, soonest expiry first."""
+        now = time.time() if now is None else now
+        due = []
+        for key, tracked in list(self._tracked.items()):
+            cached = self.cache.cache.get(key)
+            if cached is None:
+                # expired/evicted/invalidated: forget it until it's generated or hit again
+                del self._tracked[key]
+                continue
+            if tracked.hits < self.min_hits:
+                continue
+            refresh_at = cached.expires - (cached.expires - cached.created) * self.fraction
+            if now >= refresh_at:
+                due.append((cached.expires, key))
+        return [key for _, key in sorted(due)]
+
+    async def refresh(self, key: str) -> bool:
+        tracked = self._tracked.get(key)
+        cached = self.cache.cache.get(key)
+        if tracked is None or cached is None:
+            return False
+        old_expiry = cached.expires
+        try:
+            data = await self._solve(tracked.url, tracked.proxy, key)
+        except Exception as e:
+            logging.warning(f"Refresh-ahead for {key} failed: {e}")
+            data = None
+        if not data:
+            self.failures += 1
+            # don't hammer a failing host every interval; it gets re-tracked on the next solve
+            self._tracked.pop(key, None)
+            return False
+        self.refreshes += 1
+        tracked.hits = 0
+        tracked.replaced_expiry = old_expiry
+        return True
+
+    async def run_once(self) -> None:
+        for key in self.due():
+            if not self._slot_free():
+                self.skipped_busy += 1
+                return
+            await self.refresh(key)
+
+    def start(self) -> None:
+        if self.fraction <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"Refresh-ahead pass failed: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self._tracked),
+            "hot_keys": sum(1 for t in self._tracked.values() if t.hits >= self.min_hits),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "skipped_busy": self.skipped_busy,
+            "saved_solves": self.saved_solves,
+        }
@@ -0,0 +1,43 @@
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from cf_bypasser.utils.constants import (
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_THIRD_PARTY_HOSTS,
+    ALWAYS_ALLOWED_HOSTS,
+)
+
+
+def _host_matches(host: str, suffixes: Iterable[str]) -> bool:
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+def should_block(resource_type: str, url: str, target_host: Optional[str]) -> bool:
+    """Decide whether a cookie-solve request can be aborted without affecting the challenge.
+
+    Cloudflare's challenge hosts are never blocked; images/media/fonts and known
+    third-party trackers are. Everything else (the target's documents, scripts, XHR and
+    its own /cdn-cgi/ endpoints) goes through.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    if _host_matches(host, ALWAYS_ALLOWED_HOSTS):
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    if target_host and _host_matches(host, (target_host.lower(),)):
+        return False
+    return _host_matches(host, BLOCKED_THIRD_PARTY_HOSTS)
+
+
+async def install_resource_blocking(context, url: str) -> None:
+    """Route every request in the context through should_block()."""
+    target_host = urlparse(url).hostname
+
+    async def handler(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, target_host):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handler)
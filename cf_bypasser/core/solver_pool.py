@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.util import Finalize
+from typing import Any, Dict, Optional
+
+# Per-process state of a solver: one bypasser and one event loop reused across jobs, so
+# pooled browsers survive between solves.
+_solver = None
+_solver_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_solver(log: bool) -> None:
+    global _solver, _solver_loop
+    from cf_bypasser.cache.cookie_cache import MemoryCookieCache
+    from cf_bypasser.core.bypasser import CloakBypasser
+
+    _solver_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_solver_loop)
+    # the cache, refresh-ahead and exit-IP monitoring are owned by the API process
+    _solver = CloakBypasser(log=log, cookie_cache=MemoryCookieCache(), standby_contexts=0,
+                            solver_processes=0, background=False)
+    Finalize(None, _shutdown_solver, exitpriority=10)
+
+
+def _shutdown_solver() -> None:
+    if _solver is not None and _solver_loop is not None and not _solver_loop.is_closed():
+        try:
+            _solver_loop.run_until_complete(_solver.cleanup())
+        except Exception as e:
+            logging.warning(f"Solver {os.getpid()} cleanup failed: {e}")
+        _solver_loop.close()
+
+
+def _run_job(kind: str, url: str, proxy: Optional[str], browse_kwargs: Dict[str, Any]):
+    """Run one browse in this solver process. Returns (pid, busy seconds, outcome)."""
+    started = time.monotonic()
+    outcome = _solver_loop.run_until_complete(_solver._browse(kind, url, proxy, **browse_kwargs))
+    if outcome is not None:
+        result, data, timings = outcome
+        # plain tuple across the process boundary; the parent rebuilds the ChallengeResult
+        outcome = (tuple(result), result.kind), data, timings
+    return os.getpid(), time.monotonic() - started, outcome
+
+
+class SolverPool:
+    """Runs browser solves in a pool of separate solver processes.
+
+    The API process keeps the cache, backoff and singleflight bookkeeping and only ships the
+    browser part of a solve (CloakBypasser._browse) to a solver, so Chromium launches and CDP
+    traffic don't share an event loop with mirror requests. Each solver process handles one
+    solve at a time and keeps its browser pool between solves.
+    """
+
+    def __init__(self, size: int, log: bool = True, initializer=_init_solver, job=_run_job):
+        self.size = size
+        self.log = log
+        self._initializer = initializer  # both must be picklable module-level functions
+        self._job = job
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.started_at = time.monotonic()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self._solvers: Dict[int, Dict[str, float]] = {}
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),  # never fork a process with a running loop
+                initializer=self._initializer,
+                initargs=(self.log,),
+            )
+            self.started_at = time.monotonic()
+
+    @property
+    def slot_free(self) -> bool:
+        return self.in_flight < self.size
+
+    async def browse(self, kind: str, url: str, proxy: Optional[str], **browse_kwargs):
+        """CloakBypasser._browse() in a solver process; same return value."""
+        from cf_bypasser.core.bypasser import ChallengeResult
+
+        self.in_flight += 1
+        try:
+            for attempt in (1, 2):
+                self.start()
+                executor = self._executor
+                try:
+                    pid, busy, outcome = await asyncio.get_running_loop().run_in_executor(
+                        executor, self._job, kind, url, proxy, browse_kwargs)
+                    break
+                except BrokenProcessPool as e:
+                    # a solver died (e.g. Chromium OOM); the executor is unusable from now on
+                    self._discard_executor(executor)
+                    if attempt == 2:
+                        raise
+                    logging.warning(f"Solver process died ({e}); restarting the pool and retrying {url}")
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Solver process failed for {url}: {e}")
+            return None
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        solver = self._solvers.setdefault(pid, {"jobs": 0, "busy_seconds": 0.0})
+        solver["jobs"] += 1
+        solver["busy_seconds"] += busy
+        if outcome is None:
+            return None
+        (fields, page_kind), data, timings = outcome
+        return ChallengeResult(*fields, page_kind), data, timings
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken executor so the next start() builds a fresh one (once per breakage)."""
+        if self._executor is not executor:
+            return  # a concurrent job already replaced it
+        self._executor = None
+        self.restarts += 1
+        self._solvers.clear()  # those solver pids are gone
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "processes": self.size,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.size),
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "solvers": {
+                str(pid): {
+                    "jobs": solver["jobs"],
+                    "busy_seconds": round(solver["busy_seconds"], 3),
+                    "utilization": round(min(solver["busy_seconds"] / uptime, 1.0), 3),
+                }
+                for pid, solver in self._solvers.items()
+            },
+        }
+
+    async def close(self) -> None:
+        """Stop the solver processes; each closes its browsers on the way out."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
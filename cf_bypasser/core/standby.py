@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+from cf_bypasser.utils.constants import STANDBY_RETRY_SECONDS
+
+
+def _label(proxy: Optional[str]) -> str:
+    """Stats label for a proxy without leaking its credentials."""
+    if not proxy:
+        return "direct"
+    parsed = urlparse(proxy)
+    return f"{parsed.scheme}://{parsed.hostname}:{parsed.port}"
+
+
+class StandbyContexts:
+    """Keeps `size` already-launched spare contexts per target proxy and refills them in the background.
+
+    take() hands out a spare without waiting; the fill task for that proxy is woken and
+    launches a replacement, and the time from take to replacement is tracked as the
+    replenishment lag.
+    """
+
+    def __init__(self, launcher: Callable[[Optional[str]], Awaitable[Any]],
+                 closer: Callable[[Any], Awaitable[None]],
+                 size: int, proxies: Optional[List[str]] = None):
+        self._launcher = launcher
+        self._closer = closer
+        self.size = size
+        self.targets: List[Optional[str]] = [None] + list(proxies or [])
+        self._spares: Dict[Optional[str], Deque[Any]] = {p: deque() for p in self.targets}
+        self._taken_at: Dict[Optional[str], Deque[float]] = {p: deque() for p in self.targets}
+        self._wake: Dict[Optional[str], asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.hits = 0
+        self.misses = 0
+        self.last_lag_ms: Optional[int] = None
+        self._lag_total_ms = 0
+        self._lag_count = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks or self.size <= 0:
+            return
+        for proxy in self.targets:
+            self._wake[proxy] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._fill(proxy)))
+
+    def take(self, proxy: Optional[str]) -> Optional[Any]:
+        """Pop a ready spare for this proxy (None if there isn't one) and trigger a refill."""
+        spares = self._spares.get(proxy)
+        if spares is None or not self.running:
+            return None
+        while spares:
+            context = spares.popleft()
+            self._taken_at[proxy].append(time.monotonic())
+            self._wake[proxy].set()
+            if self._alive(context):
+                self.hits += 1
+                return context
+            asyncio.create_task(self._closer(context))
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _alive(context: Any) -> bool:
+        browser = getattr(context, "browser", None)
+        try:
+            return browser is None or browser.is_connected()
+        except Exception:
+            return False
+
+    async def _fill(self, proxy: Optional[str]) -> None:
+        spares = self._spares[proxy]
+        wake = self._wake[proxy]
+        while True:
+            while len(spares) < self.size:
+                try:
+                    context = await self._launcher(proxy)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"Standby launch for {_label(proxy)} failed: {e}")
+                    await asyncio.sleep(STANDBY_RETRY_SECONDS)
+                    continue
+                spares.append(context)
+                if self._taken_at[proxy]:
+                    self._record_lag(time.monotonic() - self._taken_at[proxy].popleft())
+            wake.clear()
+            await wake.wait()
+
+    def _record_lag(self, seconds: float) -> None:
+        lag_ms = int(seconds * 1000)
+        self.last_lag_ms = lag_ms
+        self._lag_total_ms += lag_ms
+        self._lag_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target_per_proxy": self.size,
+            "spare": {_label(p): len(self._spares[p]) for p in self.targets},
+            "hits": self.hits,
+            "misses": self.misses,
+            "last_replenish_lag_ms": self.last_lag_ms,
+            "avg_replenish_lag_ms": (self._lag_total_ms // self._lag_count) if self._lag_count else None,
+        }
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for spares in self._spares.values():
+            while spares:
+                await self._closer(spares.popleft())
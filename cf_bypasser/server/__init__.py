@@ -1,4 +1,5 @@
 from .app import create_app
 from .routes import setup_routes
+from .gateway import Gateway, HashRing, create_gateway_app
 
-__all__ = ["create_app", "setup_routes"]
\ No newline at end of file
+__all__ = ["create_app", "setup_routes", "Gateway", "HashRing", "create_gateway_app"]
\ No newline at end of file
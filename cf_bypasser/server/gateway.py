@@ -0,0 +1,333 @@
+import asyncio
+import bisect
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from curl_cffi.requests import AsyncSession
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from cf_bypasser.utils.misc import cache_key, md5_hash, per_loop
+from cf_bypasser.utils.constants import (
+    APP_VERSION,
+    GATEWAY_BACKENDS,
+    GATEWAY_VNODES,
+    GATEWAY_TIMEOUT_SECONDS,
+    GATEWAY_HEALTH_PATH,
+    GATEWAY_HEALTH_INTERVAL_SECONDS,
+    GATEWAY_HEALTH_FAILURES,
+)
+
+logger = logging.getLogger(__name__)
+
+# hop-by-hop or recomputed: never copied between client, gateway and node
+_SKIP_HEADERS = {"host", "content-length", "connection", "transfer-encoding", "keep-alive"}
+# node admin routes: they act on one node's cache, so the gateway sends them to every node
+_FAN_OUT_PATHS = {"/cache/clear", "/cache/stats", "/cache/export", "/cache/import"}
+
+
+def _point(text: str) -> int:
+    return int(md5_hash(text)[:16], 16)
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Each node owns `vnodes` points on a 64-bit ring and a key belongs to the first point
+    at or after its own hash. Adding or removing a node only moves the keys on that node's
+    arcs (about 1/N of them); every other key keeps its node.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = GATEWAY_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for i in range(self.vnodes):
+            point = _point(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def lookup(self, key: str, skip: Iterable[str] = ()) -> Optional[str]:
+        """Node owning key; nodes in skip are passed over clockwise, as if removed."""
+        if not self._points:
+            return None
+        skip = set(skip)
+        start = bisect.bisect(self._points, _point(key))
+        seen = set()
+        for offset in range(len(self._points)):
+            owner = self._owners[(start + offset) % len(self._points)]
+            if owner in seen:
+                continue
+            if owner not in skip:
+                return owner
+            seen.add(owner)
+            if len(seen) == len(self._nodes):
+                return None
+        return None
+
+
+def routing_key(request: Request) -> Optional[str]:
+    """cache_key() the node would compute for this request, or None if it names no host."""
+    hostname = request.headers.get("x-hostname")
+    if hostname:
+        proxy = request.headers.get("x-proxy")
+        if "://" in hostname:  # same tolerance as the mirror route
+            parsed = urlparse(hostname)
+            hostname = parsed.netloc or parsed.path
+    else:
+        url = request.query_params.get("url")
+        hostname = urlparse(url).netloc if url else None
+        proxy = request.query_params.get("proxy")
+    if not hostname:
+        return None
+    return cache_key(hostname, proxy)
+
+
+class Gateway:
+    """Routes requests to backend nodes by consistent hash of their cache key.
+
+    Every request for a (hostname, proxy) pair goes to the same node, so its cookie cache
+    entry, mirror session and in-flight solve live in one place without replication.
+    Nodes are health-checked in the background; a node that fails `fail_threshold` checks
+    (or forwards) in a row is skipped, and its keys fall to the next node on the ring until
+    it passes a check again. The /cache admin routes go to every healthy node (see fan_out()).
+    """
+
+    def __init__(self, backends: Iterable[str] = GATEWAY_BACKENDS, vnodes: int = GATEWAY_VNODES,
+                 timeout: float = GATEWAY_TIMEOUT_SECONDS, health_path: str = GATEWAY_HEALTH_PATH,
+                 health_interval: float = GATEWAY_HEALTH_INTERVAL_SECONDS,
+                 fail_threshold: int = GATEWAY_HEALTH_FAILURES):
+        self.ring = HashRing(vnodes=vnodes)
+        self.timeout = timeout
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.fail_threshold = fail_threshold
+        self._failures: Dict[str, int] = {}
+        self.unhealthy: set = set()
+        self.forwarded: Dict[str, int] = {}
+        self.errors = 0
+        self._sessions: dict = {}
+        self._checker: Optional[asyncio.Task] = None
+        for node in backends:
+            self.add_node(node)
+
+    def add_node(self, node: str) -> None:
+        node = node.rstrip("/")
+        self.ring.add(node)
+        self._failures.setdefault(node, 0)
+        self.forwarded.setdefault(node, 0)
+
+    def remove_node(self, node: str) -> None:
+        node = node.rstrip("/")
+        self.ring.remove(node)
+        self._failures.pop(node, None)
+        self.unhealthy.discard(node)
+
+    def node_for(self, key: str) -> Optional[str]:
+        return self.ring.lookup(key, skip=self.unhealthy)
+
+    def _record(self, node: str, ok: bool) -> None:
+        if node not in self._failures:
+            return  # removed meanwhile
+        if ok:
+            self._failures[node] = 0
+            if node in self.unhealthy:
+                self.unhealthy.discard(node)
+                logger.info(f"Backend {node} is healthy again")
+            return
+        self._failures[node] += 1
+        if self._failures[node] >= self.fail_threshold and node not in self.unhealthy:
+            self.unhealthy.add(node)
+            logger.warning(f"Backend {node} marked unhealthy; its hosts move to the next node")
+
+    async def check(self, node: str) -> bool:
+        try:
+            session = per_loop(self._sessions, AsyncSession)
+            resp = await session.get(node + self.health_path, timeout=min(self.timeout, 10))
+            ok = resp.status_code < 500
+        except Exception as e:
+            logger.debug(f"Health check of {node} failed: {e}")
+            ok = False
+        self._record(node, ok)
+        return ok
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(node) for node in self.ring.nodes))
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_all()
+
+    def start(self) -> None:
+        if self._checker is None and self.health_interval > 0:
+            self._checker = asyncio.create_task(self._check_loop())
+
+    async def _send(self, node: str, request: Request, body: bytes):
+        """Replay request on node; the node's response, or None if it couldn't be reached."""
+        url = node + request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _SKIP_HEADERS}
+        try:
+            session = per_loop(self._sessions, AsyncSession)
+            resp = await session.request(request.method, url, headers=headers, data=body,
+                                         timeout=self.timeout, allow_redirects=False)
+        except Exception as e:
+            self.errors += 1
+            self._record(node, False)
+            logger.error(f"Forwarding to {node} failed: {e}")
+            return None
+        self._record(node, True)
+        self.forwarded[node] += 1
+        return resp
+
+    async def forward(self, request: Request) -> Response:
+        if request.url.path in _FAN_OUT_PATHS:
+            return await self.fan_out(request)
+        key = routing_key(request)
+        # requests that name no host still need a node; spread them by path
+        node = self.node_for(key or request.url.path)
+        if node is None:
+            return _no_backend()
+        resp = await self._send(node, request, await request.body())
+        if resp is None:
+            return _backend_unavailable()
+        # curl_cffi hands back a decoded body, so content-encoding goes too
+        response_headers = {k: v for k, v in resp.headers.items()
+                            if k.lower() not in _SKIP_HEADERS and k.lower() != "content-encoding"}
+        response = Response(content=resp.content, status_code=resp.status_code, headers=response_headers)
+        response.headers["x-cf-bypasser-node"] = node
+        return response
+
+    def _partition(self, body: bytes, nodes: List[str]) -> Dict[str, bytes]:
+        """Split an NDJSON snapshot so each entry goes to the node that owns its key."""
+        parts: Dict[str, List[bytes]] = {node: [] for node in nodes}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                node = self.node_for(json.loads(line)["key"])
+            except (ValueError, TypeError, KeyError):
+                node = None  # malformed: let a node count it
+            parts[node if node in parts else nodes[0]].append(line)
+        return {node: b"".join(line + b"\n" for line in lines) for node, lines in parts.items()}
+
+    async def fan_out(self, request: Request) -> Response:
+        """Send a /cache admin request to every healthy node and combine the replies.
+
+        /cache/export concatenates the nodes' snapshots and /cache/import gives each node the
+        entries it owns; the other routes reply with {"nodes": {node: reply}}. The status is
+        the nodes' common status, or 502 when they differ or a node couldn't be reached.
+        """
+        nodes = [node for node in self.ring.nodes if node not in self.unhealthy]
+        if not nodes:
+            return _no_backend()
+        body = await request.body()
+        path = request.url.path
+        bodies = self._partition(body, nodes) if path == "/cache/import" else dict.fromkeys(nodes, body)
+        replies = await asyncio.gather(*(self._send(node, request, bodies[node]) for node in nodes))
+        statuses = {resp.status_code if resp is not None else 502 for resp in replies}
+        status = statuses.pop() if len(statuses) == 1 else 502
+        if path == "/cache/export" and status == 200:
+            return Response(content=b"".join(resp.content for resp in replies), media_type="application/x-ndjson")
+        results = {}
+        for node, resp in zip(nodes, replies):
+            if resp is None:
+                results[node] = {"detail": "Backend unavailable", "error_code": "backend_unavailable"}
+                continue
+            try:
+                results[node] = resp.json()
+            except ValueError:
+                results[node] = {"detail": resp.text}
+        return JSONResponse(status_code=status, content={"nodes": results})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vnodes": self.ring.vnodes,
+            "errors": self.errors,
+            "nodes": {
+                node: {
+                    "healthy": node not in self.unhealthy,
+                    "consecutive_failures": self._failures.get(node, 0),
+                    "forwarded": self.forwarded.get(node, 0),
+                }
+                for node in self.ring.nodes
+            },
+        }
+
+    async def close(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            await asyncio.gather(self._checker, return_exceptions=True)
+            self._checker = None
+        for session in list(self._sessions.values()):
+            try:
+                await session.close()
+            except Exception as e:
+                logger.error(f"Error closing gateway session: {e}")
+        self._sessions.clear()
+
+
+def _no_backend() -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": "No healthy backend available",
+                                                  "error_code": "no_backend"})
+
+
+def _backend_unavailable() -> JSONResponse:
+    return JSONResponse(status_code=502, content={"detail": "Backend unavailable",
+                                                  "error_code": "backend_unavailable"})
+
+
+def create_gateway_app(gateway: Optional[Gateway] = None) -> FastAPI:
+    """FastAPI app that forwards every request to a backend node (server.py --gateway)."""
+    gateway = gateway or Gateway()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+        if not gateway.ring.nodes:
+            logger.warning("Gateway started without backends; set CF_GATEWAY_BACKENDS or --backends")
+        await gateway.check_all()  # route around dead nodes from the first request
+        gateway.start()
+        logger.info(f"Gateway routing to {len(gateway.ring.nodes)} backends")
+        yield
+        await gateway.close()
+
+    app = FastAPI(title="Cloudflare Bypasser Gateway", version=APP_VERSION, lifespan=lifespan,
+                  docs_url=None, redoc_url=None, openapi_url=None)
+    app.state.gateway = gateway
+
+    @app.get("/gateway/stats")
+    async def gateway_stats():
+        """Ring membership, health and per-node forward counts."""
+        return gateway.stats()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
+    async def forward(request: Request, path: str = ""):
+        return await gateway.forward(request)
+
+    return app
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, field_validator
 
 from cf_bypasser.utils.constants import PROXY_SCHEMES
@@ -33,6 +33,13 @@ class CacheStatsResponse(BaseModel):
     cached_entries: int = Field(..., description="Number of active cached entries")
     total_hostnames: int = Field(..., description="Total number of hostnames in cache")
     hostnames: List[str] = Field(..., description="List of cached hostnames")
+    browsers: Optional[Dict[str, Any]] = Field(None, description="Browser pool and standby-context status")
+    backoff: Optional[Dict[str, Any]] = Field(None, description="Hosts backing off after failed solves")
+    persistence: Optional[Dict[str, Any]] = Field(None, description="Cookie cache flush statistics")
+    capacity: Optional[Dict[str, Any]] = Field(None, description="Cookie cache size, limits and LRU evictions")
+    refresh: Optional[Dict[str, Any]] = Field(None, description="Refresh-ahead counters")
+    stale: Optional[Dict[str, Any]] = Field(None, description="Stale-while-revalidate counters")
+    ttl: Optional[Dict[str, Any]] = Field(None, description="Cookie TTL derivation and learned caps")
 
 
 class CacheClearResponse(BaseModel):
@@ -40,6 +47,12 @@ class CacheClearResponse(BaseModel):
     message: str = Field(..., description="Operation message")
 
 
+class CacheImportResponse(BaseModel):
+    imported: int = Field(..., description="Entries added or replaced")
+    skipped: int = Field(..., description="Entries that were expired or older than the cached ones")
+    malformed: int = Field(..., description="Lines that could not be parsed")
+
+
 class ErrorResponse(BaseModel):
     detail: str = Field(..., description="Error message")
     error_code: Optional[str] = Field(None, description="Error code")
@@ -1,3 +1,4 @@
+import hmac
 import logging
 import time
 from contextlib import asynccontextmanager
@@ -5,13 +6,17 @@ from typing import Optional, AsyncGenerator
 from urllib.parse import urlparse
 
 from fastapi import FastAPI, HTTPException, Request, Response, Query, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from cf_bypasser.cache.snapshot import dump_lines, parse_lines, pull_snapshot
 from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.errors import BypassError
 from cf_bypasser.core.mirror import RequestMirror
 from cf_bypasser.server.models import (
-    CookieResponse, CacheStatsResponse, CacheClearResponse, ErrorResponse,
+    CookieResponse, CacheStatsResponse, CacheClearResponse, CacheImportResponse, ErrorResponse,
 )
-from cf_bypasser.utils.constants import APP_VERSION, PROXY_SCHEMES, CF_COOKIE_PREFIXES
+from cf_bypasser.utils.constants import APP_VERSION, PROXY_SCHEMES, CF_COOKIE_PREFIXES, ADMIN_TOKEN, WARM_START_PEER
+from cf_bypasser.utils.misc import proxy_id
 from cf_bypasser.utils.security import is_safe_url
 
 global_bypasser = None
@@ -29,6 +34,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     global_bypasser = CloakBypasser(max_retries=5, log=True)
     global_mirror = RequestMirror(global_bypasser)
+    if WARM_START_PEER:
+        await pull_snapshot(global_bypasser.cookie_cache, WARM_START_PEER, token=ADMIN_TOKEN or None)
+    await global_bypasser.start()
 
     logger.info("Server initialization complete")
 
@@ -45,6 +53,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
+    # final write-behind flush, even if browser cleanup above failed
+    if global_bypasser:
+        try:
+            global_bypasser.cookie_cache.close()
+        except Exception as e:
+            logger.error(f"Error flushing cookie cache: {e}")
+
     logger.info("Server shutdown complete")
 
 
@@ -84,12 +99,35 @@ def _validate_request(request: Request, url: Optional[str], proxy: Optional[str]
     return False
 
 
+def _require_admin(request: Request) -> None:
+    """Reject the request unless it carries the CF_ADMIN_TOKEN bearer token; 404 when none is configured."""
+    if not ADMIN_TOKEN:
+        # fail closed: without a token these routes don't exist
+        raise HTTPException(status_code=404, detail="Not found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Admin token required",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+def _format_timings(timings: dict) -> str:
+    """Server-Timing style breakdown, e.g. "queue;dur=0, launch;dur=812, solve;dur=2400"."""
+    return ", ".join(f"{stage};dur={ms}" for stage, ms in timings.items())
+
+
 def setup_routes(app: FastAPI):
     """Setup all routes for the FastAPI application."""
 
-    @app.get("/cookies", response_model=CookieResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+    @app.exception_handler(BypassError)
+    async def bypass_error_handler(request: Request, exc: BypassError):
+        """Surface classified bypass failures with their own status and error_code."""
+        return JSONResponse(status_code=exc.status_code, headers=exc.headers,
+                            content={"detail": exc.detail, "error_code": exc.error_code})
+
+    @app.get("/cookies", response_model=CookieResponse, responses={400: {"model": ErrorResponse}, 403: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
     async def get_cookies(
         request: Request,
+        response: Response,
         url: Optional[str] = Query(None, description="Target URL to get cookies for"),
         retries: int = Query(5, ge=1, le=10, description="Number of retry attempts"),
         proxy: Optional[str] = Query(None, description="Proxy URL (optional)"),
@@ -114,18 +152,24 @@ def setup_routes(app: FastAPI):
             logger.info(f"Successfully generated {len(data['cookies'])} cookies in {generation_time}ms")
             logger.info(f"Cloudflare cookies: {cf_cookies}")
 
+            response.headers["x-processing-time-ms"] = str(generation_time)
+            if data.get("timings"):
+                response.headers["x-cf-bypasser-timings"] = _format_timings(data["timings"])
+            if data.get("stale"):
+                response.headers["x-cf-bypasser-stale"] = "true"
+
             return CookieResponse(
                 cookies=data["cookies"],
                 user_agent=data["user_agent"]
             )
 
-        except HTTPException:
+        except (HTTPException, BypassError):
             raise
         except Exception as e:
             logger.error(f"Error getting cookies for {url}: {e}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
-    @app.get("/html", responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+    @app.get("/html", responses={400: {"model": ErrorResponse}, 403: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
     async def get_html(
         request: Request,
         url: Optional[str] = Query(None, description="Target URL to get HTML content for"),
@@ -154,23 +198,32 @@ def setup_routes(app: FastAPI):
             logger.info(f"Successfully generated HTML content ({content_length} chars) and {len(data['cookies'])} cookies in {generation_time}ms")
             logger.info(f"Cloudflare cookies: {cf_cookies}")
 
+            headers = {
+                "x-cf-bypasser-cookies": str(len(data["cookies"])),
+                "x-cf-bypasser-user-agent": data["user_agent"],
+                "x-cf-bypasser-final-url": data["url"],
+                "x-processing-time-ms": str(generation_time)
+            }
+            if data.get("timings"):
+                headers["x-cf-bypasser-timings"] = _format_timings(data["timings"])
+
             return Response(
                 content=data["html"],
                 media_type="text/html",
-                headers={
-                    "x-cf-bypasser-cookies": str(len(data["cookies"])),
-                    "x-cf-bypasser-user-agent": data["user_agent"],
-                    "x-cf-bypasser-final-url": data["url"],
-                    "x-processing-time-ms": str(generation_time)
-                }
+                headers=headers
             )
 
-        except HTTPException:
+        except (HTTPException, BypassError):
             raise
         except Exception as e:
             logger.error(f"Error getting HTML content for {url}: {e}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    @app.get("/cache/health")
+    async def health():
+        """Liveness check for load balancers and the gateway; touches neither the cache nor browsers."""
+        return {"status": "ok"}
+
     @app.post("/cache/clear", response_model=CacheClearResponse, responses={500: {"model": ErrorResponse}})
     async def clear_cache(
         bypasser: CloakBypasser = Depends(get_bypasser),
@@ -183,11 +236,15 @@ def setup_routes(app: FastAPI):
             if bypasser:
                 cache = bypasser.cookie_cache.cache
                 cleared_entries = len(cache)
-                bypasser.cookie_cache.clear_all()
+                await bypasser.cookie_cache.run(bypasser.cookie_cache.clear_all)
                 logger.info(f"Cleared {cleared_entries} cache entries")
+                backoffs = bypasser.negative_cache.clear_all()
+                if backoffs:
+                    logger.info(f"Cleared {backoffs} host backoff entries")
 
             if mirror:
-                await mirror.cleanup()
+                # sessions only: the bypasser's pool/standby contexts keep running
+                await mirror.close_sessions()
                 logger.info("Cleaned up mirror sessions")
 
             return CacheClearResponse(
@@ -198,6 +255,34 @@ def setup_routes(app: FastAPI):
             logger.error(f"Error clearing cache: {e}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    @app.get("/cache/export", responses={401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}})
+    async def export_cache(
+        request: Request,
+        host: Optional[str] = Query(None, description="Only entries for this hostname"),
+        proxy: Optional[str] = Query(None, description="Only entries solved through this proxy URL"),
+        bypasser: CloakBypasser = Depends(get_bypasser),
+    ):
+        """Stream unexpired cache entries as NDJSON, one entry per line."""
+        _require_admin(request)
+        entries = bypasser.cookie_cache.snapshot(hostname=host, proxy_id=proxy_id(proxy) if proxy else None)
+        logger.info(f"Exporting {len(entries)} cache entries")
+        return StreamingResponse(dump_lines(entries), media_type="application/x-ndjson",
+                                 headers={"x-cache-entries": str(len(entries))})
+
+    @app.post("/cache/import", response_model=CacheImportResponse,
+              responses={401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+    async def import_cache(request: Request, bypasser: CloakBypasser = Depends(get_bypasser)):
+        """Merge an NDJSON snapshot (as produced by /cache/export) in one batched write."""
+        _require_admin(request)
+        body = await request.body()
+        entries, malformed = parse_lines(body.splitlines())
+        try:
+            imported = await bypasser.cookie_cache.run(bypasser.cookie_cache.import_entries, entries)
+        except Exception as e:
+            logger.error(f"Error importing cache snapshot: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+        return CacheImportResponse(imported=imported, skipped=len(entries) - imported, malformed=malformed)
+
     @app.get("/cache/stats", response_model=CacheStatsResponse, responses={500: {"model": ErrorResponse}})
     async def cache_stats(bypasser: CloakBypasser = Depends(get_bypasser)):
         """Get detailed cache statistics including active entries and hostnames."""
@@ -209,16 +294,24 @@ def setup_routes(app: FastAPI):
                     hostnames=[]
                 )
 
+            # sweeping is amortized O(log n) per expired entry, so stats never scan the cache
+            expired_entries = bypasser.cookie_cache.clear_expired()
             cache = bypasser.cookie_cache.cache
-            active_entries = sum(1 for cached in cache.values() if not cached.is_expired())
-            expired_entries = len(cache) - active_entries
+            active_entries = len(cache)
 
-            logger.info(f"Cache stats: {active_entries} active, {expired_entries} expired, {len(cache)} total")
+            logger.info(f"Cache stats: {active_entries} active, {expired_entries} expired entries swept")
 
             return CacheStatsResponse(
                 cached_entries=active_entries,
                 total_hostnames=len(cache),
-                hostnames=list(cache.keys())
+                hostnames=list(cache.keys()),
+                browsers=bypasser.browser_stats(),
+                backoff=bypasser.negative_cache.stats(),
+                persistence=bypasser.cookie_cache.persistence_stats(),
+                capacity=bypasser.cookie_cache.capacity_stats(),
+                refresh=bypasser.refresher.stats() if bypasser.refresher is not None else None,
+                stale=bypasser.stale_stats(),
+                ttl=bypasser.ttl_policy.stats(),
             )
         except Exception as e:
             logger.error(f"Error getting cache stats: {e}")
@@ -317,7 +410,7 @@ def setup_routes(app: FastAPI):
 
             return response
 
-        except HTTPException:
+        except (HTTPException, BypassError):
             raise
         except Exception as e:
             logger.error(f"Error mirroring request: {e}")
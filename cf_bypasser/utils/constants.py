@@ -1,32 +1,168 @@
 import os
 
 APP_VERSION = "2.0.0"
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
 DEFAULT_CACHE_FILE = "cf_cookie_cache.json"
 COOKIE_TTL_MINUTES = int(os.environ.get("CF_COOKIE_TTL_MINUTES", "29"))
+# Per-entry TTL from the cf_clearance (or __cf_bm) expiry Cloudflare set, minus a safety
+# margin, capped at COOKIE_TTL_MAX_MINUTES and never below 60s (cache/ttl.py); COOKIE_TTL_MINUTES
+# is the fallback for session cookies. COOKIE_TTL_LEARN shortens a host's TTL after early 403s.
+COOKIE_TTL_FROM_EXPIRY = _env_bool("CF_COOKIE_TTL_FROM_EXPIRY", True)
+COOKIE_TTL_MARGIN_SECONDS = float(os.environ.get("CF_COOKIE_TTL_MARGIN", "120"))
+COOKIE_TTL_MAX_MINUTES = float(os.environ.get("CF_COOKIE_TTL_MAX_MINUTES", "720"))
+COOKIE_TTL_LEARN = _env_bool("CF_COOKIE_TTL_LEARN", True)
+# Cookie cache persistence: "json" rewrites one file per change, "sqlite" does row-level
+# upserts in a WAL database (CF_CACHE_DB, default: the JSON path with a .db extension),
+# "memory" keeps nothing across restarts, and "redis" replicates entries across nodes.
+COOKIE_CACHE_BACKEND = os.environ.get("CF_CACHE_BACKEND", "json")
+SQLITE_CACHE_FILE = os.environ.get("CF_CACHE_DB", "")
+# Redis backend: any RESP server (Redis, Valkey, KeyDB) is the source of truth; each node
+# keeps a local L1 and re-checks an entry with the server once it is L1_TTL seconds old.
+REDIS_URL = os.environ.get("CF_REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.environ.get("CF_REDIS_PREFIX", "cfb:")
+REDIS_TIMEOUT_SECONDS = float(os.environ.get("CF_REDIS_TIMEOUT", "2"))
+# after a failed server call, skip the server (local L1 only) for this many seconds
+REDIS_COOLDOWN_SECONDS = float(os.environ.get("CF_REDIS_COOLDOWN", "5"))
+CACHE_L1_TTL_SECONDS = float(os.environ.get("CF_CACHE_L1_TTL", "5"))
+# Snapshot export/import (/cache/export, /cache/import). Both require "Authorization: Bearer
+# <ADMIN_TOKEN>" and are disabled (404) while ADMIN_TOKEN is empty. WARM_START_PEER: base URL of a node whose snapshot is
+# imported on startup, before this node accepts traffic.
+ADMIN_TOKEN = os.environ.get("CF_ADMIN_TOKEN", "")
+WARM_START_PEER = os.environ.get("CF_WARM_START_PEER", "")
+WARM_START_TIMEOUT_SECONDS = float(os.environ.get("CF_WARM_START_TIMEOUT", "15"))
+# Write-behind: cache changes are flushed by a background task every FLUSH_INTERVAL
+# seconds or after FLUSH_MAX_CHANGES changes, instead of on the request path.
+CACHE_WRITE_BEHIND = _env_bool("CF_CACHE_WRITE_BEHIND", True)
+CACHE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("CF_CACHE_FLUSH_INTERVAL", "2"))
+CACHE_FLUSH_MAX_CHANGES = int(os.environ.get("CF_CACHE_FLUSH_MAX_CHANGES", "100"))
+# Cookie cache capacity: least recently used entries are evicted past either limit
+# (0 = unlimited). Rotating proxies otherwise create a new key per exit for a full TTL.
+CACHE_MAX_ENTRIES = int(os.environ.get("CF_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(float(os.environ.get("CF_CACHE_MAX_MB", "64")) * 1024 * 1024)
+# Shared mode for multi-worker servers: every worker uses one SQLite cache (CF_CACHE_DB)
+# and a claims table so each key is solved by one worker while the others wait for it.
+# server.py turns it on for --workers > 1 unless CF_CACHE_SHARED is set explicitly or
+# CF_CACHE_BACKEND names a backend other than sqlite.
+CACHE_SHARED = _env_bool("CF_CACHE_SHARED", False)
+CLAIM_TTL_SECONDS = float(os.environ.get("CF_CLAIM_TTL", "120"))
+CLAIM_POLL_SECONDS = float(os.environ.get("CF_CLAIM_POLL", "0.25"))
+# Stale-while-revalidate: for this many seconds past expiry, /cookies and the mirror are
+# served the expired cookies (flagged stale) while one background solve replaces them.
+# 0 disables.
+STALE_GRACE_SECONDS = float(os.environ.get("CF_STALE_GRACE_SECONDS", "0"))
+# Refresh-ahead: a key whose current cookies served REFRESH_MIN_HITS cache hits is
+# re-solved in the background once it is in the last REFRESH_AHEAD_PCT% of its TTL, using
+# only idle browser slots. CF_REFRESH_AHEAD_PCT=0 disables.
+REFRESH_AHEAD_FRACTION = float(os.environ.get("CF_REFRESH_AHEAD_PCT", "20")) / 100
+REFRESH_MIN_HITS = int(os.environ.get("CF_REFRESH_MIN_HITS", "5"))
+REFRESH_CHECK_INTERVAL_SECONDS = float(os.environ.get("CF_REFRESH_CHECK_INTERVAL", "15"))
+# Upper bound between background expiry sweeps (the sweeper also wakes at the next expiry).
+CACHE_SWEEP_INTERVAL_SECONDS = float(os.environ.get("CF_CACHE_SWEEP_INTERVAL", "60"))
+# Solver processes: >0 runs browser solves in this many separate processes (spawned), so
+# the API event loop only serves cache lookups and mirror replays. 0 solves in-process.
+SOLVER_PROCESSES = int(os.environ.get("CF_SOLVER_PROCESSES", "0"))
 PROXY_SCHEMES = ("http://", "https://", "socks4://", "socks5://")
 
 # Optional exit-IP check: re-verify the proxy's exit IP on a cache hit and invalidate
 # if it rotated (residential proxies can change IP under us). Disabled by default.
-def _env_bool(name: str, default: bool = False) -> bool:
-    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
-
 IP_CHECK_ENABLED = _env_bool("CF_IP_CHECK_ENABLED", False)
 IP_CHECK_URL = os.environ.get("CF_IP_CHECK_URL", "https://api.ipify.org")
 IP_CHECK_TIMEOUT_SECONDS = int(os.environ.get("CF_IP_CHECK_TIMEOUT", "10"))
+# Exit IPs are remembered per proxy for this long, so cache hits don't each pay a lookup.
+IP_CHECK_CACHE_SECONDS = float(os.environ.get("CF_IP_CHECK_CACHE_SECONDS", "30"))
+# Background exit-IP monitor: poll every proxy with cached cookies this often and drop all
+# of a proxy's entries at once when its exit IP changes; cache hits then only compare in
+# memory. 0 disables (the lazy per-hit check above applies instead).
+IP_MONITOR_INTERVAL_SECONDS = float(os.environ.get("CF_IP_MONITOR_INTERVAL", "0"))
 CF_COOKIE_PREFIXES = ("cf_", "__cf")
 CF_PRIORITY_COOKIES = ("cf_clearance", "__cf_bm", "__cfruid")
 DEFAULT_TIMEOUT_MS = 30000
+# Upper bound on waiting for the challenge state after navigation; page events usually
+# decide it sooner. A loaded page with no challenge activity for CHALLENGE_QUIET_SECONDS
+# is treated as unprotected.
 CHALLENGE_SETTLE_SECONDS = 5
+CHALLENGE_QUIET_SECONDS = float(os.environ.get("CF_CHALLENGE_QUIET", "0.5"))
 
-# /html DOM-stability poll: sample page.content() until its size stops changing,
-# so JS-rendered pages return a deterministic snapshot instead of a mid-render one.
+# /html DOM stability: wait until the DOM and the page's requests have been idle for
+# HTML_SETTLE_IDLE_MS, so JS-rendered pages return a deterministic snapshot instead of a
+# mid-render one. Requests in flight for longer than LONG_REQUEST_MS (long-polls, SSE)
+# don't hold the wait. If it fails, fall back to sampling page.content() until its size
+# stops changing. STABLE_ROUNDS=0 or POLL=0 disables settling altogether.
+HTML_SETTLE_IDLE_MS = int(os.environ.get("CF_HTML_SETTLE_IDLE_MS", "500"))
 HTML_SETTLE_POLL_SECONDS = float(os.environ.get("CF_HTML_SETTLE_POLL", "0.5"))
 HTML_SETTLE_STABLE_ROUNDS = int(os.environ.get("CF_HTML_SETTLE_STABLE_ROUNDS", "2"))
 HTML_SETTLE_MAX_SECONDS = float(os.environ.get("CF_HTML_SETTLE_MAX", "10"))
+HTML_SETTLE_LONG_REQUEST_MS = int(os.environ.get("CF_HTML_SETTLE_LONG_REQUEST_MS", "2000"))
 RETRY_POLL_SECONDS = 3
+# Cookie-only solves return as soon as cf_clearance is issued instead of waiting for
+# the post-challenge page to load and re-checking it.
+COOKIE_EARLY_EXIT = _env_bool("CF_COOKIE_EARLY_EXIT", True)
+
+# Request blocking profile for browser solves: abort heavy resources and trackers that
+# the challenge doesn't need. Cloudflare's challenge host is always allowed.
+BLOCK_RESOURCES_COOKIES = _env_bool("CF_BLOCK_RESOURCES_COOKIES", True)
+BLOCK_RESOURCES_HTML = _env_bool("CF_BLOCK_RESOURCES_HTML", False)
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+ALWAYS_ALLOWED_HOSTS = ("challenges.cloudflare.com",)
+BLOCKED_THIRD_PARTY_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "newrelic.com",
+    "nr-data.net",
+    "sentry.io",
+    "intercom.io",
+    "tiktok.com",
+    "ads-twitter.com",
+    "bing.com",
+) + tuple(h.strip().lower() for h in os.environ.get("CF_BLOCK_HOSTS", "").split(",") if h.strip())
+
+# Negative cache: after a failed solve (block, rate limit, unsolved challenge, no
+# cf_clearance) the host+proxy key is refused for BACKOFF_BASE seconds, doubling per
+# consecutive failure up to BACKOFF_MAX. CF_BACKOFF_BASE=0 disables.
+BACKOFF_BASE_SECONDS = float(os.environ.get("CF_BACKOFF_BASE", "30"))
+BACKOFF_MAX_SECONDS = float(os.environ.get("CF_BACKOFF_MAX", "900"))
 CONTEXT_CLOSE_TIMEOUT_SECONDS = 30
 DEFAULT_MAX_RETRIES = 5
 MAX_CONCURRENT_BROWSERS = int(os.environ.get("CF_MAX_CONCURRENT_BROWSERS", "4"))
+
+# Pooled mode: keep long-lived browsers per (proxy, locale, user agent) and lease a
+# fresh isolated context per solve instead of cold-starting Chromium every time.
+BROWSER_POOL_ENABLED = _env_bool("CF_BROWSER_POOL_ENABLED", False)
+BROWSER_POOL_MAX_CONTEXTS = int(os.environ.get("CF_BROWSER_POOL_MAX_CONTEXTS", "50"))
+BROWSER_POOL_MAX_AGE_SECONDS = float(os.environ.get("CF_BROWSER_POOL_MAX_AGE", "1800"))
+
+# Spare, already-launched contexts kept ready per proxy (direct + CF_STANDBY_PROXIES)
+# so a solve after an idle period doesn't wait for a launch. 0 disables.
+STANDBY_CONTEXTS = int(os.environ.get("CF_STANDBY_CONTEXTS", "0"))
+STANDBY_PROXIES = [p.strip() for p in os.environ.get("CF_STANDBY_PROXIES", "").split(",") if p.strip()]
+STANDBY_RETRY_SECONDS = 5
+
+# Fingerprints pre-generated by one background thread so launches that take one don't
+# need the global browser-init lock. 0 disables (every launch serializes on the lock).
+FINGERPRINT_QUEUE_SIZE = int(os.environ.get("CF_FINGERPRINT_QUEUE_SIZE", "8"))
+
+# Gateway mode (server.py --gateway): route each request to one backend node by consistent
+# hash of its cache key, so a host's cookies, sessions and in-flight solves stay on one node.
+GATEWAY_BACKENDS = [b.strip().rstrip("/") for b in os.environ.get("CF_GATEWAY_BACKENDS", "").split(",") if b.strip()]
+GATEWAY_VNODES = int(os.environ.get("CF_GATEWAY_VNODES", "160"))
+GATEWAY_TIMEOUT_SECONDS = float(os.environ.get("CF_GATEWAY_TIMEOUT", "180"))
+GATEWAY_HEALTH_PATH = os.environ.get("CF_GATEWAY_HEALTH_PATH", "/cache/health")
+GATEWAY_HEALTH_INTERVAL_SECONDS = float(os.environ.get("CF_GATEWAY_HEALTH_INTERVAL", "5"))
+GATEWAY_HEALTH_FAILURES = int(os.environ.get("CF_GATEWAY_HEALTH_FAILURES", "2"))
 SESSION_TIMEOUT_SECONDS = 30
 MIRROR_MAX_RETRIES = 2
 MIRROR_RETRY_BACKOFF_SECONDS = 0.5
@@ -1,18 +1,98 @@
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Any, Dict, Optional, Tuple
 
 from curl_cffi.requests import AsyncSession
 
-from cf_bypasser.utils.constants import IP_CHECK_URL, IP_CHECK_TIMEOUT_SECONDS
+from cf_bypasser.utils.misc import per_loop
+from cf_bypasser.utils.constants import IP_CHECK_URL, IP_CHECK_TIMEOUT_SECONDS, IP_CHECK_CACHE_SECONDS
 
 
-async def get_exit_ip(proxy: Optional[str] = None) -> Optional[str]:
-    """Current exit IP (through proxy if given). Returns None on any failure."""
-    proxies = {"http": proxy, "https": proxy} if proxy else None
-    try:
-        async with AsyncSession() as session:
+class ExitIPCache:
+    """Exit IP per proxy, remembered for ttl_seconds and looked up through one pooled session.
+
+    Concurrent lookups for the same proxy share a single request. Failed lookups are not
+    cached, so the next caller tries again.
+    """
+
+    def __init__(self, ttl_seconds: float = IP_CHECK_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._ips: Dict[Optional[str], Tuple[str, float]] = {}  # proxy -> (ip, time.monotonic())
+        self._sessions: dict = {}
+        self._inflight: dict = {}
+        self.lookups = 0
+        self.hits = 0
+        self.shared = 0
+
+    async def get(self, proxy: Optional[str] = None, fresh: bool = False) -> Optional[str]:
+        """Exit IP for proxy; fresh=True skips the cached value (but still shares in-flight lookups)."""
+        cached = self._ips.get(proxy)
+        if not fresh and cached is not None and time.monotonic() - cached[1] < self.ttl_seconds:
+            self.hits += 1
+            return cached[0]
+
+        inflight = per_loop(self._inflight, dict)
+        task = inflight.get(proxy)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(proxy))
+            inflight[proxy] = task
+            task.add_done_callback(lambda _: inflight.pop(proxy, None))
+        else:
+            self.shared += 1
+        # shield: one cancelled caller must not cancel the lookup the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _lookup(self, proxy: Optional[str]) -> Optional[str]:
+        self.lookups += 1
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+        try:
+            session = per_loop(self._sessions, AsyncSession)
             resp = await session.get(IP_CHECK_URL, proxies=proxies, timeout=IP_CHECK_TIMEOUT_SECONDS)
-            return resp.text.strip() or None
-    except Exception as e:
-        logging.warning(f"Exit IP check failed: {e}")
-        return None
+            ip = resp.text.strip() or None
+        except Exception as e:
+            logging.warning(f"Exit IP check failed: {e}")
+            return None
+        if ip:
+            self._ips[proxy] = (ip, time.monotonic())
+        return ip
+
+    def forget(self, proxy: Optional[str] = None) -> None:
+        self._ips.pop(proxy, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_proxies": len(self._ips),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "shared": self.shared,
+        }
+
+    async def close(self) -> None:
+        """Close the current loop's session; a later lookup opens a new one."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            try:
+                await session.close()
+            except Exception as e:
+                logging.warning(f"Error closing exit IP session: {e}")
+
+
+_exit_ips = ExitIPCache()
+
+
+async def get_exit_ip(proxy: Optional[str] = None, fresh: bool = False) -> Optional[str]:
+    """Current exit IP (through proxy if given), cached briefly. Returns None on any failure."""
+    return await _exit_ips.get(proxy, fresh=fresh)
+
+
+def exit_ip_stats() -> Dict[str, Any]:
+    return _exit_ips.stats()
+
+
+async def close_ip_session() -> None:
+    await _exit_ips.close()
@@ -14,6 +14,11 @@ def cache_key(hostname: str, proxy: Optional[str] = None) -> str:
     return md5_hash(f"{hostname}\x00{proxy or ''}")
 
 
+def proxy_id(proxy: Optional[str] = None) -> str:
+    """Opaque id for a proxy (credentials never stored), shared by all its cache entries."""
+    return md5_hash(proxy or "")[:16]
+
+
 def per_loop(registry: dict, factory):
     """Return one cached value per running event loop, creating it on first use."""
     try:
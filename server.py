@@ -2,6 +2,7 @@
 
 import argparse
 import logging
+import os
 import uvicorn
 
 
@@ -12,6 +13,10 @@ def main():
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
     parser.add_argument("--log-level", type=str, default="info", help="Log level")
+    parser.add_argument("--gateway", action="store_true",
+                        help="Run as a routing gateway in front of backend nodes instead of a bypasser")
+    parser.add_argument("--backends", type=str, default=None,
+                        help="Comma-separated backend base URLs for --gateway (default: CF_GATEWAY_BACKENDS)")
     
     args = parser.parse_args()
     
@@ -20,7 +25,32 @@ def main():
     logger = logging.getLogger(__name__)
     logger.info(f"Starting server on {args.host}:{args.port}")
 
-    # factory import-string so >1 worker can fork; cookie cache is per-worker
+    if args.gateway:
+        if args.backends is not None:
+            # read by cf_bypasser.utils.constants in the (possibly forked) app process
+            os.environ["CF_GATEWAY_BACKENDS"] = args.backends
+        uvicorn.run(
+            "cf_bypasser.server.gateway:create_gateway_app",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=args.log_level
+        )
+        return
+
+    if args.workers > 1 and "CF_CACHE_SHARED" not in os.environ:
+        backend = os.environ.get("CF_CACHE_BACKEND", "").lower()
+        if backend in ("", "sqlite"):
+            # workers inherit the environment: one shared SQLite cache with cross-worker claims
+            os.environ["CF_CACHE_SHARED"] = "true"
+            logger.info(f"Sharing the cookie cache across {args.workers} workers")
+        elif backend != "redis":
+            # an explicit backend choice wins; redis is shared across processes anyway
+            logger.warning(f"CF_CACHE_BACKEND={backend}: each of the {args.workers} workers keeps its own "
+                           "cookie cache; set CF_CACHE_SHARED=true to share one SQLite cache")
+
+    # factory import-string so >1 worker can fork; CF_CACHE_SHARED makes them share the cookie cache
     uvicorn.run(
         "cf_bypasser.server.app:create_app",
         factory=True,
@@ -4,6 +4,7 @@ import pytest
 
 import cf_bypasser.core.bypasser as bp
 from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.detection import JS_CHALLENGE
 from cf_bypasser.utils.misc import cache_key
 
 _real_sleep = asyncio.sleep
@@ -11,10 +12,13 @@ _real_sleep = asyncio.sleep
 
 @pytest.fixture(autouse=True)
 def _fast_sleep(monkeypatch):
-    # solve_cloudflare_challenge sleeps 5s+; collapse real-time waits, keep tiny ones
+    # solve_cloudflare_challenge waits 5s+; collapse real-time waits, keep tiny ones
     async def quick(delay, *a, **k):
         await _real_sleep(min(delay, 0.05))
     monkeypatch.setattr(bp.asyncio, "sleep", quick)
+    monkeypatch.setattr(bp, "CHALLENGE_SETTLE_SECONDS", 0.05)
+    monkeypatch.setattr(bp, "CHALLENGE_QUIET_SECONDS", 0.01)
+    monkeypatch.setattr(bp, "RETRY_POLL_SECONDS", 0.05)
 
 
 CLEAR_HTML = "<html><body>cloudflare challenged passed. You are now a free bot.</body></html>"
@@ -41,6 +45,7 @@ class FakePage:
         self.default_timeout = None
         self.nav_timeout = None
         self.mouse = self
+        self.listeners = {}
 
     def set_default_timeout(self, ms):
         self.default_timeout = ms
@@ -51,6 +56,15 @@ class FakePage:
     async def goto(self, url, **kwargs):
         return FakeResponse(self._status)
 
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.get(event, []).remove(handler)
+
+    async def wait_for_load_state(self, state="load", **kwargs):
+        return None
+
     async def title(self):
         return self._title
 
@@ -59,7 +73,17 @@ class FakePage:
             raise RuntimeError("content read failed")
         return self._html
 
-    async def evaluate(self, script):
+    async def evaluate(self, script, arg=None):
+        if script is bp._PROBE_JS:
+            # mirror the in-page probe over this fake page's title/html
+            if self._content_raises:
+                raise RuntimeError("evaluate failed")
+            text = f"{self._title} {self._html}".lower()
+            blocked = next((m for m in arg if m in text), None)
+            return {"title": self._title, "blocked": blocked is not None, "marker": blocked,
+                    "rateLimited": "error 1015" in text or "you are being rate limited" in text,
+                    "captcha": "please complete the captcha" in text,
+                    "challengeFrame": False, "cookieNames": []}
         return self._ua
 
     async def click(self, *a, **k):
@@ -72,6 +96,10 @@ class FakeContext:
         self._cookies = cookies or []
         self.closed = False
         self.added = []
+        self.routes = []
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
 
     async def cookies(self):
         return self._cookies
@@ -312,3 +340,223 @@ async def test_ip_check_keeps_cache_when_ip_stable(tmp_path, monkeypatch):
     assert await b.get_or_generate_cookies("https://site.com") is not None
     assert await b.get_or_generate_cookies("https://site.com") is not None
     assert launches["n"] == 1  # cache reused
+
+
+@pytest.mark.asyncio
+async def test_is_bypassed_uses_probe_not_full_content(tmp_path):
+    b = make_bypasser(tmp_path)
+
+    class CountingPage(FakePage):
+        content_calls = 0
+
+        async def content(self):
+            CountingPage.content_calls += 1
+            return await super().content()
+
+    page = CountingPage(html=CLEAR_HTML, title="ok")
+    assert await b.is_bypassed(page) is True
+    assert CountingPage.content_calls == 0
+    assert await b.is_bypassed(FakePage(html=CLEAR_HTML, title="Just a moment...")) is False
+
+
+@pytest.mark.asyncio
+async def test_resource_blocking_profile_per_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(bp, "BLOCK_RESOURCES_COOKIES", True)
+    monkeypatch.setattr(bp, "BLOCK_RESOURCES_HTML", False)
+    b = make_bypasser(tmp_path)
+    contexts = []
+
+    async def fake_launch(**kwargs):
+        page = FakePage(html=NON_CF_HTML, title="home")
+        ctx = FakeContext(page, cookies=[{"name": "s", "value": "1"}])
+        contexts.append(ctx)
+        return ctx
+
+    monkeypatch.setattr(bp.cb, "launch_context_async", fake_launch)
+    await b.get_or_generate_cookies("https://blocked.com")
+    await b.get_or_generate_html("https://notblocked.com")
+    assert contexts[0].routes == ["**/*"]
+    assert contexts[1].routes == []
+
+
+class _ClearanceResponse:
+    class request:
+        resource_type = "fetch"
+
+    headers = {}
+    url = "https://x.com/cdn-cgi/challenge-platform/h/g/flow"
+
+    async def header_value(self, name):
+        return "cf_clearance=tok; path=/; HttpOnly" if name == "set-cookie" else None
+
+
+class ClearanceIssuingPage(FakePage):
+    """Challenge page that stays on "Just a moment" but issues cf_clearance on navigation."""
+    def __init__(self):
+        super().__init__(html=CHALLENGE_HTML, title="Just a moment...")
+        self.goto_wait_until = None
+        self.stopped = False
+
+    async def goto(self, url, **kwargs):
+        self.goto_wait_until = kwargs.get("wait_until")
+        for handler in self.listeners.get("response", []):
+            await handler(_ClearanceResponse())
+        return FakeResponse(403)
+
+    async def evaluate(self, script, arg=None):
+        if script == "window.stop()":
+            self.stopped = True
+            return None
+        return await super().evaluate(script, arg)
+
+
+@pytest.mark.asyncio
+async def test_cookie_solve_exits_as_soon_as_clearance_issued(tmp_path):
+    b = make_bypasser(tmp_path)
+    page = ClearanceIssuingPage()
+    success, cf_detected, status = await b.solve_cloudflare_challenge("https://x.com", page, stop_on_clearance=True)
+    assert (success, cf_detected, status) == (True, True, 403)
+    assert page.stopped
+    assert page.goto_wait_until == "commit"
+
+
+class CommittedChallengePage(FakePage):
+    """403 challenge whose cf-mitigated header arrives before the document is parsed."""
+    def __init__(self):
+        super().__init__(html="", title="")
+        self.load_states = []
+
+    async def goto(self, url, **kwargs):
+        response = FakeResponse(403)
+        response.headers = {"cf-mitigated": "challenge"}
+        return response
+
+    async def wait_for_load_state(self, state="load", **kwargs):
+        self.load_states.append(state)
+        if state == "domcontentloaded":
+            self._html, self._title = CHALLENGE_HTML, "Just a moment..."
+
+
+@pytest.mark.asyncio
+async def test_cookie_solve_classifies_the_parsed_document_not_the_committed_one(tmp_path):
+    b = make_bypasser(tmp_path)
+    page = CommittedChallengePage()
+    result = await b.solve_cloudflare_challenge("https://x.com", page, stop_on_clearance=True)
+    assert "domcontentloaded" in page.load_states
+    assert tuple(result) == (False, True, 403) and result.kind == JS_CHALLENGE
+
+
+@pytest.mark.asyncio
+async def test_without_early_exit_clearance_alone_is_not_enough(tmp_path):
+    b = make_bypasser(tmp_path)
+    page = ClearanceIssuingPage()
+    success, _, _ = await b.solve_cloudflare_challenge("https://x.com", page)
+    assert success is False
+    assert not page.stopped
+
+
+@pytest.mark.asyncio
+async def test_fresh_solve_reports_timing_breakdown(tmp_path, monkeypatch):
+    b = make_bypasser(tmp_path)
+    page = FakePage(html=NON_CF_HTML, title="home")
+    patch_launch(monkeypatch, FakeContext(page, cookies=[{"name": "s", "value": "1"}]))
+    result = await b.get_or_generate_cookies("https://timed.com")
+    assert set(result["timings"]) == {"queue", "launch", "solve", "extract", "total"}
+
+
+@pytest.mark.asyncio
+async def test_hard_block_fails_fast_without_retry_polls(tmp_path, monkeypatch):
+    b = make_bypasser(tmp_path)
+    b.max_retries = 50
+    monkeypatch.setattr(bp, "RETRY_POLL_SECONDS", 1.0)
+    page = FakePage(html=BLOCK_HTML, title="Attention Required! | Cloudflare", status=403)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await b.solve_cloudflare_challenge("https://x.com", page)
+    assert loop.time() - start < 0.5
+    assert result.success is False
+    assert result.kind == "blocked"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("html, status, error_code, http_status", [
+    (BLOCK_HTML, 403, "cf_blocked", 403),
+    ("<html>cloudflare error 1015 you are being rate limited</html>", 429, "cf_rate_limited", 429),
+])
+async def test_hard_failure_raises_classified_error(tmp_path, monkeypatch, html, status, error_code, http_status):
+    from cf_bypasser.core.errors import ChallengeBlockedError
+    b = make_bypasser(tmp_path)
+    page = FakePage(html=html, title="Cloudflare", status=status)
+    ctx = FakeContext(page)
+    patch_launch(monkeypatch, ctx)
+    with pytest.raises(ChallengeBlockedError) as exc:
+        await b.get_or_generate_cookies("https://blocked.com")
+    assert exc.value.error_code == error_code
+    assert exc.value.status_code == http_status
+    assert ctx.closed
+    assert b.cookie_cache.get(cache_key("blocked.com", None)) is None
+
+
+@pytest.mark.asyncio
+async def test_js_challenge_is_waited_out_not_clicked(tmp_path, monkeypatch):
+    b = make_bypasser(tmp_path)
+    page = FakePage(html=CHALLENGE_HTML, title="Just a moment...")
+    clicks = []
+
+    async def click(p):
+        clicks.append(p)
+        return False
+    monkeypatch.setattr(b, "_click_turnstile_checkbox", click)
+    result = await b.solve_cloudflare_challenge("https://x.com", page)
+    assert result.success is False
+    assert result.kind == "js_challenge"
+    assert clicks == []
+
+
+class _Frame:
+    url = "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/h/b/turnstile/if/ov2"
+
+
+@pytest.mark.asyncio
+async def test_turnstile_frame_hidden_from_the_dom_is_still_clicked(tmp_path, monkeypatch):
+    # the probe's querySelector can't see an iframe in a closed shadow root; page.frames can
+    b = make_bypasser(tmp_path)
+    page = FakePage(html=CHALLENGE_HTML, title="Just a moment...", frames=[_Frame()])
+    clicks = []
+
+    async def click(p):
+        clicks.append(p)
+        return False
+    monkeypatch.setattr(b, "_click_turnstile_checkbox", click)
+    assert await b.classify(page) == "managed"
+    result = await b.solve_cloudflare_challenge("https://x.com", page)
+    assert result.kind == "managed"
+    assert clicks
+
+
+class NavigatingChallengePage(FakePage):
+    """JS challenge that navigates its main frame on every probe and clears after `clears_after` seconds."""
+    def __init__(self, clears_after):
+        super().__init__(html=CHALLENGE_HTML, title="Just a moment...")
+        self.main_frame = object()
+        self.clears_at = asyncio.get_running_loop().time() + clears_after
+        self.probes = 0
+
+    async def evaluate(self, script, arg=None):
+        if script is bp._PROBE_JS:
+            self.probes += 1
+            await _real_sleep(0.005)
+            for handler in self.listeners.get("framenavigated", []):
+                handler(self.main_frame)
+            if asyncio.get_running_loop().time() >= self.clears_at:
+                self._html, self._title = NON_CF_HTML, "home"
+        return await super().evaluate(script, arg)
+
+
+@pytest.mark.asyncio
+async def test_navigations_do_not_use_up_the_challenge_budget(tmp_path):
+    b = make_bypasser(tmp_path)  # budget: max_retries (2) * RETRY_POLL_SECONDS (0.05)
+    page = NavigatingChallengePage(clears_after=0.07)
+    result = await b.solve_cloudflare_challenge("https://x.com", page)
+    assert result.success is True
+    assert page.probes > b.max_retries + 2
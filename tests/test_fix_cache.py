@@ -104,3 +104,20 @@ def test_sequential_saves_keep_file_valid(tmp_path):
             data = json.load(f)
         assert f"host{i}.com" in data
     assert len(json.load(open(path))) == 25
+
+
+def test_entries_are_compact_and_share_ua_and_names(tmp_path):
+    from cf_bypasser.cache.cookie_cache import CachedCookies
+    c = CookieCache(cache_file=_cache_path(tmp_path))
+    ua = "".join(["Mozilla/5.0 ", "Chrome/145"])  # built at runtime, not a shared literal
+    c.set("a", {"cf_clearance": "1", "__cf_bm": "x"}, ua)
+    c.set("b", {"cf_clearance": "2", "__cf_bm": "y"}, "".join(["Mozilla/5.0 ", "Chrome/145"]))
+    a, b = c.get("a"), c.get("b")
+    assert not hasattr(a, "__dict__")
+    assert a.user_agent is b.user_agent
+    assert a._names is b._names
+    assert b.cookies == {"cf_clearance": "2", "__cf_bm": "y"}
+    assert isinstance(a.expires, float) and abs(a.expires_at.timestamp() - a.expires) < 1e-5
+    restored = CachedCookies.from_dict(a.to_dict())
+    assert (restored.key, restored.cookies, restored.user_agent) == (a.key, a.cookies, a.user_agent)
+    assert abs(restored.expires - a.expires) < 1e-5
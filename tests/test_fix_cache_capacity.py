@@ -0,0 +1,57 @@
+import json
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+
+
+def _cache(tmp_path, **kwargs):
+    return CookieCache(str(tmp_path / "cache.json"), write_behind=False, **kwargs)
+
+
+def test_evicts_least_recently_used_past_max_entries(tmp_path):
+    c = _cache(tmp_path, max_entries=3, max_bytes=0)
+    for key in ("a", "b", "c"):
+        c.set(key, {"cf_clearance": key}, "UA")
+    assert c.get("a") is not None  # a becomes most recently used
+    c.set("d", {"cf_clearance": "d"}, "UA")
+    assert list(c.cache) == ["c", "a", "d"]
+    assert c.capacity_stats()["evictions"] == {"entries": 1, "bytes": 0}
+
+
+def test_memory_budget_evicts_by_size(tmp_path):
+    c = _cache(tmp_path, max_entries=0, max_bytes=5000)
+    for i in range(10):
+        c.set(f"h{i}", {"cf_clearance": "x" * 1000}, "UA")
+    stats = c.capacity_stats()
+    assert stats["approx_bytes"] <= 5000
+    assert stats["evictions"]["bytes"] == 10 - stats["entries"]
+    assert "h9" in c.cache
+
+
+def test_eviction_shares_the_inserting_write(tmp_path, monkeypatch):
+    c = _cache(tmp_path, max_entries=2, max_bytes=0)
+    c.set("a", {"k": "v"}, "UA")
+    c.set("b", {"k": "v"}, "UA")
+    batches = []
+    monkeypatch.setattr(c, "_write_changes", lambda u, d, clear: batches.append(([x.key for x in u], d)))
+    c.set("c", {"k": "v"}, "UA")
+    assert batches == [(["c"], ["a"])]
+
+
+def test_limits_applied_when_loading_oversized_file(tmp_path):
+    big = _cache(tmp_path, max_entries=0, max_bytes=0)
+    for i in range(5):
+        big.set(f"h{i}", {"k": "v"}, "UA")
+    small = _cache(tmp_path, max_entries=2, max_bytes=0)
+    assert list(small.cache) == ["h3", "h4"]
+    with open(tmp_path / "cache.json") as f:
+        assert sorted(json.load(f)) == ["h3", "h4"]
+
+
+def test_size_accounting_survives_removals(tmp_path):
+    c = _cache(tmp_path, max_entries=0, max_bytes=0)
+    c.set("a", {"k": "v"}, "UA")
+    c.set("a", {"k": "vv"}, "UA")
+    c.set("b", {"k": "v"}, "UA", ttl_minutes=-1)
+    c.invalidate("a")
+    c.clear_expired()
+    assert c.capacity_stats()["approx_bytes"] == 0
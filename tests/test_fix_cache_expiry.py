@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+
+
+def _cache(tmp_path):
+    return CookieCache(str(tmp_path / "cache.json"), write_behind=False)
+
+
+def test_clear_expired_only_pops_due_entries(tmp_path):
+    c = _cache(tmp_path)
+    c.set("old", {"k": "v"}, "UA", ttl_minutes=-1)
+    c.set("new", {"k": "v"}, "UA")
+    assert c.clear_expired() == 1
+    assert list(c.cache) == ["new"]
+    assert len(c._expiry_heap) == 1
+
+
+def test_reset_key_is_not_expired_by_stale_heap_item(tmp_path):
+    c = _cache(tmp_path)
+    c.set("h", {"k": "old"}, "UA", ttl_minutes=-1)
+    c.set("h", {"k": "new"}, "UA")
+    assert c.clear_expired() == 0
+    assert c.get("h").cookies == {"k": "new"}
+
+
+def test_invalidated_key_leaves_harmless_stale_item(tmp_path):
+    c = _cache(tmp_path)
+    c.set("h", {"k": "v"}, "UA", ttl_minutes=-1)
+    c.invalidate("h")
+    assert c.clear_expired() == 0
+    assert c._expiry_heap == []
+
+
+def test_heap_rebuilt_on_load(tmp_path):
+    c = _cache(tmp_path)
+    c.set("a", {"k": "v"}, "UA", ttl_minutes=-1)
+    c.set("b", {"k": "v"}, "UA")
+    reloaded = _cache(tmp_path)
+    assert reloaded.clear_expired() == 1
+    assert list(reloaded.cache) == ["b"]
+
+
+def test_heap_compacts_after_many_replacements(tmp_path):
+    c = _cache(tmp_path)
+    c._changed = lambda *a, **k: None  # skip disk writes
+    for _ in range(3000):
+        c.set("h", {"k": "v"}, "UA")
+    assert len(c._expiry_heap) <= 2 * len(c.cache) + 1024
+
+
+@pytest.mark.asyncio
+async def test_background_sweeper_removes_expired_entries(tmp_path):
+    c = _cache(tmp_path)
+    c.sweep_interval = 0.05
+    c.start()
+    c.set("soon", {"k": "v"}, "UA", ttl_minutes=0.001)  # 60 ms
+    await asyncio.sleep(0.3)
+    assert "soon" not in c.cache
+    await c.stop()
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+
+from cf_bypasser.core.detection import ChallengeWatcher, classify_page
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type="document"):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeResponse:
+    def __init__(self, url, headers=None, set_cookie=None, resource_type="document"):
+        self.url = url
+        self.headers = headers or {}
+        self._set_cookie = set_cookie
+        self.request = FakeRequest(url, resource_type)
+
+    async def header_value(self, name):
+        return self._set_cookie if name == "set-cookie" else self.headers.get(name)
+
+
+class EventPage:
+    """Minimal page that lets a test fire Playwright-style events."""
+    def __init__(self, load_delay=0.0):
+        self.listeners = {}
+        self.main_frame = object()
+        self._load_delay = load_delay
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    async def wait_for_load_state(self, state="load", **kwargs):
+        await asyncio.sleep(self._load_delay)
+
+    async def emit(self, event, arg):
+        for handler in list(self.listeners.get(event, [])):
+            result = handler(arg)
+            if asyncio.iscoroutine(result):
+                await result
+
+
+async def test_unprotected_page_settles_after_quiet_window():
+    page = EventPage(load_delay=0.01)
+    watcher = ChallengeWatcher(page).attach()
+    start = time.monotonic()
+    await watcher.settle(timeout=5, quiet=0.05)
+    assert time.monotonic() - start < 1
+    assert not watcher.decided
+
+
+async def test_challenge_script_request_ends_settle_early():
+    page = EventPage(load_delay=10)
+    watcher = ChallengeWatcher(page).attach()
+
+    async def fire():
+        await asyncio.sleep(0.02)
+        await page.emit("request", FakeRequest("https://x.com/cdn-cgi/challenge-platform/h/g/orchestrate/jsch/v1"))
+
+    start = time.monotonic()
+    await asyncio.gather(watcher.settle(timeout=5, quiet=0.5), fire())
+    assert time.monotonic() - start < 1
+    assert watcher.challenge_seen
+
+
+async def test_cf_mitigated_header_marks_challenge():
+    watcher = ChallengeWatcher(EventPage())
+    watcher.observe_response(FakeResponse("https://x.com", headers={"cf-mitigated": "challenge"}))
+    assert watcher.challenge_seen
+
+
+async def test_clearance_set_cookie_detected():
+    page = EventPage()
+    watcher = ChallengeWatcher(page).attach()
+    await page.emit("response", FakeResponse(
+        "https://x.com/cdn-cgi/challenge-platform/h/g/flow", resource_type="fetch",
+        set_cookie="cf_clearance=abc; path=/; HttpOnly"))
+    assert watcher.clearance_seen
+
+
+@pytest.mark.parametrize("url, set_cookie, expected", [
+    ("https://www.x.com/cdn-cgi/flow", "cf_clearance=abc; Domain=.x.com; path=/", True),
+    ("https://www.x.com/cdn-cgi/flow", "cf_clearance=abc; path=/", True),
+    ("https://www.x.com/cdn-cgi/flow", "cf_clearance=abc; Domain=other.com", False),
+    ("https://other.com/cdn-cgi/flow", "cf_clearance=abc; path=/", False),
+    ("https://www.x.com/cdn-cgi/flow", "__cf_bm=1; path=/\ncf_clearance=abc; Domain=x.com", True),
+    ("https://www.x.com/cdn-cgi/flow", "not_cf_clearance=abc; path=/", False),
+])
+async def test_clearance_must_be_scoped_to_the_target_host(url, set_cookie, expected):
+    page = EventPage()
+    watcher = ChallengeWatcher(page, target_host="www.x.com").attach()
+    await page.emit("response", FakeResponse(url, resource_type="fetch", set_cookie=set_cookie))
+    assert watcher.clearance_seen is expected
+
+
+async def test_subresource_set_cookie_ignored():
+    page = EventPage()
+    watcher = ChallengeWatcher(page).attach()
+    await page.emit("response", FakeResponse("https://x.com/a.png", resource_type="image",
+                                             set_cookie="cf_clearance=abc"))
+    assert not watcher.clearance_seen
+
+
+async def test_wait_for_change_wakes_on_main_frame_navigation():
+    page = EventPage()
+    watcher = ChallengeWatcher(page).attach()
+
+    async def navigate():
+        await asyncio.sleep(0.02)
+        await page.emit("framenavigated", page.main_frame)
+
+    start = time.monotonic()
+    fired, _ = await asyncio.gather(watcher.wait_for_change(5), navigate())
+    assert fired is True
+    assert time.monotonic() - start < 1
+
+
+async def test_wait_for_change_times_out():
+    watcher = ChallengeWatcher(EventPage()).attach()
+    assert await watcher.wait_for_change(0.02) is False
+
+
+async def test_detach_removes_listeners():
+    page = EventPage()
+    watcher = ChallengeWatcher(page).attach()
+    watcher.detach()
+    assert all(not handlers for handlers in page.listeners.values())
+
+
+@pytest.mark.parametrize("probe, status, expected", [
+    ({"title": "Home"}, 200, "unprotected"),
+    ({"title": "Just a moment..."}, 403, "js_challenge"),
+    ({"title": "Just a moment...", "challengeFrame": True}, 403, "managed"),
+    ({"title": "Attention Required!", "blocked": True}, 403, "blocked"),
+    ({"title": "Just a moment...", "blocked": True}, 403, "js_challenge"),
+    ({"title": "Access denied", "rateLimited": True}, 429, "rate_limited"),
+    ({"title": "Too Many Requests"}, 429, "rate_limited"),
+])
+def test_classify_page(probe, status, expected):
+    assert classify_page(probe, status) == expected
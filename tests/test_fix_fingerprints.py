@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import cf_bypasser.core.bypasser as bp
+import cf_bypasser.core.fingerprints as fp_mod
+from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.fingerprints import FingerprintFactory, generate_fingerprint_args
+
+
+def _wait_ready(factory, n, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while factory.stats()["ready"] < n and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_generated_args_are_the_full_stealth_set():
+    # launched with stealth_args=False, so they must include everything cloakbrowser would add
+    args = generate_fingerprint_args()
+    assert "--no-sandbox" in args
+    assert any(a.startswith("--fingerprint=") for a in args)
+    assert any(a.startswith("--fingerprint-platform=") for a in args)
+
+
+def test_generation_runs_on_one_dedicated_thread():
+    threads = set()
+
+    def gen():
+        threads.add(threading.current_thread().name)
+        return ["--fingerprint=1"]
+
+    factory = FingerprintFactory(size=3, generator=gen)
+    factory.start()
+    _wait_ready(factory, 3)
+    assert factory.take() == ["--fingerprint=1"]
+    factory.stop()
+    assert threads == {"cf-fingerprint-factory"}
+
+
+def test_queue_is_bounded():
+    factory = FingerprintFactory(size=2, generator=lambda: ["--fingerprint=1"])
+    factory.start()
+    _wait_ready(factory, 2)
+    time.sleep(0.05)
+    assert factory.stats()["ready"] == 2
+    factory.stop()
+
+
+def test_disabled_factory_returns_none():
+    factory = FingerprintFactory(size=0)
+    assert factory.take() is None
+    assert factory._thread is None
+
+
+class FakePage:
+    def set_default_timeout(self, ms):
+        pass
+
+    def set_default_navigation_timeout(self, ms):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = [FakePage()]
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.parametrize("queue_size, expect_parallel", [(8, True), (0, False)])
+async def test_launches_with_fingerprint_skip_global_lock(tmp_path, monkeypatch, queue_size, expect_parallel):
+    factory = FingerprintFactory(size=queue_size, generator=lambda: ["--fingerprint=12345"])
+    monkeypatch.setattr(fp_mod, "_factory", factory)
+    factory.start()
+    _wait_ready(factory, 4)
+
+    live = 0
+    peak = 0
+    seen_args = []
+    stealth = []
+
+    async def fake_launch(**kwargs):
+        nonlocal live, peak
+        seen_args.append(kwargs["args"])
+        stealth.append(kwargs.get("stealth_args", True))
+        live += 1
+        peak = max(peak, live)
+        await asyncio.sleep(0.05)
+        live -= 1
+        return FakeContext()
+
+    monkeypatch.setattr(bp.cb, "launch_context_async", fake_launch)
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"))
+    await asyncio.gather(*(b.setup_browser() for _ in range(4)))
+    factory.stop()
+
+    if expect_parallel:
+        assert peak == 4
+        assert all("--fingerprint=12345" in args for args in seen_args)
+        assert stealth == [False] * 4
+    else:
+        assert peak == 1
+        assert stealth == [True] * 4
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from cf_bypasser.server.gateway import Gateway, HashRing, create_gateway_app
+from cf_bypasser.utils.misc import cache_key
+
+KEYS = [cache_key(f"host{i}.example", None) for i in range(3000)]
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(["a", "b", "c"])
+    before = {k: ring.lookup(k) for k in KEYS}
+    ring.add("d")
+    moved = [k for k in KEYS if ring.lookup(k) != before[k]]
+    assert all(ring.lookup(k) == "d" for k in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = {k: ring.lookup(k) for k in KEYS}
+    ring.remove("b")
+    for k in KEYS:
+        if before[k] != "b":
+            assert ring.lookup(k) == before[k]
+        assert ring.lookup(k) != "b"
+    # skipping a node routes exactly as if it had been removed
+    full = HashRing(["a", "b", "c", "d"])
+    assert all(full.lookup(k, skip={"b"}) == ring.lookup(k) for k in KEYS)
+    assert full.lookup(KEYS[0], skip={"a", "b", "c", "d"}) is None
+
+
+class _NodeHandler(BaseHTTPRequestHandler):
+    def _reply(self):
+        self.server.received.append((self.path, self.rfile.read(int(self.headers.get("Content-Length") or 0))))
+        body = f"{self.server.name} {self.command} {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def nodes():
+    servers = []
+    for name in ("n1", "n2"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _NodeHandler)
+        server.name = name
+        server.received = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield {f"http://127.0.0.1:{s.server_address[1]}": s for s in servers}
+    for s in servers:
+        s.shutdown()
+        s.server_close()
+
+
+def test_requests_for_a_host_land_on_one_node(nodes):
+    gateway = Gateway(list(nodes), health_interval=0)
+    with TestClient(create_gateway_app(gateway)) as client:
+        via_cookies = client.get("/cookies", params={"url": "https://example.com/a"})
+        via_mirror = client.post("/api/x?y=1", headers={"x-hostname": "example.com"}, content=b"{}")
+        assert via_cookies.status_code == via_mirror.status_code == 200
+        node = via_cookies.headers["x-cf-bypasser-node"]
+        assert via_mirror.headers["x-cf-bypasser-node"] == node
+        assert node == gateway.node_for(cache_key("example.com", None))
+        assert via_mirror.text.endswith("POST /api/x?y=1")
+
+        stats = client.get("/gateway/stats").json()
+        assert stats["nodes"][node]["forwarded"] == 2
+
+
+def test_unhealthy_node_is_skipped(nodes):
+    gateway = Gateway(list(nodes), health_interval=0, fail_threshold=1, timeout=2)
+    host = next(h for h in (f"h{i}.example" for i in range(100))
+                if gateway.node_for(cache_key(h, None)) == list(nodes)[0])
+    down, up = list(nodes)
+    with TestClient(create_gateway_app(gateway)) as client:
+        nodes[down].shutdown()
+        nodes[down].server_close()
+        client.portal.call(gateway.check_all)
+        assert down in gateway.unhealthy
+
+        resp = client.get("/cookies", params={"url": f"https://{host}/"})
+        assert resp.headers["x-cf-bypasser-node"] == up
+        assert client.get("/gateway/stats").json()["nodes"][down]["healthy"] is False
+
+
+def test_admin_routes_reach_every_node(nodes):
+    gateway = Gateway(list(nodes), health_interval=0)
+    with TestClient(create_gateway_app(gateway)) as client:
+        stats = client.get("/cache/stats")
+        assert stats.status_code == 200
+        assert stats.json()["nodes"] == {url: {"detail": f"{s.name} GET /cache/stats"} for url, s in nodes.items()}
+        assert client.post("/cache/clear").status_code == 200
+        assert all(("/cache/clear", b"") in s.received for s in nodes.values())
+        export = client.get("/cache/export").text
+        assert all(f"{s.name} GET /cache/export" in export for s in nodes.values())
+
+        hosts = [f"h{i}.example" for i in range(20)]
+        snapshot = b"".join(json.dumps({"key": cache_key(h, None)}).encode() + b"\n" for h in hosts)
+        assert client.post("/cache/import", content=snapshot).status_code == 200
+        for url, server in nodes.items():
+            (body,) = [body for path, body in server.received if path == "/cache/import"]
+            owned = {json.loads(line)["key"] for line in body.splitlines()}
+            assert owned == {cache_key(h, None) for h in hosts if gateway.node_for(cache_key(h, None)) == url}
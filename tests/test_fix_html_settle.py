@@ -72,3 +72,70 @@ async def test_disabled_when_rounds_zero(tmp_path, monkeypatch):
     html = await make_bypasser(tmp_path)._stable_html(page)
     assert len(html) == 10      # returns the first read, no polling
     assert page.calls == 1
+
+
+class QuiescentPage(FakePage):
+    """Supports the in-page quiescence wait and request events; records what it was asked to do."""
+    def __init__(self, sizes, evaluate_raises=False):
+        super().__init__(sizes)
+        self.evaluate_args = None
+        self.evaluations = 0
+        self.listeners = {}
+        self._evaluate_raises = evaluate_raises
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    def emit(self, event, request):
+        for handler in list(self.listeners.get(event, ())):
+            handler(request)
+
+    async def evaluate(self, script, arg=None):
+        if self._evaluate_raises:
+            raise RuntimeError("Execution context was destroyed")
+        assert "fetch" not in script and "XMLHttpRequest" not in script  # page globals untouched
+        self.evaluate_args = arg
+        self.evaluations += 1
+        await asyncio.sleep(arg["idleMs"] / 1000)
+        return {"quiet": True, "waitedMs": arg["idleMs"]}
+
+
+async def test_quiescence_serializes_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(bypasser_mod, "HTML_SETTLE_IDLE_MS", 250)
+    page = QuiescentPage([10, 20, 30])
+    html = await make_bypasser(tmp_path)._stable_html(page)
+    assert len(html) == 10
+    assert page.calls == 1  # no repeated full serialization
+    assert page.evaluate_args["idleMs"] == 250 and 4000 < page.evaluate_args["maxMs"] <= 5000
+    assert all(not handlers for handlers in page.listeners.values())  # listeners removed
+
+
+async def test_pending_request_holds_the_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(bypasser_mod, "HTML_SETTLE_IDLE_MS", 20)
+    page = QuiescentPage([10])
+    task = asyncio.ensure_future(make_bypasser(tmp_path)._stable_html(page))
+    await asyncio.sleep(0)
+    page.emit("request", "xhr")
+    await asyncio.sleep(0.2)
+    assert not task.done()
+    page.emit("requestfinished", "xhr")
+    assert len(await asyncio.wait_for(task, timeout=2)) == 10
+
+
+async def test_long_poll_does_not_hold_the_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(bypasser_mod, "HTML_SETTLE_IDLE_MS", 20)
+    monkeypatch.setattr(bypasser_mod, "HTML_SETTLE_LONG_REQUEST_MS", 100)
+    page = QuiescentPage([10])
+    task = asyncio.ensure_future(make_bypasser(tmp_path)._stable_html(page))
+    await asyncio.sleep(0)
+    page.emit("request", "long-poll")  # never finishes
+    await asyncio.wait_for(task, timeout=1)
+
+
+async def test_quiescence_failure_falls_back_to_polling(tmp_path):
+    page = QuiescentPage([10, 20, 30, 30, 30], evaluate_raises=True)
+    html = await make_bypasser(tmp_path)._stable_html(page)
+    assert len(html) == 30
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+import cf_bypasser.utils.ipcheck as ipcheck
+from cf_bypasser.utils.ipcheck import ExitIPCache
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeSession:
+    instances = []
+
+    def __init__(self):
+        self.requests = []
+        self.closed = False
+        self.fail = False
+        FakeSession.instances.append(self)
+
+    async def get(self, url, proxies=None, timeout=None):
+        self.requests.append(proxies)
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise ConnectionError("proxy down")
+        proxy = (proxies or {}).get("http")
+        return FakeResponse("203.0.113.1\n" if proxy else "198.51.100.1")
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_session(monkeypatch):
+    FakeSession.instances = []
+    monkeypatch.setattr(ipcheck, "AsyncSession", FakeSession)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request_and_session():
+    cache = ExitIPCache(ttl_seconds=30)
+    ips = await asyncio.gather(*(cache.get("http://p:1") for _ in range(5)))
+    assert ips == ["203.0.113.1"] * 5
+    assert await cache.get(None) == "198.51.100.1"
+
+    assert len(FakeSession.instances) == 1
+    assert len(FakeSession.instances[0].requests) == 2
+    assert cache.stats()["shared"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_ip_reused_until_ttl_expires():
+    cache = ExitIPCache(ttl_seconds=30)
+    await cache.get("http://p:1")
+    await cache.get("http://p:1")
+    assert cache.stats()["lookups"] == 1 and cache.stats()["hits"] == 1
+
+    cache.ttl_seconds = 0
+    await cache.get("http://p:1")
+    assert cache.stats()["lookups"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    cache = ExitIPCache(ttl_seconds=30)
+    await cache.get(None)  # opens the session
+    cache.forget(None)
+    FakeSession.instances[0].fail = True
+    assert await cache.get(None) is None
+    FakeSession.instances[0].fail = False
+    assert await cache.get(None) == "198.51.100.1"
+    assert cache.stats()["lookups"] == 3
+
+
+@pytest.mark.asyncio
+async def test_close_releases_session_and_reopens_on_demand():
+    cache = ExitIPCache(ttl_seconds=0)
+    await cache.get(None)
+    await cache.close()
+    assert FakeSession.instances[0].closed
+    await cache.get(None)
+    assert len(FakeSession.instances) == 2
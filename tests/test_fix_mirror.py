@@ -210,3 +210,18 @@ def test_runtime_error_is_retried(monkeypatch):
         asyncio.run(run())
 
     assert calls["n"] == 3  # initial + 2 retries
+
+
+@pytest.mark.asyncio
+async def test_close_sessions_leaves_bypasser_running():
+    m = make_mirror()
+    closed = []
+
+    class Session:
+        async def close(self):
+            closed.append(self)
+
+    m.session_cache["a"] = Session()
+    await m.close_sessions()
+    assert len(closed) == 1 and not m.session_cache
+    assert m.bypasser.cleaned is False
@@ -0,0 +1,71 @@
+import pytest
+
+import cf_bypasser.core.bypasser as bp
+from cf_bypasser.cache.negative_cache import NegativeCache
+from cf_bypasser.core.errors import HostBackoffError
+from tests.test_fix_bypasser import BLOCK_HTML, FakeContext, FakePage, make_bypasser, patch_launch
+
+
+def test_backoff_doubles_and_caps():
+    n = NegativeCache(base_seconds=10, max_seconds=25)
+    assert n.record("k", "unsolved") == 10
+    assert n.record("k", "unsolved") == 20
+    assert n.record("k", "blocked") == 25
+    entry = n.check("k")
+    assert entry.failures == 3 and entry.failure_class == "blocked"
+    assert n.stats()["by_failure_class"] == {"blocked": 1}
+
+
+def test_success_and_clear_all_reset():
+    n = NegativeCache(base_seconds=10, max_seconds=60)
+    n.record("a", "unsolved")
+    n.record("b", "no_clearance")
+    n.clear("a")
+    assert n.check("a") is None
+    assert n.clear_all() == 1
+    assert n.check("b") is None
+
+
+def test_expired_backoff_lets_requests_through():
+    n = NegativeCache(base_seconds=10, max_seconds=60)
+    n.record("k", "unsolved")
+    n.entries["k"].retry_at = 0
+    assert n.check("k") is None
+
+
+def test_disabled_when_base_is_zero():
+    n = NegativeCache(base_seconds=0)
+    assert n.record("k", "blocked") == 0
+    assert n.check("k") is None
+
+
+@pytest.mark.asyncio
+async def test_repeat_request_fails_fast_without_launch(tmp_path, monkeypatch):
+    b = make_bypasser(tmp_path)
+    launches = []
+
+    async def fake_launch(**kwargs):
+        launches.append(kwargs)
+        return FakeContext(FakePage(html=BLOCK_HTML, title="Attention Required!", status=403))
+    monkeypatch.setattr(bp.cb, "launch_context_async", fake_launch)
+
+    with pytest.raises(bp.ChallengeBlockedError):
+        await b.get_or_generate_cookies("https://blocked.com")
+    with pytest.raises(HostBackoffError) as exc:
+        await b.get_or_generate_cookies("https://blocked.com")
+    assert len(launches) == 1
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) > 0
+    assert b.negative_cache.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_successful_solve_clears_backoff(tmp_path, monkeypatch):
+    b = make_bypasser(tmp_path)
+    key = bp.cache_key("ok.com", None)
+    b.negative_cache.record(key, "unsolved")
+    b.negative_cache.entries[key].retry_at = 0
+    page = FakePage(html="<html>cloudflare ok body</html>", title="ok")
+    patch_launch(monkeypatch, FakeContext(page, cookies=[{"name": "cf_clearance", "value": "xyz"}]))
+    assert await b.get_or_generate_cookies("https://ok.com")
+    assert key not in b.negative_cache.entries
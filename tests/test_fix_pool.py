@@ -0,0 +1,142 @@
+import pytest
+
+import cf_bypasser.core.pool as pool_mod
+from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.pool import BrowserPool
+
+
+class FakePage:
+    def set_default_timeout(self, ms):
+        pass
+
+    def set_default_navigation_timeout(self, ms):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser, kwargs):
+        self.browser = browser
+        self.kwargs = kwargs
+        self.pages = [FakePage()]
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.contexts = []
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self, **kwargs):
+        ctx = FakeContext(self, kwargs)
+        self.contexts.append(ctx)
+        return ctx
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    launched = []
+
+    async def fake_launch_async(**kwargs):
+        browser = FakeBrowser(kwargs)
+        launched.append(browser)
+        return browser
+
+    monkeypatch.setattr(pool_mod.cb, "launch_async", fake_launch_async)
+    return launched
+
+
+async def test_reuses_browser_with_fresh_contexts(launches):
+    pool = BrowserPool(max_contexts=10, max_age_seconds=0)
+    c1 = await pool.lease({"headless": True, "locale": "en"})
+    await pool.release(c1)
+    c2 = await pool.lease({"headless": True, "locale": "en"})
+    assert len(launches) == 1
+    assert c1 is not c2 and c1.closed
+    assert not launches[0].closed
+
+
+async def test_separate_browsers_per_key(launches):
+    pool = BrowserPool()
+    await pool.lease({"headless": True, "locale": "en"})
+    await pool.lease({"headless": True, "locale": "de"})
+    await pool.lease({"headless": True, "locale": "en"}, user_agent="UA/2")
+    await pool.lease({"headless": True, "locale": "en", "proxy": {"server": "http://1.2.3.4:80"}})
+    assert len(launches) == 4
+
+
+async def test_user_agent_goes_to_context(launches):
+    pool = BrowserPool()
+    ctx = await pool.lease({"headless": True}, user_agent="UA/1")
+    assert ctx.kwargs["user_agent"] == "UA/1"
+
+
+async def test_contexts_get_cloakbrowsers_viewport_settings(launches, monkeypatch):
+    pool = BrowserPool()
+    headed = await pool.lease({"headless": False})
+    assert headed.kwargs == {"no_viewport": True}
+
+    monkeypatch.setattr(pool_mod, "binary_supports_headless_no_viewport", lambda *a: False)
+    old_headless = await pool.lease({"headless": True})
+    assert old_headless.kwargs == {"viewport": pool_mod.DEFAULT_VIEWPORT}
+    monkeypatch.setattr(pool_mod, "binary_supports_headless_no_viewport", lambda *a: True)
+    new_headless = await pool.lease({"headless": True, "locale": "de"})
+    assert new_headless.kwargs == {"no_viewport": True}
+    assert "user_agent" not in launches[0].kwargs
+
+
+async def test_recycles_after_max_contexts(launches):
+    pool = BrowserPool(max_contexts=2, max_age_seconds=0)
+    c1 = await pool.lease({"headless": True})
+    c2 = await pool.lease({"headless": True})
+    c3 = await pool.lease({"headless": True})
+    assert len(launches) == 2
+    # the retired browser stays up until its last lease returns
+    assert not launches[0].closed
+    await pool.release(c1)
+    assert not launches[0].closed
+    await pool.release(c2)
+    assert launches[0].closed
+    await pool.release(c3)
+    assert not launches[1].closed
+
+
+async def test_recycles_after_max_age(launches, monkeypatch):
+    pool = BrowserPool(max_contexts=0, max_age_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(pool_mod.time, "monotonic", lambda: now[0])
+    await pool.release(await pool.lease({"headless": True}))
+    now[0] += 61
+    await pool.release(await pool.lease({"headless": True}))
+    assert len(launches) == 2
+    assert launches[0].closed
+
+
+async def test_disconnected_browser_is_replaced(launches):
+    pool = BrowserPool()
+    await pool.release(await pool.lease({"headless": True}))
+    launches[0].closed = True
+    await pool.lease({"headless": True})
+    assert len(launches) == 2
+
+
+async def test_bypasser_pooled_mode_keeps_browser(tmp_path, launches):
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), pooled=True)
+    context, _ = await b.setup_browser()
+    await b.cleanup_browser(context)
+    context2, _ = await b.setup_browser()
+    await b.cleanup_browser(context2)
+    assert len(launches) == 1
+    assert context.closed and context2.closed
+    assert not launches[0].closed
+    await b.cleanup()
+    assert launches[0].closed
@@ -0,0 +1,218 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+from cf_bypasser.cache.backends import create_cookie_cache
+from cf_bypasser.cache.cookie_cache import MemoryCookieCache
+from cf_bypasser.cache.redis_cache import RedisCookieCache
+from cf_bypasser.cache.resp import RespClient
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Stand-in for a Redis server: just the commands the cookie cache sends."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name, args = args[0].upper().decode(), args[1:]
+            with server.lock:
+                server.commands.append(name)
+                data = server.data
+                now = time.monotonic()
+                for key in [k for k, (_, exp) in data.items() if exp is not None and exp <= now]:
+                    del data[key]
+                if name in ("PING", "AUTH", "SELECT"):
+                    reply = b"+OK\r\n"
+                elif name == "GET":
+                    reply = self._bulk(data.get(args[0], (None, None))[0])
+                elif name == "SET":
+                    options = [a.upper() for a in args[2:]]
+                    if b"NX" in options and args[0] in data:
+                        reply = b"$-1\r\n"
+                    else:
+                        px = int(args[2 + options.index(b"PX") + 1]) if b"PX" in options else None
+                        data[args[0]] = (args[1], now + px / 1000 if px else None)
+                        reply = b"+OK\r\n"
+                elif name in ("DEL", "EXISTS"):
+                    count = sum(1 for key in args if key in data)
+                    if name == "DEL":
+                        for key in args:
+                            data.pop(key, None)
+                    reply = b":%d\r\n" % count
+                elif name == "SCAN":
+                    pattern = args[args.index(b"MATCH") + 1].decode()
+                    keys = [k for k in data if fnmatch.fnmatchcase(k.decode(), pattern)]
+                    reply = b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(map(self._bulk, keys))
+                else:
+                    reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+class _FakeRedis(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.data = {}
+        self.commands = []
+
+
+@pytest.fixture
+def redis_url():
+    server = _FakeRedis()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def _node(url, **kwargs):
+    return RedisCookieCache(url=url, client=RespClient(url, timeout=1), **kwargs)
+
+
+def test_nodes_share_entries_through_the_server(redis_url):
+    server, url = redis_url
+    a, b = _node(url), _node(url)
+
+    a.set("k", {"cf_clearance": "one"}, "UA", proxy_id="p1")
+    got = b.get("k")
+    assert got.cookies == {"cf_clearance": "one"} and got.proxy_id == "p1"
+    assert got.created == a.get("k").created
+
+    # within the L1 TTL, repeat reads don't touch the server
+    reads = server.commands.count("GET")
+    b.get("k")
+    assert server.commands.count("GET") == reads
+    assert b.persistence_stats()["l1_hits"] >= 1
+
+
+def test_invalidation_reaches_other_nodes_after_l1_ttl(redis_url):
+    _, url = redis_url
+    a, b = _node(url, l1_ttl=0.1), _node(url, l1_ttl=0.1)
+
+    a.set("k", {"cf_clearance": "one"}, "UA")
+    assert b.get("k") is not None
+    a.invalidate("k")
+    assert a.get("k") is None
+    time.sleep(0.15)
+    assert b.get("k") is None
+
+    a.set("x", {"cf_clearance": "x"}, "UA")
+    b.clear_all()
+    time.sleep(0.15)
+    assert a.get("x") is None
+
+
+def test_l1_eviction_keeps_the_shared_copy(redis_url):
+    _, url = redis_url
+    small = _node(url, max_entries=1)
+    small.set("one", {"cf_clearance": "1"}, "UA")
+    small.set("two", {"cf_clearance": "2"}, "UA")
+    assert list(small.cache) == ["two"]
+    assert _node(url).get("one").cookies == {"cf_clearance": "1"}
+
+
+def test_claims_are_exclusive_across_nodes(redis_url):
+    _, url = redis_url
+    a, b = _node(url), _node(url, claim_ttl=0.2)
+
+    assert a.try_claim("k")
+    assert not b.try_claim("k")
+    assert b.claim_held("k")
+    b.release_claim("k")  # not b's claim
+    assert b.claim_held("k")
+    a.release_claim("k")
+    assert not b.claim_held("k")
+
+    assert b.try_claim("k")
+    time.sleep(0.25)
+    assert a.try_claim("k")
+
+
+def test_unreachable_server_falls_back_to_local(redis_url):
+    server, url = redis_url
+    node = _node(url)
+    node.set("k", {"cf_clearance": "one"}, "UA")
+    server.shutdown()
+    server.server_close()
+    node.client.close()
+
+    node.l1_ttl = 0
+    assert node.get("k").cookies == {"cf_clearance": "one"}
+    assert node.try_claim("k")
+    # the failed read opened the breaker: the claim didn't try the server again
+    stats = node.persistence_stats()
+    assert stats["remote_errors"] == 1 and stats["remote_skipped"] >= 1
+
+
+def test_server_is_retried_after_the_cooldown(redis_url):
+    server, url = redis_url
+    node = _node(url, cooldown=0.1)
+    node._down_until = time.monotonic() + 0.1  # as if a call had just failed
+    node.set("k", {"cf_clearance": "one"}, "UA")
+    assert "SET" not in server.commands
+    time.sleep(0.15)
+    node.set("k", {"cf_clearance": "two"}, "UA")
+    assert _node(url).get("k").cookies == {"cf_clearance": "two"}
+
+
+def test_invalidate_deletes_keys_this_node_never_read(redis_url):
+    _, url = redis_url
+    a, b = _node(url), _node(url)
+    a.set("k", {"cf_clearance": "one"}, "UA")
+    b.invalidate("k")
+    assert _node(url).get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_async_callers_reach_the_server_off_the_event_loop(redis_url, monkeypatch):
+    _, url = redis_url
+    node = _node(url)
+    loop_thread = threading.get_ident()
+    threads, under_lock = [], []
+    pipeline = node.client.pipeline
+
+    def traced(commands):
+        threads.append(threading.get_ident())
+        under_lock.append(node.lock._is_owned())
+        return pipeline(commands)
+
+    monkeypatch.setattr(node.client, "pipeline", traced)
+    node.l1_ttl = 0
+    await node.run(node.set, "k", {"cf_clearance": "one"}, "UA")
+    assert (await node.run(node.get, "k")).cookies == {"cf_clearance": "one"}
+    assert await node.run(node.try_claim, "k")
+    await node.run(node.invalidate, "k")
+    assert len(threads) == 4 and loop_thread not in threads
+    assert not any(under_lock)
+
+
+def test_backend_registry(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    memory = create_cookie_cache(cache_file, backend="memory")
+    assert isinstance(memory, MemoryCookieCache)
+    memory.set("k", {"cf_clearance": "one"}, "UA")
+    memory.close()
+    assert not (tmp_path / "cache.json").exists()
+    assert isinstance(create_cookie_cache(cache_file, backend="redis", shared=True), RedisCookieCache)
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.core.refresher import CookieRefresher
+
+
+def _setup(tmp_path, slot_free=True, solve_result=True):
+    cache = CookieCache(str(tmp_path / "cache.json"), write_behind=False)
+    solves = []
+
+    async def solve(url, proxy, key):
+        solves.append((url, proxy, key))
+        if not solve_result:
+            return None
+        cache.set(key, {"cf_clearance": "new"}, "UA")
+        return {"cookies": {"cf_clearance": "new"}, "user_agent": "UA"}
+
+    refresher = CookieRefresher(cache, solve, lambda: slot_free, fraction=0.2, min_hits=2, interval=60)
+    return cache, refresher, solves
+
+
+def _age(cache, key, fraction_left):
+    """Move an entry so only fraction_left of its TTL remains."""
+    cached = cache.cache[key]
+    ttl = cached.expires - cached.created
+    cached.created = time.time() - ttl * (1 - fraction_left)
+    cached.expires = cached.created + ttl
+
+
+@pytest.mark.asyncio
+async def test_only_hot_keys_in_window_are_refreshed(tmp_path):
+    cache, refresher, solves = _setup(tmp_path)
+    for key in ("hot", "cold", "young"):
+        cache.set(key, {"cf_clearance": "old"}, "UA")
+        refresher.track(key, f"https://{key}.com", None)
+    for _ in range(2):
+        refresher.record_hit("hot", "https://hot.com", None)
+        refresher.record_hit("young", "https://young.com", None)
+    refresher.record_hit("cold", "https://cold.com", None)
+    _age(cache, "hot", 0.1)
+    _age(cache, "cold", 0.1)
+    _age(cache, "young", 0.5)
+
+    await refresher.run_once()
+    assert solves == [("https://hot.com", None, "hot")]
+    assert cache.get("hot").cookies == {"cf_clearance": "new"}
+    assert refresher.stats()["refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_busy_browser_slots_defer_refresh(tmp_path):
+    cache, refresher, solves = _setup(tmp_path, slot_free=False)
+    cache.set("k", {"cf_clearance": "old"}, "UA")
+    refresher.track("k", "https://k.com", None)
+    refresher.record_hit("k", "https://k.com", None)
+    refresher.record_hit("k", "https://k.com", None)
+    _age(cache, "k", 0.1)
+    await refresher.run_once()
+    assert solves == []
+    assert refresher.stats()["skipped_busy"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hit_past_replaced_expiry_counts_as_saved(tmp_path):
+    cache, refresher, _ = _setup(tmp_path)
+    cache.set("k", {"cf_clearance": "old"}, "UA")
+    refresher.track("k", "https://k.com", None)
+    refresher.record_hit("k", "https://k.com", None)
+    refresher.record_hit("k", "https://k.com", None)
+    _age(cache, "k", 0.1)
+    assert await refresher.refresh("k") is True
+    refresher.record_hit("k", "https://k.com", None)
+    assert refresher.saved_solves == 0  # the old entry was still valid
+    refresher._tracked["k"].replaced_expiry = time.time() - 1
+    refresher.record_hit("k", "https://k.com", None)
+    refresher.record_hit("k", "https://k.com", None)
+    assert refresher.saved_solves == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_stops_tracking(tmp_path):
+    cache, refresher, _ = _setup(tmp_path, solve_result=False)
+    cache.set("k", {"cf_clearance": "old"}, "UA")
+    refresher.track("k", "https://k.com", None)
+    assert await refresher.refresh("k") is False
+    stats = refresher.stats()
+    assert stats["failures"] == 1 and stats["tracked_keys"] == 0
+    assert cache.get("k").cookies == {"cf_clearance": "old"}
+
+
+def test_expired_keys_are_forgotten(tmp_path):
+    cache, refresher, _ = _setup(tmp_path)
+    refresher.track("gone", "https://gone.com", None)
+    assert refresher.due() == []
+    assert refresher.stats()["tracked_keys"] == 0
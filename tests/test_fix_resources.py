@@ -0,0 +1,72 @@
+import pytest
+
+from cf_bypasser.core.resources import should_block, install_resource_blocking
+
+TARGET = "shop.example.com"
+
+
+@pytest.mark.parametrize("resource_type, url", [
+    ("image", "https://shop.example.com/logo.png"),
+    ("font", "https://fonts.gstatic.com/x.woff2"),
+    ("media", "https://cdn.example.net/intro.mp4"),
+    ("script", "https://www.googletagmanager.com/gtm.js"),
+    ("xhr", "https://region1.google-analytics.com/g/collect"),
+])
+def test_blocks_heavy_and_tracker_requests(resource_type, url):
+    assert should_block(resource_type, url, TARGET) is True
+
+
+@pytest.mark.parametrize("resource_type, url", [
+    ("document", "https://shop.example.com/"),
+    ("script", "https://shop.example.com/app.js"),
+    ("fetch", "https://shop.example.com/cdn-cgi/challenge-platform/h/g/flow/ov1"),
+    ("document", "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/turnstile"),
+    ("image", "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/img.png"),
+    ("script", "https://cdn.jsdelivr.net/npm/lib.js"),
+])
+def test_allows_challenge_and_target_requests(resource_type, url):
+    assert should_block(resource_type, url, TARGET) is False
+
+
+def test_tracker_host_that_is_the_target_is_allowed():
+    assert should_block("document", "https://www.bing.com/", "www.bing.com") is False
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+
+class FakeContext:
+    def __init__(self):
+        self.routes = []
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+
+async def test_installed_handler_aborts_or_continues():
+    ctx = FakeContext()
+    await install_resource_blocking(ctx, f"https://{TARGET}/path")
+    pattern, handler = ctx.routes[0]
+    assert pattern == "**/*"
+
+    img = FakeRoute("image", f"https://{TARGET}/a.jpg")
+    doc = FakeRoute("document", f"https://{TARGET}/")
+    await handler(img)
+    await handler(doc)
+    assert img.outcome == "abort"
+    assert doc.outcome == "continue"
@@ -137,3 +137,31 @@ def test_any_resolved_ip_private_rejected(monkeypatch):
         ]
     monkeypatch.setattr(socket, "getaddrinfo", multi)
     assert routes.is_safe_url("https://mixed.example.com") is False
+
+
+def test_hard_block_returns_distinct_error_code():
+    from fastapi.testclient import TestClient
+    from cf_bypasser.server.app import create_app
+    from cf_bypasser.server.routes import get_mirror
+    from cf_bypasser.core.errors import ChallengeBlockedError
+
+    class BlockedMirror:
+        async def mirror_request(self, **kwargs):
+            raise ChallengeBlockedError("blocked", 403)
+
+    app = create_app()
+    app.dependency_overrides[get_mirror] = lambda: BlockedMirror()
+    resp = TestClient(app).get("/foo", headers={"x-hostname": "example.com"})
+    assert resp.status_code == 403
+    assert resp.json()["error_code"] == "cf_blocked"
+
+
+def test_health_check_leaves_the_targets_health_path_to_the_mirror():
+    client, captured = _client_with_capturing_mirror()
+    resp = client.get("/cache/health")
+    assert resp.status_code == 200 and resp.json() == {"status": "ok"}
+    assert captured == {}
+
+    resp = client.get("/health", headers={"x-hostname": "example.com"})
+    assert resp.status_code == 200 and resp.content == b"ok"
+    assert captured["hostname"] == "example.com" and captured["path"] == "/health"
@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+import pytest
+
+from cf_bypasser.cache.shared_cache import SharedSQLiteCookieCache
+from cf_bypasser.cache.backends import create_cookie_cache
+
+URL = "https://shared.example/"
+
+
+def _open(path, **kwargs):
+    return SharedSQLiteCookieCache(str(path), migrate_from=None, **kwargs)
+
+
+def test_workers_see_each_others_writes_and_invalidations(tmp_path):
+    a = _open(tmp_path / "cache.db")
+    b = _open(tmp_path / "cache.db")
+
+    a.set("k", {"cf_clearance": "one"}, "UA")
+    assert b.get("k").cookies == {"cf_clearance": "one"}
+
+    b.set("k", {"cf_clearance": "two"}, "UA")
+    assert a.get("k").cookies == {"cf_clearance": "two"}
+
+    a.invalidate("k")
+    assert b.get("k") is None
+
+    # b never held "y": invalidating it must still delete the row for a
+    a.set("y", {"cf_clearance": "y"}, "UA", proxy_id="p")
+    a.set("z", {"cf_clearance": "z"}, "UA", proxy_id="p")
+    b.invalidate("y")
+    assert a.get("y") is None
+    assert b.invalidate_proxy("p") == 1
+    assert a.get("z") is None
+
+
+def test_sweep_and_eviction_leave_other_workers_rows_alone(tmp_path):
+    a = _open(tmp_path / "cache.db", max_entries=2)
+    b = _open(tmp_path / "cache.db")
+    for key in ("one", "two", "three"):
+        a.set(key, {"cf_clearance": key}, "UA")
+    a.set("old", {"cf_clearance": "old"}, "UA", ttl_seconds=-1)
+    assert list(a.cache) == ["three", "old"]
+    assert b.get("one") is not None  # evicted from a's memory only
+
+    a.get("three")
+    assert a.clear_expired() == 1
+    assert list(a.cache) == ["three"]  # no reload: only the expired key left memory
+    assert b.get("old") is None and b.get("two") is not None
+
+
+def test_claims_are_exclusive_and_expire(tmp_path):
+    a = _open(tmp_path / "cache.db")
+    b = _open(tmp_path / "cache.db", claim_ttl=0.2)
+
+    assert a.try_claim("k")
+    assert not b.try_claim("k")
+    assert b.claim_held("k")
+    a.release_claim("k")
+    assert not b.claim_held("k")
+
+    assert b.try_claim("k")
+    assert not a.try_claim("k")
+    time.sleep(0.25)  # b "crashed" without releasing
+    assert a.try_claim("k")
+
+
+def test_shared_flag_selects_shared_backend(tmp_path):
+    cache = create_cookie_cache(str(tmp_path / "cache.json"), backend="json", shared=True)
+    assert isinstance(cache, SharedSQLiteCookieCache)
+    assert cache.cache_file.endswith("cache.db")
+    assert cache.write_behind is False
+    # SQLite reads and claim writes can block on other workers: keep them off the event loop
+    assert cache.blocking_io is True
+
+
+@pytest.mark.parametrize("backend, shared", [
+    (None, "true"), ("sqlite", "true"), ("json", None), ("memory", None), ("redis", None),
+])
+def test_multi_worker_server_respects_an_explicit_backend(monkeypatch, backend, shared):
+    import server
+
+    monkeypatch.delenv("CF_CACHE_SHARED", raising=False)
+    if backend is None:
+        monkeypatch.delenv("CF_CACHE_BACKEND", raising=False)
+    else:
+        monkeypatch.setenv("CF_CACHE_BACKEND", backend)
+    monkeypatch.setattr(server.uvicorn, "run", lambda *a, **kw: None)
+    monkeypatch.setattr(sys, "argv", ["server.py", "--workers", "2"])
+    server.main()
+    assert os.environ.get("CF_CACHE_SHARED") == shared
+
+
+def _worker(db_file, solve_log, barrier, results):
+    from cf_bypasser.core.bypasser import CloakBypasser
+
+    b = CloakBypasser(log=False, cache_file=db_file + ".json", pooled=False, standby_contexts=0)
+    b.cookie_cache = SharedSQLiteCookieCache(db_file, migrate_from=None)
+
+    async def fake_solve(url, proxy, key):
+        with open(solve_log, "a") as f:
+            f.write("solve\n")
+        await asyncio.sleep(0.5)
+        b.cookie_cache.set(key, {"cf_clearance": "shared"}, "UA")
+        return {"cookies": {"cf_clearance": "shared"}, "user_agent": "UA"}
+
+    b._solve_cookies = fake_solve
+    barrier.wait()
+    data = asyncio.run(b.get_or_generate_cookies(URL))
+    results.put(data["cookies"]["cf_clearance"] if data else None)
+
+
+def test_one_worker_solves_while_others_wait(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    db_file = str(tmp_path / "cache.db")
+    solve_log = str(tmp_path / "solves.log")
+    _open(db_file).close()  # create the schema once up front
+    workers = 3
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(db_file, solve_log, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+
+    assert [results.get(timeout=5) for _ in range(workers)] == ["shared"] * workers
+    with open(solve_log) as f:
+        assert f.read().count("solve") == 1
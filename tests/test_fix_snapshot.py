@@ -0,0 +1,114 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from cf_bypasser.cache.cookie_cache import CachedCookies, CookieCache
+from cf_bypasser.cache.snapshot import dump_lines, parse_lines, pull_snapshot
+from cf_bypasser.cache.sqlite_cache import SQLiteCookieCache
+from cf_bypasser.server import routes
+from cf_bypasser.utils.misc import cache_key, proxy_id
+
+PROXY = "http://user:pw@proxy.example:8080"
+
+
+def _filled(path):
+    cache = CookieCache(str(path), write_behind=False)
+    for host, proxy in (("a.example", None), ("a.example", PROXY), ("b.example", PROXY)):
+        cache.set(cache_key(host, proxy), {"cf_clearance": host}, "UA", proxy_id=proxy_id(proxy), hostname=host)
+    cache.set(cache_key("gone.example"), {"cf_clearance": "x"}, "UA", ttl_seconds=-1, hostname="gone.example")
+    return cache
+
+
+def test_snapshot_filters_and_skips_expired(tmp_path):
+    cache = _filled(tmp_path / "cache.json")
+    assert len(cache.snapshot()) == 3
+    assert {c.hostname for c in cache.snapshot(hostname="a.example")} == {"a.example"}
+    assert len(cache.snapshot(hostname="a.example")) == 2
+    assert {c.hostname for c in cache.snapshot(proxy_id=proxy_id(PROXY))} == {"a.example", "b.example"}
+    assert len(cache.snapshot(hostname="b.example", proxy_id=proxy_id(None))) == 0
+
+
+def test_import_is_one_batched_write_and_keeps_fresher_entries(tmp_path):
+    source = _filled(tmp_path / "cache.json")
+    entries, malformed = parse_lines(list(dump_lines(source.snapshot())) + ["", "{not json", '{"key": 1}'])
+    assert len(entries) == 3 and malformed == 2
+    assert entries[0] == source.cache[entries[0].key]
+
+    target = SQLiteCookieCache(str(tmp_path / "target.db"), migrate_from=None, write_behind=False)
+    newer_key = cache_key("a.example", None)
+    time.sleep(0.01)
+    target.set(newer_key, {"cf_clearance": "newer"}, "UA", hostname="a.example")
+
+    writes = []
+    original = target._write_changes
+    target._write_changes = lambda *args: (writes.append(args), original(*args))
+    assert target.import_entries(entries) == 2
+    assert len(writes) == 1
+    assert target.get(newer_key).cookies == {"cf_clearance": "newer"}
+
+    reopened = SQLiteCookieCache(str(tmp_path / "target.db"), migrate_from=None)
+    assert {c.hostname for c in reopened.snapshot()} == {"a.example", "b.example"}
+
+
+def _client(cache):
+    app = FastAPI()
+    routes.setup_routes(app)
+    app.dependency_overrides[routes.get_bypasser] = lambda: SimpleNamespace(cookie_cache=cache)
+    return TestClient(app)
+
+
+def test_export_and_import_are_disabled_without_a_token(tmp_path, monkeypatch):
+    monkeypatch.setattr(routes, "ADMIN_TOKEN", "")
+    client = _client(_filled(tmp_path / "a.json"))
+    assert client.get("/cache/export").status_code == 404
+    assert client.post("/cache/import", content=b"").status_code == 404
+
+
+def test_export_and_import_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(routes, "ADMIN_TOKEN", "s3cret")
+    source = _client(_filled(tmp_path / "a.json"))
+    assert source.get("/cache/export").status_code == 401
+
+    auth = {"authorization": "Bearer s3cret"}
+    resp = source.get("/cache/export", params={"proxy": PROXY}, headers=auth)
+    assert resp.status_code == 200 and resp.headers["content-type"] == "application/x-ndjson"
+    assert len(resp.text.splitlines()) == 2
+
+    target_cache = CookieCache(str(tmp_path / "b.json"), write_behind=False)
+    resp = _client(target_cache).post("/cache/import", content=resp.content, headers=auth)
+    assert resp.json() == {"imported": 2, "skipped": 0, "malformed": 0}
+    assert {c.hostname for c in target_cache.snapshot()} == {"a.example", "b.example"}
+
+
+@pytest.mark.asyncio
+async def test_warm_start_pulls_a_peer_snapshot(tmp_path):
+    body = "".join(dump_lines(_filled(tmp_path / "peer.json").snapshot())).encode()
+
+    class Peer(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ok = self.path == "/cache/export" and self.headers.get("authorization") == "Bearer t"
+            self.send_response(200 if ok else 401)
+            self.send_header("Content-Length", str(len(body) if ok else 0))
+            self.end_headers()
+            if ok:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Peer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    peer = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        cache = CookieCache(str(tmp_path / "new.json"), write_behind=False)
+        assert await pull_snapshot(cache, peer, token="wrong") == 0
+        assert await pull_snapshot(cache, peer, token="t") == 3
+        assert isinstance(cache.get(cache_key("b.example", PROXY)), CachedCookies)
+    finally:
+        server.shutdown()
+        server.server_close()
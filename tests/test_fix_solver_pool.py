@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.errors import ChallengeBlockedError
+from cf_bypasser.core.solver_pool import SolverPool
+
+
+def _init(log):
+    pass
+
+
+def _job(kind, url, proxy, browse_kwargs):
+    time.sleep(0.05)
+    if "blocked" in url:
+        return os.getpid(), 0.05, (((False, True, 403), "blocked"), None, {"total": 50})
+    data = {"cookies": {"cf_clearance": "from-solver"}, "user_agent": f"UA/{kind}"}
+    return os.getpid(), 0.05, (((True, True, 200), "unprotected"), data, {"total": 50})
+
+
+def _dies_once(kind, url, proxy, browse_kwargs):
+    marker = browse_kwargs.pop("marker")
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)  # solver crash, e.g. Chromium taking the process down
+    return _job(kind, url, proxy, browse_kwargs)
+
+
+def _bypasser(tmp_path, size=2):
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), solver_processes=size)
+    b.solver_pool = SolverPool(size, log=False, initializer=_init, job=_job)
+    return b
+
+
+def test_solver_mode_keeps_browsers_out_of_api_process(tmp_path):
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), solver_processes=2)
+    assert b.browser_pool is None and b.standby is None
+    assert b.solver_pool is not None and b.solver_pool.size == 2
+
+
+@pytest.mark.asyncio
+async def test_solves_run_in_solver_processes_and_are_cached_here(tmp_path):
+    b = _bypasser(tmp_path)
+    try:
+        data = await b.get_or_generate_cookies("https://example.com/")
+        assert data["cookies"] == {"cf_clearance": "from-solver"}
+        assert data["user_agent"] == "UA/cookies"
+        assert b.cookie_cache.get(next(iter(b.cookie_cache.cache))) is not None
+
+        stats = b.browser_stats()["solvers"]
+        assert stats["completed"] == 1 and stats["in_flight"] == 0
+        (pid, solver), = stats["solvers"].items()
+        assert int(pid) != os.getpid()
+        assert solver["jobs"] == 1 and 0 < solver["utilization"] <= 1
+    finally:
+        await b.solver_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_hard_failures_from_solver_are_classified_here(tmp_path):
+    b = _bypasser(tmp_path, size=1)
+    try:
+        with pytest.raises(ChallengeBlockedError):
+            await b.get_or_generate_cookies("https://blocked.example/")
+        assert b.negative_cache.stats()["entries"] == 1
+    finally:
+        await b.solver_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_rebuilt_and_the_job_retried(tmp_path):
+    pool = SolverPool(1, log=False, initializer=_init, job=_dies_once)
+    try:
+        outcome = await pool.browse("cookies", "https://example.com/", None, marker=str(tmp_path / "died"))
+        assert outcome is not None and outcome[1]["cookies"] == {"cf_clearance": "from-solver"}
+        stats = pool.stats()
+        assert stats["restarts"] == 1 and stats["completed"] == 1 and stats["failed"] == 0
+    finally:
+        await pool.close()
+
+
+def test_solver_process_bypasser_keeps_no_cache_or_background_work(monkeypatch):
+    from cf_bypasser.cache.cookie_cache import MemoryCookieCache
+    from cf_bypasser.core import bypasser, solver_pool
+
+    monkeypatch.setattr(bypasser, "REFRESH_AHEAD_FRACTION", 0.8)
+    monkeypatch.setattr(bypasser, "IP_MONITOR_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(solver_pool, "Finalize", lambda *args, **kwargs: None)
+    monkeypatch.setattr(solver_pool, "_solver", None)
+    monkeypatch.setattr(solver_pool, "_solver_loop", None)
+    solver_pool._init_solver(False)
+    try:
+        solver = solver_pool._solver
+        assert isinstance(solver.cookie_cache, MemoryCookieCache)
+        assert solver.refresher is None and solver.ip_monitor is None
+        assert solver.standby is None and solver.solver_pool is None
+    finally:
+        solver_pool._solver_loop.close()
+        asyncio.set_event_loop(None)
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+
+import pytest
+
+from cf_bypasser.cache.backends import create_cookie_cache
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.cache.sqlite_cache import SQLiteCookieCache
+
+
+def _db(tmp_path):
+    return str(tmp_path / "cf_cookie_cache.db")
+
+
+def test_roundtrip_persists_and_reloads(tmp_path):
+    c = SQLiteCookieCache(_db(tmp_path), migrate_from=None)
+    c.set("example.com", {"cf_clearance": "abc"}, "UA/1.0", ttl_minutes=2, exit_ip="203.0.113.7")
+    c.close()
+
+    got = SQLiteCookieCache(_db(tmp_path), migrate_from=None).get("example.com")
+    assert got.cookies == {"cf_clearance": "abc"}
+    assert got.user_agent == "UA/1.0"
+    assert got.exit_ip == "203.0.113.7"
+
+
+def test_wal_mode_and_expires_index(tmp_path):
+    SQLiteCookieCache(_db(tmp_path), migrate_from=None).close()
+    conn = sqlite3.connect(_db(tmp_path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = conn.execute("EXPLAIN QUERY PLAN DELETE FROM cookies WHERE expires_at <= 0").fetchall()
+    assert any("idx_cookies_expires_at" in row[-1] for row in plan)
+
+
+def test_writes_touch_single_rows(tmp_path):
+    c = SQLiteCookieCache(_db(tmp_path), migrate_from=None)
+    for i in range(5):
+        c.set(f"h{i}", {"n": str(i)}, "UA")
+    c.invalidate("h1")
+    rows = sqlite3.connect(_db(tmp_path)).execute("SELECT key FROM cookies ORDER BY key").fetchall()
+    assert [r[0] for r in rows] == ["h0", "h2", "h3", "h4"]
+    c.clear_all()
+    assert sqlite3.connect(_db(tmp_path)).execute("SELECT COUNT(*) FROM cookies").fetchone()[0] == 0
+
+
+def test_clear_expired_removes_rows(tmp_path):
+    c = SQLiteCookieCache(_db(tmp_path), migrate_from=None)
+    c.set("old", {"k": "v"}, "UA", ttl_minutes=-1)
+    c.set("new", {"k": "v"}, "UA")
+    c.clear_expired()
+    assert list(c.cache) == ["new"]
+    assert sqlite3.connect(_db(tmp_path)).execute("SELECT key FROM cookies").fetchall() == [("new",)]
+
+
+def test_migrates_json_file_once(tmp_path):
+    json_path = str(tmp_path / "cf_cookie_cache.json")
+    legacy = CookieCache(json_path)
+    legacy.set("live.com", {"cf_clearance": "x"}, "UA")
+    legacy.set("stale.com", {"cf_clearance": "y"}, "UA", ttl_minutes=-1)
+
+    c = SQLiteCookieCache(_db(tmp_path), migrate_from=json_path)
+    assert c.get("live.com").cookies == {"cf_clearance": "x"}
+    assert "stale.com" not in c.cache
+    assert not os.path.exists(json_path)
+    assert os.path.exists(json_path + ".migrated")
+
+
+def test_factory_selects_backend(tmp_path):
+    json_path = str(tmp_path / "cache.json")
+    assert type(create_cookie_cache(json_path, backend="json")) is CookieCache
+    sqlite_cache = create_cookie_cache(json_path, backend="sqlite")
+    assert isinstance(sqlite_cache, SQLiteCookieCache)
+    assert sqlite_cache.cache_file == str(tmp_path / "cache.db")
+    with pytest.raises(ValueError):
+        create_cookie_cache(json_path, backend="memcached")
+
+
+def test_usable_after_close(tmp_path):
+    c = SQLiteCookieCache(_db(tmp_path), migrate_from=None)
+    c.close()
+    c.set("h", {"k": "v"}, "UA")
+    assert SQLiteCookieCache(_db(tmp_path), migrate_from=None).get("h") is not None
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.utils.misc import cache_key
+
+URL = "https://example.com/"
+KEY = cache_key("example.com", None)
+
+
+def _expire(cache, key, seconds_ago):
+    cached = cache.cache[key]
+    cached.expires = time.time() - seconds_ago
+
+
+def test_get_returns_stale_entry_only_when_allowed(tmp_path):
+    cache = CookieCache(str(tmp_path / "cache.json"), write_behind=False, stale_grace=60)
+    cache.set("k", {"cf_clearance": "old"}, "UA")
+    _expire(cache, "k", 10)
+
+    assert cache.get("k") is None
+    stale = cache.get("k", allow_stale=True)
+    assert stale is not None and stale.is_expired()
+
+    _expire(cache, "k", 120)
+    assert cache.get("k", allow_stale=True) is None
+    assert "k" not in cache.cache
+
+
+def test_sweep_keeps_entries_inside_grace(tmp_path):
+    cache = CookieCache(str(tmp_path / "cache.json"), write_behind=False, stale_grace=60)
+    cache.set("k", {"cf_clearance": "old"}, "UA", ttl_minutes=0)
+    assert cache._pop_expired(time.time() + 30) == []
+    assert cache.next_expiry() >= time.time() + 59
+    assert cache._pop_expired(time.time() + 120) == ["k"]
+
+
+def _bypasser(tmp_path, monkeypatch, solve_result=True, delay=0.05):
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), pooled=False, standby_contexts=0)
+    b.cookie_cache.stale_grace = 60
+    solves = []
+
+    async def fake_solve(url, proxy, key):
+        solves.append(key)
+        await asyncio.sleep(delay)
+        if not solve_result:
+            return None
+        b.cookie_cache.set(key, {"cf_clearance": "new"}, "UA")
+        return {"cookies": {"cf_clearance": "new"}, "user_agent": "UA"}
+
+    monkeypatch.setattr(b, "_solve_cookies", fake_solve)
+    b.cookie_cache.set(KEY, {"cf_clearance": "old"}, "UA")
+    _expire(b.cookie_cache, KEY, 5)
+    return b, solves
+
+
+@pytest.mark.asyncio
+async def test_stale_hits_are_served_while_one_solve_refreshes(tmp_path, monkeypatch):
+    b, solves = _bypasser(tmp_path, monkeypatch)
+
+    results = await asyncio.gather(*(b.get_or_generate_cookies(URL) for _ in range(5)))
+    assert all(r["stale"] and r["cookies"] == {"cf_clearance": "old"} for r in results)
+
+    await asyncio.gather(*b._revalidations.values())
+    assert solves == [KEY]
+    fresh = await b.get_or_generate_cookies(URL)
+    assert fresh["cookies"] == {"cf_clearance": "new"} and "stale" not in fresh
+    assert b.stale_stats()["served"] == 5
+    assert b.stale_stats()["revalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidated_stale_entry_waits_for_revalidation(tmp_path, monkeypatch):
+    b, solves = _bypasser(tmp_path, monkeypatch, delay=0.1)
+    assert (await b.get_or_generate_cookies(URL))["stale"]
+
+    # what the mirror does on a 403: drop the entry and ask again
+    b.cookie_cache.invalidate(KEY)
+    data = await b.get_or_generate_cookies(URL)
+    assert data["cookies"] == {"cf_clearance": "new"}
+    assert solves == [KEY]
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidation_drops_stale_entry(tmp_path, monkeypatch):
+    b, solves = _bypasser(tmp_path, monkeypatch, solve_result=False)
+    assert (await b.get_or_generate_cookies(URL))["stale"]
+    await asyncio.gather(*b._revalidations.values())
+    assert KEY not in b.cookie_cache.cache
+
+
+@pytest.mark.asyncio
+async def test_grace_disabled_blocks_on_solve(tmp_path, monkeypatch):
+    b, solves = _bypasser(tmp_path, monkeypatch)
+    b.cookie_cache.stale_grace = 0
+    data = await b.get_or_generate_cookies(URL)
+    assert data["cookies"] == {"cf_clearance": "new"} and "stale" not in data
+    assert not b._revalidations
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import cf_bypasser.core.bypasser as bp
+from cf_bypasser.core.bypasser import CloakBypasser
+from cf_bypasser.core.standby import StandbyContexts
+
+
+class FakePage:
+    def set_default_timeout(self, ms):
+        pass
+
+    def set_default_navigation_timeout(self, ms):
+        pass
+
+
+class FakeContext:
+    def __init__(self, n):
+        self.n = n
+        self.pages = [FakePage()]
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def launcher():
+    launched = []
+
+    async def launch(proxy):
+        ctx = FakeContext(len(launched))
+        launched.append((proxy, ctx))
+        return ctx
+
+    async def close(ctx):
+        await ctx.close()
+
+    return launch, close, launched
+
+
+async def test_fills_spares_per_proxy(launcher):
+    launch, close, launched = launcher
+    standby = StandbyContexts(launch, close, size=2, proxies=["http://u:p@1.2.3.4:8080"])
+    standby.start()
+    await _settle()
+    assert len(launched) == 4
+    stats = standby.stats()
+    assert stats["spare"] == {"direct": 2, "http://1.2.3.4:8080": 2}
+    await standby.close()
+    assert all(ctx.closed for _, ctx in launched)
+
+
+async def test_take_replenishes_and_records_lag(launcher):
+    launch, close, launched = launcher
+    standby = StandbyContexts(launch, close, size=1)
+    standby.start()
+    await _settle()
+    ctx = standby.take(None)
+    assert ctx is launched[0][1]
+    await _settle()
+    assert len(launched) == 2
+    stats = standby.stats()
+    assert stats["hits"] == 1
+    assert stats["spare"]["direct"] == 1
+    assert stats["last_replenish_lag_ms"] is not None
+    await standby.close()
+
+
+async def test_take_misses_for_unconfigured_proxy(launcher):
+    launch, close, _ = launcher
+    standby = StandbyContexts(launch, close, size=1)
+    standby.start()
+    await _settle()
+    assert standby.take("http://9.9.9.9:1") is None
+    await standby.close()
+
+
+async def test_take_before_start_returns_none(launcher):
+    launch, close, _ = launcher
+    assert StandbyContexts(launch, close, size=1).take(None) is None
+
+
+async def test_setup_browser_uses_spare(tmp_path, monkeypatch):
+    launches = []
+
+    async def fake_launch(**kwargs):
+        ctx = FakeContext(len(launches))
+        launches.append(kwargs)
+        return ctx
+
+    monkeypatch.setattr(bp.cb, "launch_context_async", fake_launch)
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), standby_contexts=1)
+    await b.start()
+    await _settle()
+    assert len(launches) == 1
+
+    context, _ = await b.setup_browser()
+    assert context.n == 0
+    # a cached-UA solve can't use a default spare
+    context2, _ = await b.setup_browser(user_agent="UA/1")
+    assert context2.n != 0
+    assert b.browser_stats()["standby"]["hits"] == 1
+    await b.cleanup()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from cf_bypasser.cache.ttl import TTLPolicy, cookie_expiry
+from cf_bypasser.core.bypasser import CloakBypasser
+
+NOW = 1_700_000_000.0
+
+
+def _policy(**kwargs):
+    kwargs.setdefault("default_seconds", 29 * 60)
+    kwargs.setdefault("margin_seconds", 120)
+    kwargs.setdefault("max_seconds", 12 * 3600)
+    return TTLPolicy(**kwargs)
+
+
+def test_cookie_expiry_prefers_clearance_and_skips_session_cookies():
+    cookies = [
+        {"name": "__cf_bm", "value": "b", "expires": NOW + 1800},
+        {"name": "cf_clearance", "value": "c", "expires": NOW + 86400},
+        {"name": "sid", "value": "s", "expires": -1},
+    ]
+    assert cookie_expiry(cookies) == NOW + 86400
+    assert cookie_expiry([{"name": "cf_clearance", "value": "c", "expires": -1}]) is None
+    assert cookie_expiry(None) is None
+
+
+@pytest.mark.parametrize("expires_in, expected", [
+    (86400, 12 * 3600),          # 24 h clearance, capped
+    (3600, 3600 - 120),          # 1 h clearance minus margin
+    (30, 60),                    # about to expire: floor
+    (None, 29 * 60),             # session cookie: default
+])
+def test_ttl_from_clearance_expiry(expires_in, expected):
+    cookies = [{"name": "cf_clearance", "value": "c",
+                "expires": NOW + expires_in if expires_in is not None else -1}]
+    assert _policy().ttl_for("k", cookies, now=NOW) == expected
+
+
+def test_derivation_can_be_disabled():
+    cookies = [{"name": "cf_clearance", "value": "c", "expires": NOW + 86400}]
+    assert _policy(from_expiry=False).ttl_for("k", cookies, now=NOW) == 29 * 60
+
+
+def test_rejection_caps_ttl_but_not_below_default():
+    policy = _policy()
+    cookies = [{"name": "cf_clearance", "value": "c", "expires": NOW + 86400}]
+    policy.record_rejection("k", 2 * 3600, now=NOW)
+    assert policy.ttl_for("k", cookies, now=NOW) == pytest.approx(0.8 * 2 * 3600)
+    assert policy.ttl_for("other", cookies, now=NOW) == 12 * 3600
+
+    policy.record_rejection("k", 60, now=NOW)
+    assert policy.ttl_for("k", cookies, now=NOW) == 29 * 60
+
+    # forgotten after a day
+    later = NOW + 25 * 3600
+    renewed = [{"name": "cf_clearance", "value": "c", "expires": later + 86400}]
+    assert policy.ttl_for("k", renewed, now=later) == 12 * 3600
+    assert policy.stats()["learned_caps"] == 0
+
+
+def test_bypasser_rejection_learns_only_from_unexpired_entries(tmp_path):
+    b = CloakBypasser(log=False, cache_file=str(tmp_path / "cache.json"), pooled=False, standby_contexts=0)
+    b.cookie_cache.set("k", {"cf_clearance": "c"}, "UA", ttl_seconds=3 * 3600)
+    b.cookie_cache.cache["k"].created = time.time() - 2 * 3600
+
+    asyncio.run(b.reject_cookies("k"))
+    assert "k" not in b.cookie_cache.cache
+    assert b.ttl_policy.stats()["rejections"] == 1
+    assert b.ttl_policy.learned["k"].cap_seconds == pytest.approx(0.8 * 2 * 3600, rel=0.01)
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+
+from cf_bypasser.cache.cookie_cache import CookieCache
+from cf_bypasser.cache.sqlite_cache import SQLiteCookieCache
+
+
+def _counting_cache(tmp_path, monkeypatch, **kwargs):
+    c = CookieCache(str(tmp_path / "cache.json"), write_behind=True, **kwargs)
+    writes = []
+    real_save = c._save_cache
+
+    def save():
+        writes.append(1)
+        return real_save()
+    monkeypatch.setattr(c, "_save_cache", save)
+    return c, writes
+
+
+def _on_disk(tmp_path):
+    with open(tmp_path / "cache.json") as f:
+        return json.load(f)
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_one_write(tmp_path, monkeypatch):
+    c, writes = _counting_cache(tmp_path, monkeypatch, flush_interval=0.05, flush_changes=1000)
+    c.start()
+    for i in range(20):
+        c.set(f"h{i}", {"n": str(i)}, "UA")
+    c.invalidate("h0")
+    assert writes == []
+    assert c.persistence_stats()["pending_changes"] == 20
+    await asyncio.sleep(0.2)
+    assert writes == [1]
+    assert len(_on_disk(tmp_path)) == 19
+    stats = c.persistence_stats()
+    assert stats["flushes"] == 1 and stats["pending_changes"] == 0 and stats["dirty_age_seconds"] == 0
+    await c.stop()
+
+
+@pytest.mark.asyncio
+async def test_change_threshold_flushes_before_interval(tmp_path, monkeypatch):
+    c, writes = _counting_cache(tmp_path, monkeypatch, flush_interval=60, flush_changes=3)
+    c.start()
+    for i in range(3):
+        c.set(f"h{i}", {"n": str(i)}, "UA")
+    await asyncio.sleep(0.1)
+    assert writes == [1]
+    await c.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_performs_final_flush(tmp_path, monkeypatch):
+    c, writes = _counting_cache(tmp_path, monkeypatch, flush_interval=60, flush_changes=1000)
+    c.start()
+    c.set("h", {"k": "v"}, "UA")
+    assert c.persistence_stats()["dirty_age_seconds"] >= 0
+    await c.stop()
+    assert "h" in _on_disk(tmp_path)
+    # without a flusher, changes are written through again
+    c.set("h2", {"k": "v"}, "UA")
+    assert "h2" in _on_disk(tmp_path)
+
+
+def test_without_flusher_writes_through(tmp_path, monkeypatch):
+    c, writes = _counting_cache(tmp_path, monkeypatch)
+    c.set("h", {"k": "v"}, "UA")
+    assert writes == [1]
+    assert c.persistence_stats()["mode"] == "write-through"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_batch_applies_clear_then_changes(tmp_path):
+    db = str(tmp_path / "cache.db")
+    c = SQLiteCookieCache(db, migrate_from=None, write_behind=True, flush_interval=60)
+    c.set("old", {"k": "v"}, "UA")
+    c.start()
+    c.clear_all()
+    c.set("a", {"k": "v"}, "UA")
+    c.set("b", {"k": "v"}, "UA")
+    c.invalidate("b")
+    await c.stop()
+    c.close()
+    assert list(SQLiteCookieCache(db, migrate_from=None).cache) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_batch_and_newer_changes_win(tmp_path):
+    c = SQLiteCookieCache(str(tmp_path / "cache.db"), migrate_from=None, write_behind=True)
+    failing = [True]
+    real_write = c._write_changes
+    c._write_changes = lambda *args: False if failing[0] else real_write(*args)
+    c._flusher = asyncio.get_running_loop().create_future()  # pretend the flusher runs: changes stay dirty
+
+    c.set("a", {"cf_clearance": "old"}, "UA")
+    c.set("b", {"cf_clearance": "b"}, "UA")
+    assert c.flush() is False
+    stats = c.persistence_stats()
+    assert stats["flushes"] == 0 and stats["flush_failures"] == 1 and stats["pending_changes"] == 2
+
+    c.set("a", {"cf_clearance": "new"}, "UA")  # changed after the failed batch was taken
+    failing[0] = False
+    assert c.flush() is True
+    assert c.persistence_stats()["flushes"] == 1
+    reopened = SQLiteCookieCache(str(tmp_path / "cache.db"), migrate_from=None)
+    assert reopened.get("a").cookies == {"cf_clearance": "new"}
+    assert reopened.get("b") is not None